@@ -0,0 +1,70 @@
+"""Registro de actividad de los proyectos (historial de solo inserción).
+
+Durante una petición, ``registrar`` acumula los eventos en memoria y
+ActividadMiddleware los inserta todos juntos con un único ``bulk_create`` al
+terminar. Fuera de una petición (comandos, shell) se insertan en el momento.
+"""
+from contextvars import ContextVar
+
+from .models import Actividad
+
+TAMANO_PAGINA = 50
+LONGITUD_FRAGMENTO = 80
+
+_pendientes = ContextVar('actividad_pendiente', default=None)
+
+def iniciar():
+    """Abre el búfer de la petición actual; devuelve el token para cerrarlo."""
+    return _pendientes.set([])
+
+def volcar(token):
+    """Inserta los eventos acumulados y cierra el búfer."""
+    pendientes = _pendientes.get()
+    _pendientes.reset(token)
+    if pendientes:
+        Actividad.objects.bulk_create(pendientes)
+
+def registrar(tipo, proyecto, usuario, tarea=None, **datos):
+    """Añade un evento al historial. `tarea`, si se indica, aporta su id y su título."""
+    if tarea is not None:
+        datos.setdefault('tarea', tarea.titulo)
+    evento = Actividad(
+        tipo=tipo,
+        proyecto_id=getattr(proyecto, 'pk', proyecto),
+        usuario_id=getattr(usuario, 'pk', usuario),
+        tarea_id=tarea.pk if tarea is not None else None,
+        datos=datos
+    )
+    pendientes = _pendientes.get()
+    if pendientes is None:
+        evento.save()
+    else:
+        pendientes.append(evento)
+
+def registrar_cambio_estado(tarea, usuario, estado_anterior):
+    """Evento de cambio de estado, si lo ha habido (edición o tablero)."""
+    if tarea.estado != estado_anterior:
+        registrar(
+            'tarea_estado', tarea.proyecto_id, usuario, tarea,
+            de=dict(tarea.ESTADO_OPCIONES).get(estado_anterior, estado_anterior), a=tarea.get_estado_display()
+        )
+
+def registrar_cambios_tarea(tarea, usuario, estado_anterior, asignados_antes, campos):
+    """Eventos de una edición de tarea: estado, asignaciones y demás campos cambiados."""
+    registrar_cambio_estado(tarea, usuario, estado_anterior)
+    asignados = dict(tarea.usuarios_asignados.values_list('id', 'username'))
+    anadidos = sorted(nombre for pk, nombre in asignados.items() if pk not in asignados_antes)
+    quitados = sorted(nombre for pk, nombre in asignados_antes.items() if pk not in asignados)
+    if anadidos or quitados:
+        registrar('tarea_asignacion', tarea.proyecto_id, usuario, tarea, anadidos=anadidos, quitados=quitados)
+    campos = [campo for campo in campos if campo not in ('estado', 'usuarios_asignados')]
+    if campos:
+        registrar('tarea_editada', tarea.proyecto_id, usuario, tarea, campos=campos)
+
+def linea_de_tiempo(eventos, antes=None, tamano=TAMANO_PAGINA):
+    """Página de `eventos` anteriores al id `antes` (keyset) y el cursor de la siguiente."""
+    if antes:
+        eventos = eventos.filter(id__lt=antes)
+    pagina = list(eventos.select_related('usuario').order_by('-id')[:tamano + 1])
+    siguiente = pagina[tamano - 1].id if len(pagina) > tamano else None
+    return pagina[:tamano], siguiente
@@ -1,9 +1,39 @@
 from django.contrib import admin
-from .models import Proyecto, Tarea, Mensaje, Comentario, Grupo, PerfilProyecto
+from .models import (
+    Proyecto, Tarea, Mensaje, Comentario, Grupo, PerfilProyecto, Conversacion, EjecucionRecordatorios,
+    EjecucionResumenes, Actividad, PurgaProyecto
+)
 
 admin.site.register(Proyecto)
 admin.site.register(Tarea)
 admin.site.register(Mensaje)
 admin.site.register(Comentario)
 admin.site.register(Grupo)
-admin.site.register(PerfilProyecto)
\ No newline at end of file
+admin.site.register(PerfilProyecto)
+admin.site.register(Conversacion)
+admin.site.register(EjecucionRecordatorios)
+admin.site.register(EjecucionResumenes)
+
+@admin.register(Actividad)
+class ActividadAdmin(admin.ModelAdmin):
+    """Solo lectura: el historial no se edita."""
+    list_display = ('fecha', 'proyecto', 'usuario', 'tipo', 'tarea_id')
+    list_filter = ('tipo',)
+    list_select_related = ('proyecto', 'usuario')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(PurgaProyecto)
+class PurgaProyectoAdmin(admin.ModelAdmin):
+    """Solo lectura: las purgas las crea eliminar_proyecto y las avanza purgar_proyectos."""
+    list_display = ('titulo', 'proyecto_id', 'solicitada_por', 'solicitada_en', 'paso', 'filas_borradas', 'terminada_en')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
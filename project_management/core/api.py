@@ -0,0 +1,228 @@
+"""API JSON de solo lectura (v1) para proyectos, tareas, comentarios y grupos.
+
+Las filas se leen con ``values_list`` y se codifican directamente, sin
+instanciar modelos. Cada recurso admite:
+
+- ``fields=a,b``: solo esas columnas en el SELECT (el id va siempre).
+- ``include=x,y``: relaciones resueltas con una consulta ``IN`` por
+  inclusión sobre los ids de la página, sea cual sea su tamaño.
+- ``cursor``/``limite``: paginación por clave (id ascendente); la respuesta
+  trae en ``siguiente`` el cursor de la página siguiente o null.
+"""
+import base64
+import binascii
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from . import panel
+from .models import Comentario, Grupo, PerfilProyecto, Tarea, grupos_activos, proyectos_del_usuario
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json, unas 3-5 veces más lento
+    orjson = None
+
+TAMANO_PAGINA = 50
+TAMANO_MAXIMO_PAGINA = 500
+
+def codificar(datos):
+    if orjson is not None:
+        return orjson.dumps(datos)
+    return json.dumps(datos, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+
+def respuesta(datos, status=200):
+    return HttpResponse(codificar(datos), content_type='application/json', status=status)
+
+def error(mensaje, status=400):
+    return respuesta({'error': mensaje}, status=status)
+
+def requiere_login(vista):
+    """Como login_required, pero con un 401 en JSON en lugar de redirigir al formulario."""
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return error('Autenticación requerida', status=401)
+        return vista(request, *args, **kwargs)
+    return envoltura
+
+def _lista_parametro(request, nombre):
+    return [valor for valor in request.GET.get(nombre, '').split(',') if valor]
+
+def _codificar_cursor(pk):
+    return base64.urlsafe_b64encode(str(pk).encode()).decode().rstrip('=')
+
+def _decodificar_cursor(cursor):
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ValueError('Cursor inválido')
+
+def _agrupar(filas):
+    """{clave: [resto de la fila, ...]} a partir de tuplas (clave, ...)."""
+    grupos = {}
+    for clave, *resto in filas:
+        grupos.setdefault(clave, []).append(resto)
+    return grupos
+
+def _asignados(ids):
+    filas = Tarea.usuarios_asignados.through.objects.filter(tarea_id__in=ids).order_by('user__username').values_list(
+        'tarea_id', 'user_id', 'user__username'
+    )
+    return {
+        clave: [{'id': pk, 'username': nombre} for pk, nombre in resto]
+        for clave, resto in _agrupar(filas).items()
+    }
+
+def _comentarios(ids):
+    filas = Comentario.objects.filter(tarea_id__in=ids).order_by('id').values_list(
+        'tarea_id', 'id', 'usuario_id', 'contenido', 'fecha_hora'
+    )
+    return {
+        clave: [
+            {'id': pk, 'usuario': usuario, 'contenido': contenido, 'fecha_hora': fecha}
+            for pk, usuario, contenido, fecha in resto
+        ]
+        for clave, resto in _agrupar(filas).items()
+    }
+
+def _grupos(ids):
+    filas = Grupo.objects.filter(proyecto_id__in=ids).order_by('nombre').values_list('proyecto_id', 'id', 'nombre')
+    return {clave: [{'id': pk, 'nombre': nombre} for pk, nombre in resto] for clave, resto in _agrupar(filas).items()}
+
+def _miembros(ids):
+    filas = PerfilProyecto.objects.filter(grupo_id__in=ids).order_by('usuario__username').values_list(
+        'grupo_id', 'usuario_id', 'usuario__username', 'rol'
+    )
+    return {
+        clave: [{'id': pk, 'username': nombre, 'rol': rol} for pk, nombre, rol in resto]
+        for clave, resto in _agrupar(filas).items()
+    }
+
+class Recurso:
+    """Campos expuestos (nombre público → columna) e inclusiones de un modelo."""
+
+    def __init__(self, campos, inclusiones=None):
+        self.campos = campos
+        self.inclusiones = inclusiones or {}
+
+    def _columnas(self, request):
+        nombres = _lista_parametro(request, 'fields') or list(self.campos)
+        desconocidos = [nombre for nombre in nombres if nombre not in self.campos]
+        if desconocidos:
+            raise ValueError(f"Campos desconocidos: {', '.join(desconocidos)}")
+        nombres = [nombre for nombre in nombres if nombre != 'id']
+        return ['id', *nombres], ['id', *(self.campos[nombre] for nombre in nombres)]
+
+    def _incluir(self, request):
+        nombres = _lista_parametro(request, 'include')
+        desconocidas = [nombre for nombre in nombres if nombre not in self.inclusiones]
+        if desconocidas:
+            raise ValueError(f"Inclusiones desconocidas: {', '.join(desconocidas)}")
+        return nombres
+
+    def serializar(self, request, queryset):
+        """Lista de diccionarios con los campos pedidos y las inclusiones resueltas."""
+        nombres, columnas = self._columnas(request)
+        inclusiones = self._incluir(request)
+        objetos = [dict(zip(nombres, fila)) for fila in queryset.values_list(*columnas)]
+        if objetos and inclusiones:
+            ids = [objeto['id'] for objeto in objetos]
+            for nombre in inclusiones:
+                relacionados = self.inclusiones[nombre](ids)
+                for objeto in objetos:
+                    objeto[nombre] = relacionados.get(objeto['id'], [])
+        return objetos
+
+    def listar(self, request, queryset):
+        try:
+            limite = min(max(int(request.GET.get('limite', TAMANO_PAGINA)), 1), TAMANO_MAXIMO_PAGINA)
+            cursor = request.GET.get('cursor')
+            if cursor:
+                queryset = queryset.filter(id__gt=_decodificar_cursor(cursor))
+            # Una fila de más para saber si hay otra página sin hacer un COUNT
+            objetos = self.serializar(request, queryset.order_by('id')[:limite + 1])
+        except ValueError as excepcion:
+            return error(str(excepcion))
+        siguiente = _codificar_cursor(objetos[limite - 1]['id']) if len(objetos) > limite else None
+        return respuesta({'datos': objetos[:limite], 'siguiente': siguiente})
+
+    def detalle(self, request, queryset, pk):
+        try:
+            objetos = self.serializar(request, queryset.filter(id=pk))
+        except ValueError as excepcion:
+            return error(str(excepcion))
+        if not objetos:
+            return error('No encontrado', status=404)
+        return respuesta(objetos[0])
+
+PROYECTOS = Recurso(
+    {
+        'id': 'id', 'titulo': 'titulo', 'descripcion': 'descripcion', 'fecha_inicio': 'fecha_inicio',
+        'fecha_fin': 'fecha_fin', 'creado_por': 'creado_por_id',
+    },
+    {'grupos': _grupos},
+)
+TAREAS = Recurso(
+    {
+        'id': 'id', 'proyecto': 'proyecto_id', 'titulo': 'titulo', 'descripcion': 'descripcion',
+        'fecha_limite': 'fecha_limite', 'estado': 'estado', 'duracion_dias': 'duracion_dias',
+        'num_comentarios': 'num_comentarios', 'ultimo_comentario_at': 'ultimo_comentario_at',
+    },
+    {'asignados': _asignados, 'comentarios': _comentarios},
+)
+COMENTARIOS = Recurso(
+    {'id': 'id', 'tarea': 'tarea_id', 'usuario': 'usuario_id', 'contenido': 'contenido', 'fecha_hora': 'fecha_hora'},
+)
+GRUPOS = Recurso(
+    {'id': 'id', 'nombre': 'nombre', 'proyecto': 'proyecto_id'},
+    {'miembros': _miembros},
+)
+
+def _tareas_del_usuario(usuario):
+    return Tarea.objects.filter(proyecto__in=proyectos_del_usuario(usuario))
+
+@requiere_login
+def proyectos(request):
+    return PROYECTOS.listar(request, proyectos_del_usuario(request.user))
+
+@requiere_login
+def proyecto(request, proyecto_id):
+    return PROYECTOS.detalle(request, proyectos_del_usuario(request.user), proyecto_id)
+
+@requiere_login
+def tareas_proyecto(request, proyecto_id):
+    if not proyectos_del_usuario(request.user).filter(id=proyecto_id).exists():
+        return error('No encontrado', status=404)
+    return TAREAS.listar(request, Tarea.objects.filter(proyecto_id=proyecto_id))
+
+@requiere_login
+def tarea(request, tarea_id):
+    return TAREAS.detalle(request, _tareas_del_usuario(request.user), tarea_id)
+
+@requiere_login
+def comentarios_tarea(request, tarea_id):
+    if not _tareas_del_usuario(request.user).filter(id=tarea_id).exists():
+        return error('No encontrado', status=404)
+    return COMENTARIOS.listar(request, Comentario.objects.filter(tarea_id=tarea_id))
+
+@requiere_login
+def grupos(request):
+    """Todos los grupos activos, igual que lista_grupos."""
+    return GRUPOS.listar(request, grupos_activos())
+
+@requiere_login
+def consulta_panel(request):
+    """Lectura anidada del panel en una sola petición (ver core.panel)."""
+    try:
+        seleccion, coste = panel.preparar(
+            request.GET.get('consulta') or panel.CONSULTA_POR_DEFECTO,
+            settings.PANEL_PROFUNDIDAD_MAXIMA, settings.PANEL_COSTE_MAXIMO
+        )
+    except panel.ConsultaInvalida as excepcion:
+        return error(str(excepcion))
+    datos, _ = panel.ejecutar(seleccion, request.user)
+    return respuesta({'datos': datos, 'coste': coste})
@@ -0,0 +1,72 @@
+"""Cargadores por lotes (patrón DataLoader) para lecturas anidadas.
+
+Un Cargador acumula las claves que se le piden con ``cargar`` y no consulta
+nada hasta ``despachar``, que resuelve todas las pendientes con una sola
+llamada a su función de lote (una consulta ``IN``). Los valores quedan en
+memoria durante la petición, así que una clave pedida dos veces, o por dos
+caminos distintos, se lee una sola vez.
+"""
+
+class Diferido:
+    """Valor de una clave que estará disponible tras despachar su cargador."""
+    __slots__ = ('cargador', 'clave')
+
+    def __init__(self, cargador, clave):
+        self.cargador = cargador
+        self.clave = clave
+
+    def valor(self):
+        return self.cargador.valores[self.clave]
+
+class Cargador:
+    """`funcion_lote(claves)` devuelve {clave: valor}; las que falten toman `defecto()`."""
+
+    def __init__(self, funcion_lote, defecto=lambda: None):
+        self.funcion_lote = funcion_lote
+        self.defecto = defecto
+        self.valores = {}
+        self.pendientes = set()
+        self.lotes = 0
+
+    def cargar(self, clave):
+        if clave not in self.valores:
+            self.pendientes.add(clave)
+        return Diferido(self, clave)
+
+    def cebar(self, clave, valor):
+        """Guarda un valor ya leído por otro camino para no volver a pedirlo."""
+        self.valores.setdefault(clave, valor)
+        self.pendientes.discard(clave)
+
+    def despachar(self):
+        """Resuelve las claves pendientes con una llamada; devuelve si había alguna."""
+        claves = [clave for clave in self.pendientes if clave not in self.valores]
+        self.pendientes.clear()
+        if not claves:
+            return False
+        resultados = self.funcion_lote(claves)
+        self.lotes += 1
+        for clave in claves:
+            self.valores[clave] = resultados[clave] if clave in resultados else self.defecto()
+        return True
+
+class Cargadores:
+    """Cargadores de una petición, creados bajo demanda y compartidos por nombre."""
+
+    def __init__(self):
+        self._cargadores = {}
+
+    def obtener(self, nombre, fabrica):
+        """Devuelve el cargador `nombre`, creándolo con `fabrica()` la primera vez."""
+        if nombre not in self._cargadores:
+            self._cargadores[nombre] = fabrica()
+        return self._cargadores[nombre]
+
+    def despachar(self):
+        """Despacha hasta que no quede nada pendiente (un lote puede cebar o pedir otros)."""
+        while any([cargador.despachar() for cargador in list(self._cargadores.values())]):
+            pass
+
+    @property
+    def lotes(self):
+        return sum(cargador.lotes for cargador in self._cargadores.values())
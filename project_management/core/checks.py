@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core import checks
+
+LOCMEM = 'django.core.cache.backends.locmem.LocMemCache'
+
+@checks.register(checks.Tags.caches)
+def cache_compartida(app_configs, **kwargs):
+    """Con LocMemCache cada worker invalidaría solo su copia de opciones y versiones."""
+    backend = settings.CACHES.get(settings.CACHE_COMPARTIDA, {}).get('BACKEND')
+    if backend != LOCMEM or settings.DEBUG:
+        return []
+    return [checks.Error(
+        f"La caché '{settings.CACHE_COMPARTIDA}' usa LocMemCache: cada proceso tendría sus propias "
+        "versiones de invalidación y serviría opciones obsoletas.",
+        hint="Usa FileBasedCache, DatabaseCache, Redis o Memcached en CACHE_COMPARTIDA_BACKEND.",
+        id='core.E001',
+    )]
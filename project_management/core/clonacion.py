@@ -0,0 +1,94 @@
+"""Clonado de proyectos como plantilla.
+
+Todo se copia con ``bulk_create`` en una única transacción: el proyecto, sus
+tareas (reiniciadas a 'pendiente'), las filas de usuarios asignados y de
+dependencias y, opcionalmente, los grupos con sus perfiles y roles. Las fechas
+se desplazan lo mismo que la nueva fecha de inicio respecto a la original.
+"""
+from functools import partial
+
+from django.db import transaction
+
+from . import opciones, planificacion
+from .models import Grupo, Notificacion, PerfilProyecto, Proyecto, Tarea
+
+TAMANO_LOTE = 2000
+
+def clonar(original, titulo, fecha_inicio, usuario, copiar_grupos=True, tamano_lote=TAMANO_LOTE):
+    """Crea la copia de `original` a nombre de `usuario` y la devuelve.
+
+    Sin `copiar_grupos` el proyecto nuevo recibe un único grupo con `usuario`
+    como administrador, igual que al crearlo a mano.
+    """
+    desplazamiento = fecha_inicio - original.fecha_inicio
+    with transaction.atomic():
+        proyecto = Proyecto.objects.create(
+            titulo=titulo, descripcion=original.descripcion, fecha_inicio=fecha_inicio,
+            fecha_fin=original.fecha_fin + desplazamiento, creado_por=usuario
+        )
+        _copiar_tareas(original, proyecto, desplazamiento, tamano_lote)
+        if copiar_grupos:
+            _copiar_grupos(original, proyecto, usuario, tamano_lote)
+        else:
+            grupo = Grupo.objects.create(nombre=f'Equipo {titulo}'[:100], proyecto=proyecto)
+            PerfilProyecto.objects.create(usuario=usuario, proyecto=proyecto, grupo=grupo, rol='administrador')
+        Notificacion.objects.create(
+            usuario=usuario, proyecto=proyecto,
+            mensaje=f"Has creado el proyecto '{proyecto.titulo}' a partir de '{original.titulo}'"
+        )
+        # bulk_create no emite señales: se invalida a mano lo que mantienen core.signals
+        for ambito in ('global', 'grupos', f'proyecto:{proyecto.pk}'):
+            transaction.on_commit(partial(opciones.invalidar, ambito))
+        transaction.on_commit(partial(planificacion.invalidar, proyecto.pk))
+    return proyecto
+
+def _copiar_tareas(original, proyecto, desplazamiento, tamano_lote):
+    tareas = list(
+        Tarea.objects.filter(proyecto=original).order_by('id')
+        .values_list('id', 'titulo', 'descripcion', 'fecha_limite', 'duracion_dias')
+    )
+    nuevas = Tarea.objects.bulk_create([
+        Tarea(
+            proyecto=proyecto, titulo=titulo, descripcion=descripcion,
+            fecha_limite=fecha_limite + desplazamiento, duracion_dias=duracion
+        ) for _, titulo, descripcion, fecha_limite, duracion in tareas
+    ], batch_size=tamano_lote)
+    equivalente = {antigua[0]: nueva.pk for antigua, nueva in zip(tareas, nuevas)}
+
+    asignaciones = Tarea.usuarios_asignados.through
+    asignaciones.objects.bulk_create([
+        asignaciones(tarea_id=equivalente[tarea_id], user_id=usuario_id)
+        for tarea_id, usuario_id in asignaciones.objects.filter(
+            tarea__proyecto=original
+        ).values_list('tarea_id', 'user_id').iterator(chunk_size=tamano_lote)
+    ], batch_size=tamano_lote)
+
+    # Solo las dependencias entre tareas del propio proyecto
+    dependencias = Tarea.dependencias.through
+    dependencias.objects.bulk_create([
+        dependencias(from_tarea_id=equivalente[desde], to_tarea_id=equivalente[hacia])
+        for desde, hacia in dependencias.objects.filter(
+            from_tarea__proyecto=original, to_tarea__proyecto=original
+        ).values_list('from_tarea_id', 'to_tarea_id').iterator(chunk_size=tamano_lote)
+    ], batch_size=tamano_lote)
+
+def _copiar_grupos(original, proyecto, usuario, tamano_lote):
+    grupos = list(Grupo.objects.filter(proyecto=original).order_by('id').values_list('id', 'nombre'))
+    nuevos = Grupo.objects.bulk_create([Grupo(nombre=nombre, proyecto=proyecto) for _, nombre in grupos])
+    equivalente = {antiguo[0]: nuevo.pk for antiguo, nuevo in zip(grupos, nuevos)}
+
+    perfiles = [
+        PerfilProyecto(usuario_id=usuario_id, proyecto=proyecto, grupo_id=equivalente.get(grupo_id), rol=rol)
+        for usuario_id, grupo_id, rol in PerfilProyecto.objects.filter(
+            proyecto=original
+        ).values_list('usuario_id', 'grupo_id', 'rol')
+    ]
+    # Quien clona administra la copia aunque no fuera administrador del original
+    propio = next((perfil for perfil in perfiles if perfil.usuario_id == usuario.pk and perfil.grupo_id), None)
+    if propio is not None:
+        propio.rol = 'administrador'
+    else:
+        if not nuevos:
+            nuevos.append(Grupo.objects.create(nombre=f'Equipo {proyecto.titulo}'[:100], proyecto=proyecto))
+        perfiles.append(PerfilProyecto(usuario=usuario, proyecto=proyecto, grupo=nuevos[0], rol='administrador'))
+    PerfilProyecto.objects.bulk_create(perfiles, batch_size=tamano_lote)
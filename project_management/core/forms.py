@@ -2,14 +2,49 @@ from django import forms
 from django.core.exceptions import ValidationError
 from django.contrib.auth.forms import UserCreationForm
 from django.utils.translation import gettext_lazy as _
-from .models import Proyecto, Tarea, Mensaje, Comentario, User, Grupo, PerfilProyecto
+from .models import (
+    Proyecto, Tarea, Mensaje, Comentario, User, Grupo, PerfilProyecto,
+    grupos_activos, proyectos_del_usuario, proyectos_administrados
+)
+from .widgets import AutocompletarSelect, AutocompletarSelectMultiple
+from . import opciones, planificacion
 
 from django import forms
 from .models import Proyecto, Grupo
 
+class OpcionesCacheadasMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """Campo múltiple que renderiza y valida contra una lista de opciones en memoria.
+
+    Tras llamar a ``establecer_opciones`` ni el render ni la validación tocan la
+    base de datos; ``cleaned_data`` sigue siendo un queryset (perezoso) del modelo.
+    """
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.pks_validos = None
+
+    def establecer_opciones(self, opciones):
+        """Recibe pares (pk, etiqueta) ya resueltos, normalmente desde core.opciones."""
+        self.choices = list(opciones)
+        self.pks_validos = {str(pk) for pk, _ in self.choices}
+
+    def _check_values(self, value):
+        if self.pks_validos is None:
+            return super()._check_values(value)
+        pks = set()
+        for pk in value:
+            if str(pk) not in self.pks_validos:
+                raise ValidationError(
+                    self.error_messages['invalid_choice'],
+                    code='invalid_choice',
+                    params={'value': pk},
+                )
+            pks.add(str(pk))
+        return self.queryset.filter(pk__in=pks)
+
 class ProyectoForm(forms.ModelForm):
-    grupos = forms.ModelMultipleChoiceField(
-        queryset=Grupo.objects.all(),
+    grupos = OpcionesCacheadasMultipleChoiceField(
+        queryset=grupos_activos(),
         label="Grupos",
         help_text="Selecciona al menos un grupo para este proyecto.",
         required=True,
@@ -26,8 +61,10 @@ class ProyectoForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        grupos = opciones.grupos_disponibles()
+        self.fields['grupos'].establecer_opciones((pk, nombre) for pk, nombre, _ in grupos)
         if self.instance and self.instance.pk:
-            self.initial['grupos'] = Grupo.objects.filter(proyecto=self.instance)
+            self.initial['grupos'] = [pk for pk, _, proyecto_id in grupos if proyecto_id == self.instance.pk]
             self.initial['fecha_inicio'] = self.instance.fecha_inicio
             self.initial['fecha_fin'] = self.instance.fecha_fin
 
@@ -42,19 +79,36 @@ class ProyectoForm(forms.ModelForm):
 class TareaForm(forms.ModelForm):
     class Meta:
         model = Tarea
-        fields = ['titulo', 'descripcion', 'fecha_limite', 'estado', 'usuarios_asignados']
+        fields = [
+            'titulo', 'descripcion', 'fecha_limite', 'estado', 'usuarios_asignados',
+            'duracion_dias', 'dependencias'
+        ]
         widgets = {
             'fecha_limite': forms.DateInput(attrs={'type': 'date'}),
+            'dependencias': AutocompletarSelectMultiple('autocompletar_tareas'),
+        }
+        labels = {
+            'duracion_dias': 'Duración (días)',
+            'dependencias': 'Bloqueada por',
+        }
+        field_classes = {
+            'usuarios_asignados': OpcionesCacheadasMultipleChoiceField,
         }
 
     def __init__(self, *args, **kwargs):
         proyecto = kwargs.pop('proyecto', None)  # Recibimos el proyecto desde la vista
         super().__init__(*args, **kwargs)
+        self.proyecto = proyecto
+        self.fields['duracion_dias'].required = False
         if proyecto:
-            # Limitar usuarios_asignados a miembros de los grupos del proyecto
-            self.fields['usuarios_asignados'].queryset = User.objects.filter(
-                grupos__proyecto=proyecto
-            ).distinct()
+            # Limitar usuarios_asignados a miembros de los grupos del proyecto (cacheado por versión)
+            campo = self.fields['usuarios_asignados']
+            campo.queryset = User.objects.filter(grupos__proyecto=proyecto).distinct()
+            campo.establecer_opciones(opciones.usuarios_elegibles(proyecto.id))
+            # Las dependencias solo pueden ser otras tareas del mismo proyecto
+            dependencias = self.fields['dependencias']
+            dependencias.queryset = Tarea.objects.filter(proyecto=proyecto).exclude(pk=self.instance.pk)
+            dependencias.widget.parametros = {'proyecto': proyecto.id}
 
     def clean_titulo(self):
         titulo = self.cleaned_data['titulo']
@@ -75,22 +129,55 @@ class TareaForm(forms.ModelForm):
             raise forms.ValidationError("La fecha límite no puede ser anterior a hoy.")
         return fecha_limite
 
+    def clean_duracion_dias(self):
+        duracion = self.cleaned_data['duracion_dias']
+        return self.instance.duracion_dias if duracion is None else duracion
+
+    def clean_dependencias(self):
+        dependencias = self.cleaned_data['dependencias']
+        # Una tarea nueva no puede cerrar un ciclo: todavía nada depende de ella
+        if self.instance.pk and self.proyecto and dependencias:
+            ids = [tarea.pk for tarea in dependencias]
+            try:
+                ciclo = planificacion.obtener(self.proyecto.id).crearia_ciclo(self.instance.pk, ids)
+            except planificacion.CicloError:
+                # El grafo guardado ya tiene un ciclo: se comprueba solo esta tarea
+                ciclo = planificacion.crearia_ciclo(self.proyecto.id, self.instance.pk, ids)
+            if ciclo:
+                raise forms.ValidationError("Estas dependencias crearían un ciclo entre tareas.")
+        return dependencias
+
+class ClonarProyectoForm(forms.Form):
+    """Datos de la copia de un proyecto (ver core.clonacion)."""
+    titulo = forms.CharField(max_length=200, label="Título")
+    fecha_inicio = forms.DateField(
+        label="Fecha de inicio", widget=forms.DateInput(attrs={'type': 'date'}),
+        help_text="Las fechas de la copia se desplazan lo mismo respecto al original."
+    )
+    copiar_grupos = forms.BooleanField(
+        label="Copiar grupos y roles", required=False, initial=True,
+        help_text="Si no se marca, la copia solo tendrá un grupo contigo como administrador."
+    )
+
 class MensajeForm(forms.ModelForm):
-    destinatario = forms.ModelChoiceField(queryset=User.objects.none())
+    destinatario = forms.ModelChoiceField(
+        queryset=User.objects.none(),
+        widget=AutocompletarSelect('autocompletar_usuarios', {'excluir_propio': 1})
+    )
 
     class Meta:
         model = Mensaje
         fields = ['destinatario', 'proyecto', 'contenido']  # Incluimos proyecto como opcional
         widgets = {
-            'proyecto': forms.Select(attrs={'required': False}),  # No requerido
+            'proyecto': AutocompletarSelect('autocompletar_proyectos'),  # No requerido
         }
 
     def __init__(self, *args, proyecto=None, usuario=None, **kwargs):
         super().__init__(*args, **kwargs)
         if usuario:
+            # Los widgets solo renderizan la opción elegida; el queryset acota lo que se valida
             self.fields['destinatario'].queryset = User.objects.exclude(id=usuario.id)
-        if proyecto:  # Si se pasa un proyecto, limitamos las opciones, pero no es obligatorio
-            self.fields['proyecto'].queryset = Proyecto.objects.filter(usuarios_asignados=usuario)
+            self.fields['proyecto'].queryset = proyectos_del_usuario(usuario)
 
     def clean_contenido(self):
         contenido = self.cleaned_data['contenido']
@@ -133,6 +220,9 @@ class AsignarUsuarioGrupoForm(forms.ModelForm):
     class Meta:
         model = PerfilProyecto
         fields = ['usuario', 'rol']
+        widgets = {
+            'usuario': AutocompletarSelect('autocompletar_usuarios'),
+        }
 
     def __init__(self, *args, proyecto=None, grupo=None, **kwargs):
         super().__init__(*args, **kwargs)
@@ -165,7 +255,8 @@ class CrearUsuarioForm(UserCreationForm):
         queryset=Proyecto.objects.all(),
         label=_("Proyecto"),
         help_text=_("Selecciona un proyecto (opcional)."),
-        required=False  # Aseguramos que sea opcional
+        required=False,  # Aseguramos que sea opcional
+        widget=AutocompletarSelect('autocompletar_proyectos', {'ambito': 'administrados'})
     )
 
     class Meta:
@@ -184,8 +275,11 @@ class CrearUsuarioForm(UserCreationForm):
             'password2': _("Repite la contraseña para confirmarla."),
         }
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, usuario=None, **kwargs):
         super().__init__(*args, **kwargs)
+        if usuario:
+            # Solo se puede asignar el usuario a proyectos que administra quien lo crea
+            self.fields['proyecto'].queryset = proyectos_administrados(usuario)
         # Personalizar mensajes de error y ayuda para contraseñas en español
         self.fields['password1'].help_text = _("Tu contraseña debe tener al menos 8 caracteres y no puede ser demasiado común.")
         self.fields['password2'].help_text = _("Repite la contraseña para confirmarla.")
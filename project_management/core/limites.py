@@ -0,0 +1,62 @@
+"""Limitador de intentos de login con ventana deslizante en la caché.
+
+Cada clave (IP o nombre de usuario) tiene un contador por ventana fija de
+LIMITE_LOGIN_VENTANA segundos. La ventana deslizante se aproxima sumando al
+contador actual la parte proporcional del anterior, lo que solo requiere dos
+entradas de caché por clave y ninguna escritura en la base de datos.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+PREFIJO = 'core:login'
+
+def _cache():
+    return caches[settings.LIMITE_LOGIN_CACHE]
+
+def _claves(ambito, valor, ventana):
+    """Claves de la ventana actual y la anterior; el valor va con hash (longitud y caracteres seguros)."""
+    resumen = hashlib.md5(valor.lower().encode()).hexdigest()
+    return f'{PREFIJO}:{ambito}:{resumen}:{ventana}', f'{PREFIJO}:{ambito}:{resumen}:{ventana - 1}'
+
+def _identificadores(ip, usuario):
+    identificadores = []
+    if ip:
+        identificadores.append(('ip', ip, settings.LIMITE_LOGIN_POR_IP))
+    if usuario:
+        identificadores.append(('usuario', usuario, settings.LIMITE_LOGIN_POR_USUARIO))
+    return identificadores
+
+def excede(ip, usuario, ahora=None):
+    """True si la IP o el usuario ya han agotado sus intentos en la ventana deslizante."""
+    ahora = time.time() if ahora is None else ahora
+    duracion = settings.LIMITE_LOGIN_VENTANA
+    ventana, transcurrido = divmod(ahora, duracion)
+    peso_anterior = 1 - transcurrido / duracion
+    identificadores = _identificadores(ip, usuario)
+    claves = [_claves(ambito, valor, int(ventana)) for ambito, valor, _ in identificadores]
+    contadores = _cache().get_many([clave for par in claves for clave in par])
+    for (_, _, limite), (actual, anterior) in zip(identificadores, claves):
+        if contadores.get(actual, 0) + contadores.get(anterior, 0) * peso_anterior >= limite:
+            return True
+    return False
+
+def registrar(ip, usuario, ahora=None):
+    """Suma un intento a la ventana actual de la IP y del usuario."""
+    ahora = time.time() if ahora is None else ahora
+    duracion = settings.LIMITE_LOGIN_VENTANA
+    cache = _cache()
+    for ambito, valor, _ in _identificadores(ip, usuario):
+        actual, _ = _claves(ambito, valor, int(ahora // duracion))
+        # Dura dos ventanas: mientras es la actual y mientras es la anterior
+        if not cache.add(actual, 1, duracion * 2):
+            try:
+                cache.incr(actual)
+            except ValueError:  # Caducó entre add e incr
+                cache.add(actual, 1, duracion * 2)
+
+def segundos_hasta_reintento(ahora=None):
+    ahora = time.time() if ahora is None else ahora
+    return int(settings.LIMITE_LOGIN_VENTANA - ahora % settings.LIMITE_LOGIN_VENTANA) + 1
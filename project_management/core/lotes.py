@@ -0,0 +1,11 @@
+"""Recorrido por lotes de iterables grandes (p. ej. consultas con ``iterator()``)."""
+from itertools import islice
+
+def partir(filas, tamano):
+    """Listas de hasta `tamano` elementos de `filas`, consumiéndolo una sola vez."""
+    filas = iter(filas)
+    while True:
+        lote = list(islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
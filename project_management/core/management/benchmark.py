@@ -0,0 +1,21 @@
+"""Utilidades comunes de los comandos benchmark_*."""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+
+@contextmanager
+def datos_revertidos():
+    """Transacción para los datos de prueba que se revierte siempre al salir."""
+    with transaction.atomic():
+        yield
+        transaction.set_rollback(True)
+
+def cliente(usuario):
+    """Client de pruebas con la sesión de `usuario` y un host que ALLOWED_HOSTS acepta."""
+    # Con ALLOWED_HOSTS vacío y DEBUG, Django solo acepta localhost
+    host = next((h for h in settings.ALLOWED_HOSTS if h != '*' and not h.startswith('.')), 'localhost')
+    cliente = Client(HTTP_HOST=host)
+    cliente.force_login(usuario)
+    return cliente
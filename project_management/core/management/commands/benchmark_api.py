@@ -0,0 +1,101 @@
+import random
+import time
+from datetime import date, timedelta
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import api
+from core.management import benchmark
+from core.models import Comentario, Grupo, PerfilProyecto, Proyecto, Tarea, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el rendimiento de la API v1 recorriendo todas las páginas de tareas de un "
+        "proyecto sintético. Los datos se crean en una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tareas', type=int, default=20000)
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--asignados-por-tarea', type=int, default=3)
+        parser.add_argument('--comentarios-por-tarea', type=int, default=2)
+        parser.add_argument('--limite', type=int, default=api.TAMANO_MAXIMO_PAGINA)
+        parser.add_argument(
+            '--comparar', action='store_true',
+            help="Repite las mediciones con el módulo json en lugar de orjson."
+        )
+
+    def handle(self, *args, **options):
+        with benchmark.datos_revertidos():
+            usuario, proyecto = self._preparar_datos(options)
+            cliente = benchmark.cliente(usuario)
+            url = reverse('api_tareas_proyecto', args=[proyecto.id])
+            consultas = [
+                ('completo', {}),
+                ('fields=titulo,estado', {'fields': 'titulo,estado'}),
+                ('include=asignados,comentarios', {'include': 'asignados,comentarios'}),
+            ]
+            codificadores = [('orjson' if api.orjson else 'json', api.orjson)]
+            if options['comparar'] and api.orjson:
+                codificadores.append(('json', None))
+            for codificador, modulo in codificadores:
+                with mock.patch.object(api, 'orjson', modulo):
+                    for nombre, parametros in consultas:
+                        self._medir(cliente, url, dict(parametros, limite=options['limite']), f'{codificador} {nombre}')
+
+    def _medir(self, cliente, url, parametros, etiqueta):
+        filas = paginas = octetos = 0
+        inicio = time.perf_counter()
+        with CaptureQueriesContext(connection) as capturadas:
+            while True:
+                response = cliente.get(url, parametros)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} devolvió {response.status_code}")
+                cuerpo = response.json()
+                filas += len(cuerpo['datos'])
+                paginas += 1
+                octetos += len(response.content)
+                if not cuerpo['siguiente']:
+                    break
+                parametros = dict(parametros, cursor=cuerpo['siguiente'])
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{etiqueta:<40} {filas} filas en {paginas} páginas, {duracion:.2f} s "
+            f"({filas / duracion:,.0f} filas/s), {len(capturadas) / paginas:.1f} consultas/página, "
+            f"{octetos / 1024:,.0f} KiB"
+        )
+
+    def _preparar_datos(self, options):
+        rng = random.Random(1)
+        hoy = date.today()
+        usuarios = User.objects.bulk_create([
+            User(username=f'api_{i:05d}') for i in range(options['usuarios'])
+        ])
+        usuario = usuarios[0]
+        proyecto = Proyecto.objects.create(
+            titulo='Proyecto API', descripcion='Benchmark', fecha_inicio=hoy,
+            fecha_fin=hoy + timedelta(days=365), creado_por=usuario
+        )
+        grupo = Grupo.objects.create(nombre='Equipo API', proyecto=proyecto)
+        PerfilProyecto.objects.create(usuario=usuario, proyecto=proyecto, grupo=grupo, rol='administrador')
+        tareas = Tarea.objects.bulk_create([
+            Tarea(
+                proyecto=proyecto, titulo=f'Tarea {i}', descripcion='Descripción de la tarea de prueba',
+                fecha_limite=hoy + timedelta(days=rng.randint(0, 365))
+            ) for i in range(options['tareas'])
+        ], batch_size=5000)
+        relacion = Tarea.usuarios_asignados.through
+        relacion.objects.bulk_create([
+            relacion(tarea_id=tarea.id, user_id=asignado.id)
+            for tarea in tareas for asignado in rng.sample(usuarios, options['asignados_por_tarea'])
+        ], batch_size=5000)
+        Comentario.objects.bulk_create([
+            Comentario(tarea=tarea, usuario=rng.choice(usuarios), contenido=f'Comentario {i} de la tarea')
+            for tarea in tareas for i in range(options['comentarios_por_tarea'])
+        ], batch_size=5000)
+        return usuario, proyecto
@@ -0,0 +1,96 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core import reportes
+from core.management import benchmark
+from core.models import Proyecto, Tarea, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el informe de carga (core.reportes) sobre un volumen sintético de "
+        "asignaciones de tareas. Los datos se crean en una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asignaciones', type=int, default=1_000_000)
+        parser.add_argument('--usuarios', type=int, default=2000)
+        parser.add_argument('--proyectos', type=int, default=50)
+        parser.add_argument('--asignados-por-tarea', type=int, default=3)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument(
+            '--comparar', action='store_true',
+            help="Agrega también con un bucle de Python puro sobre las mismas tuplas, como referencia."
+        )
+
+    def handle(self, *args, **options):
+        with benchmark.datos_revertidos():
+            self._medir(options)
+
+    def _medir(self, options):
+        hoy = timezone.localdate()
+        inicio = time.perf_counter()
+        total = self._preparar_datos(options, hoy)
+        self.stdout.write(f"Datos: {total} asignaciones en {time.perf_counter() - inicio:.1f} s")
+
+        asignaciones = Tarea.usuarios_asignados.through.objects.exclude(tarea__estado='completada')
+        columnas = ('user_id', 'tarea__proyecto_id', 'tarea__estado', 'tarea__fecha_limite')
+        inicio = time.perf_counter()
+        filas = sum(1 for _ in asignaciones.values_list(*columnas).iterator(chunk_size=reportes.TAMANO_LOTE))
+        lectura = time.perf_counter() - inicio
+        self.stdout.write(f"Solo lectura: {filas} filas abiertas en {lectura:.2f} s ({filas / lectura:,.0f} filas/s)")
+
+        inicio = time.perf_counter()
+        informe = reportes.calcular_carga(hoy)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"Informe NumPy: {duracion:.2f} s en total, {max(duracion - lectura, 0):.2f} s de agregación "
+            f"({len(informe['usuarios'])} usuarios × {len(informe['semanas'])} semanas)"
+        )
+
+        if options['comparar']:
+            inicio = time.perf_counter()
+            lunes, ultima = informe['semanas'][0], len(informe['semanas']) - 1
+            abiertas, vencidas = Counter(), Counter()
+            for usuario, _, _, fecha in asignaciones.values_list(*columnas).iterator(chunk_size=reportes.TAMANO_LOTE):
+                semana = min(max((fecha - lunes).days // 7, 0), ultima)
+                abiertas[usuario, semana] += 1
+                if fecha < hoy:
+                    vencidas[usuario, semana] += 1
+            self.stdout.write(f"Python puro: {time.perf_counter() - inicio:.2f} s")
+
+    def _preparar_datos(self, options, hoy):
+        rng = random.Random(options['semilla'])
+        usuarios = User.objects.bulk_create([
+            User(username=f'carga_{i:06d}') for i in range(options['usuarios'])
+        ], batch_size=5000)
+        proyectos = Proyecto.objects.bulk_create([
+            Proyecto(
+                titulo=f'Proyecto carga {i:04d}', descripcion='Benchmark', fecha_inicio=hoy,
+                fecha_fin=hoy + timedelta(days=365), creado_por=usuarios[0]
+            ) for i in range(options['proyectos'])
+        ])
+        por_tarea = options['asignados_por_tarea']
+        num_tareas = options['asignaciones'] // por_tarea
+        estados = [valor for valor, _ in Tarea.ESTADO_OPCIONES]
+        relacion = Tarea.usuarios_asignados.through
+        creadas = 0
+        for desde in range(0, num_tareas, 10000):
+            tareas = Tarea.objects.bulk_create([
+                Tarea(
+                    proyecto=rng.choice(proyectos), titulo=f'Tarea {i}', descripcion='Benchmark',
+                    fecha_limite=hoy + timedelta(days=rng.randint(-90, 120)), estado=rng.choice(estados)
+                ) for i in range(desde, min(desde + 10000, num_tareas))
+            ])
+            filas = [
+                relacion(tarea_id=tarea.id, user_id=usuario.id)
+                for tarea in tareas for usuario in rng.sample(usuarios, por_tarea)
+            ]
+            relacion.objects.bulk_create(filas, batch_size=10000)
+            creadas += len(filas)
+        return creadas
@@ -0,0 +1,171 @@
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.backends import django as backend_django
+from django.template.loader import render_to_string
+from django.test import override_settings
+from django.urls import reverse
+
+from core.management import benchmark
+from core.models import (
+    Proyecto, Grupo, PerfilProyecto, Tarea, Comentario, Mensaje, Notificacion, User
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de render de plantilla, el tiempo total y los bytes de cada página "
+        "de templates/core con datos de tamaño realista. Los datos se crean en una "
+        "transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--usuarios', type=int, default=100)
+        parser.add_argument('--grupos', type=int, default=30)
+        parser.add_argument('--tareas', type=int, default=200)
+        parser.add_argument('--comentarios', type=int, default=100)
+        parser.add_argument('--mensajes', type=int, default=200)
+        parser.add_argument('--notificaciones', type=int, default=300)
+        parser.add_argument(
+            '--sin-cache-plantillas', action='store_true',
+            help="Usa los cargadores sin caché, para comparar con la configuración normal."
+        )
+
+    def handle(self, *args, **options):
+        resultados = []
+        with ExitStack() as pila:
+            if options['sin_cache_plantillas']:
+                plantillas = [dict(settings.TEMPLATES[0], OPTIONS=dict(settings.TEMPLATES[0]['OPTIONS']))]
+                plantillas[0]['OPTIONS']['loaders'] = [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]
+                pila.enter_context(override_settings(TEMPLATES=plantillas))
+            tiempos_render = []
+            render_original = backend_django.Template.render
+
+            def render_medido(plantilla, context=None, request=None):
+                inicio = time.perf_counter()
+                try:
+                    return render_original(plantilla, context, request)
+                finally:
+                    tiempos_render.append(time.perf_counter() - inicio)
+
+            pila.enter_context(mock.patch.object(backend_django.Template, 'render', render_medido))
+            with benchmark.datos_revertidos():
+                usuario, paginas = self._preparar_datos(options)
+                cliente = benchmark.cliente(usuario)
+                for plantilla, url in paginas:
+                    resultados.append(self._medir(cliente, plantilla, url, options['repeticiones'], tiempos_render))
+
+        cubiertas = {plantilla for plantilla, *_ in resultados}
+        for ruta in sorted(Path(settings.BASE_DIR, 'templates', 'core').glob('*.html')):
+            if f'core/{ruta.name}' not in cubiertas:
+                self.stdout.write(self.style.WARNING(f"Sin medir: core/{ruta.name}"))
+        self.stdout.write(f"{'Plantilla':<36}{'render ms':>11}{'total ms':>11}{'p95 ms':>9}{'bytes':>10}")
+        for plantilla, render_ms, total_ms, p95_ms, tamano in resultados:
+            self.stdout.write(f"{plantilla:<36}{render_ms:>11.2f}{total_ms:>11.2f}{p95_ms:>9.2f}{tamano:>10}")
+
+    def _medir(self, cliente, plantilla, url, repeticiones, tiempos_render):
+        totales, renders, tamano = [], [], 0
+        for _ in range(repeticiones):
+            tiempos_render.clear()
+            inicio = time.perf_counter()
+            if url is None:
+                contenido = render_to_string(plantilla, {'cooloff_time': settings.AXES_COOLOFF_TIME}).encode()
+            else:
+                response = cliente.get(url)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{url} devolvió {response.status_code}")
+                contenido = response.content
+            totales.append((time.perf_counter() - inicio) * 1000)
+            renders.append(sum(tiempos_render) * 1000)
+            tamano = len(contenido)
+        p95 = sorted(totales)[max(int(len(totales) * 0.95) - 1, 0)]
+        return plantilla, statistics.median(renders), statistics.median(totales), p95, tamano
+
+    def _preparar_datos(self, options):
+        hoy = date.today()
+        usuario = User.objects.create_superuser(username='benchmark_admin', password=None)
+        otros = User.objects.bulk_create([
+            User(username=f'benchmark_{i:05d}', email=f'benchmark_{i:05d}@example.com')
+            for i in range(options['usuarios'])
+        ])
+        proyecto = Proyecto.objects.create(
+            titulo='Proyecto Benchmark', descripcion='Proyecto con datos de volumen realista.',
+            fecha_inicio=hoy, fecha_fin=hoy + timedelta(days=180), creado_por=usuario
+        )
+        grupos = Grupo.objects.bulk_create([
+            Grupo(nombre=f'Grupo {i:03d}', proyecto=proyecto) for i in range(options['grupos'])
+        ])
+        PerfilProyecto.objects.create(usuario=usuario, proyecto=proyecto, grupo=grupos[0], rol='administrador')
+        PerfilProyecto.objects.bulk_create([
+            PerfilProyecto(usuario=otro, proyecto=proyecto, grupo=grupos[i % len(grupos)], rol='miembro')
+            for i, otro in enumerate(otros)
+        ])
+        tareas = Tarea.objects.bulk_create([
+            Tarea(
+                proyecto=proyecto, titulo=f'Tarea {i:05d}',
+                descripcion='Descripción de la tarea con algo de texto para simular contenido real. ' * 3,
+                fecha_limite=hoy + timedelta(days=i % 90),
+                estado=Tarea.ESTADO_OPCIONES[i % len(Tarea.ESTADO_OPCIONES)][0]
+            ) for i in range(options['tareas'])
+        ])
+        Tarea.usuarios_asignados.through.objects.bulk_create([
+            Tarea.usuarios_asignados.through(tarea_id=tarea.id, user_id=otros[(i + k) % len(otros)].id)
+            for i, tarea in enumerate(tareas) for k in range(3)
+        ])
+        # Cambios recientes que devuelve el sondeo de lista_tareas (cambios_tareas?desde=0)
+        Tarea.marcar_cambiadas([tarea.id for tarea in tareas[:20]])
+        Comentario.objects.bulk_create([
+            Comentario(tarea=tareas[0], usuario=otros[i % len(otros)], contenido=f'Comentario {i}')
+            for i in range(options['comentarios'])
+        ])
+        primero = Mensaje.objects.create(remitente=otros[0], destinatario=usuario, proyecto=proyecto, contenido='Hola')
+        Mensaje.objects.bulk_create([
+            Mensaje(
+                remitente=otros[0] if i % 2 else usuario, destinatario=usuario if i % 2 else otros[0],
+                proyecto=proyecto, conversacion=primero.conversacion, contenido=f'Mensaje de prueba número {i}'
+            ) for i in range(options['mensajes'])
+        ])
+        Notificacion.objects.bulk_create([
+            Notificacion(usuario=usuario, proyecto=proyecto, mensaje=f'Notificación {i}', leida=i % 3 == 0)
+            for i in range(options['notificaciones'])
+        ])
+        paginas = [
+            ('core/lista_proyectos.html', reverse('lista_proyectos')),
+            ('core/crear_proyecto.html', reverse('crear_proyecto')),
+            ('core/editar_proyecto.html', reverse('editar_proyecto', args=[proyecto.id])),
+            ('core/eliminar_proyecto.html', reverse('eliminar_proyecto', args=[proyecto.id])),
+            ('core/clonar_proyecto.html', reverse('clonar_proyecto', args=[proyecto.id])),
+            ('core/lista_tareas.html', reverse('lista_tareas', args=[proyecto.id])),
+            ('core/tarea_tarjeta.html', reverse('cambios_tareas', args=[proyecto.id]) + '?desde=0'),
+            ('core/diagrama_gantt.html', reverse('diagrama_gantt', args=[proyecto.id])),
+            ('core/tablero_tareas.html', reverse('tablero_tareas', args=[proyecto.id])),
+            ('core/crear_tarea.html', reverse('crear_tarea', args=[proyecto.id])),
+            ('core/editar_tarea.html', reverse('editar_tarea', args=[proyecto.id, tareas[0].id])),
+            ('core/eliminar_tarea.html', reverse('eliminar_tarea', args=[proyecto.id, tareas[0].id])),
+            ('core/comentarios_tarea.html', reverse('comentarios_tarea', args=[proyecto.id, tareas[0].id])),
+            ('core/mensajes_proyecto.html', reverse('mensajes_proyecto', args=[proyecto.id])),
+            ('core/gestionar_grupos.html', reverse('gestionar_grupos')),
+            ('core/lista_grupos.html', reverse('lista_grupos')),
+            ('core/crear_grupo_general.html', reverse('crear_grupo_general')),
+            ('core/asignar_usuario_grupo.html', reverse('asignar_usuario_grupo', args=[proyecto.id, grupos[0].id])),
+            ('core/lista_notificaciones.html', reverse('lista_notificaciones')),
+            ('core/crear_usuario.html', reverse('crear_usuario')),
+            ('core/bandeja_entrada.html', reverse('bandeja_entrada')),
+            ('core/ver_conversacion.html', reverse('ver_conversacion', args=[primero.conversacion_id])),
+            ('core/responder_mensaje.html', reverse('responder_mensaje', args=[primero.id])),
+            ('core/lista_perfiles.html', reverse('lista_perfiles')),
+            ('core/informe_carga.html', reverse('informe_carga')),
+            ('core/actividad.html', reverse('actividad_proyecto', args=[proyecto.id])),
+            ('core/lockout.html', None),
+        ]
+        return usuario, paginas
@@ -0,0 +1,80 @@
+import random
+import time
+
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management.base import BaseCommand
+
+from core import resumenes
+from core.management import benchmark
+from core.models import Notificacion, User
+
+
+class _Serializar(BaseEmailBackend):
+    """Genera el mensaje MIME completo de cada correo y lo descarta, sin acumularlos como locmem."""
+
+    def send_messages(self, email_messages):
+        self.bytes = getattr(self, 'bytes', 0) + sum(len(m.message().as_bytes()) for m in email_messages)
+        return len(email_messages)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide una pasada de enviar_resumenes sobre usuarios y notificaciones sintéticos. Por "
+        "defecto los correos se serializan y se descartan; con --backend se envían de verdad "
+        "(p. ej. el SMTP del proyecto apuntando a un servidor local). Los datos se crean en "
+        "una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=100_000)
+        parser.add_argument('--notificaciones-por-usuario', type=int, default=5)
+        parser.add_argument('--tamano-lote', type=int, default=resumenes.TAMANO_LOTE)
+        parser.add_argument('--backend', help="Ruta de un backend de correo de Django.")
+        parser.add_argument('--semilla', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with benchmark.datos_revertidos():
+            self._medir(options)
+
+    def _medir(self, options):
+        inicio = time.perf_counter()
+        total = self._preparar_datos(options)
+        self.stdout.write(f"Datos: {options['usuarios']} usuarios, {total} notificaciones en {time.perf_counter() - inicio:.1f} s")
+
+        conexion = get_connection(options['backend']) if options['backend'] else _Serializar()
+        ejecucion = resumenes.enviar(options['tamano_lote'], conexion=conexion)
+        segundos = max(ejecucion.duracion_ms / 1000, 0.001)
+        self.stdout.write(
+            f"Pasada: {ejecucion.correos_enviados} correos en {segundos:.2f} s "
+            f"({ejecucion.correos_enviados / segundos:,.0f} correos/s, "
+            f"{ejecucion.notificaciones / segundos:,.0f} notificaciones/s, {ejecucion.lotes} lotes)"
+        )
+        if isinstance(conexion, _Serializar):
+            self.stdout.write(f"Tamaño medio: {conexion.bytes / max(ejecucion.correos_enviados, 1):,.0f} bytes por correo")
+
+        inicio = time.perf_counter()
+        repetida = resumenes.enviar(options['tamano_lote'], conexion=conexion)
+        self.stdout.write(
+            f"Segunda pasada: {repetida.correos_enviados} correos en {time.perf_counter() - inicio:.2f} s"
+        )
+
+    def _preparar_datos(self, options):
+        rng = random.Random(options['semilla'])
+        usuarios = User.objects.bulk_create([
+            User(username=f'resumen_{i:06d}', email=f'resumen_{i:06d}@example.com')
+            for i in range(options['usuarios'])
+        ], batch_size=5000)
+        maximo = options['notificaciones_por_usuario']
+        creadas = 0
+        for desde in range(0, len(usuarios), 5000):
+            filas = [
+                Notificacion(
+                    usuario=usuario, mensaje=f"La tarea 'Tarea {rng.randint(1, 10000)}' ha sido modificada",
+                    contador=rng.randint(1, 3)
+                )
+                for usuario in usuarios[desde:desde + 5000] for _ in range(rng.randint(1, maximo))
+            ]
+            Notificacion.objects.bulk_create(filas, batch_size=5000)
+            creadas += len(filas)
+        return creadas
@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.management import benchmark
+from core.models import Grupo, PerfilProyecto, Proyecto, User
+
+MOTORES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+
+def medir_lista_proyectos(usuario, motor, repeticiones):
+    """Consultas por petición y mediana en ms de lista_proyectos con el motor de sesiones dado."""
+    with override_settings(SESSION_ENGINE=motor):
+        cliente = benchmark.cliente(usuario)
+        url = reverse('lista_proyectos')
+        cliente.get(url)  # Calienta la caché de sesiones y la de plantillas
+        consultas, tiempos = [], []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            with CaptureQueriesContext(connection) as capturadas:
+                response = cliente.get(url)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} devolvió {response.status_code}")
+            consultas.append(len(capturadas))
+        return statistics.mean(consultas), statistics.median(tiempos)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara las consultas y el tiempo por petición de lista_proyectos con cada motor "
+        "de sesiones. Los datos se crean en una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--proyectos', type=int, default=20)
+
+    def handle(self, *args, **options):
+        resultados = []
+        with benchmark.datos_revertidos():
+            usuario = self._preparar_datos(options['proyectos'])
+            for modo, motor in MOTORES.items():
+                resultados.append((modo, *medir_lista_proyectos(usuario, motor, options['repeticiones'])))
+
+        self.stdout.write(f"{'Modo':<12}{'consultas':>11}{'ms':>9}")
+        for modo, consultas, ms in resultados:
+            self.stdout.write(f"{modo:<12}{consultas:>11.1f}{ms:>9.2f}")
+        base = resultados[0][1]
+        for modo, consultas, _ in resultados[1:]:
+            self.stdout.write(f"{modo}: {base - consultas:.1f} consultas menos por petición que 'db'")
+
+    def _preparar_datos(self, num_proyectos):
+        usuario = User.objects.create_user(username='benchmark_sesiones', password=None)
+        for i in range(num_proyectos):
+            proyecto = Proyecto.objects.create(
+                titulo=f'Proyecto sesiones {i:03d}', descripcion='Benchmark',
+                fecha_inicio='2025-01-01', fecha_fin='2025-12-31', creado_por=usuario
+            )
+            grupo = Grupo.objects.create(nombre='Equipo', proyecto=proyecto)
+            PerfilProyecto.objects.create(usuario=usuario, proyecto=proyecto, grupo=grupo, rol='miembro')
+        return usuario
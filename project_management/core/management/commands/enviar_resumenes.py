@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import resumenes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía a cada usuario un correo con sus notificaciones sin leer desde el último "
+        "resumen. Sin --intervalo hace una sola pasada (para cron, p. ej. una vez al día); "
+        "con él se queda en bucle. Debe haber una sola instancia en marcha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamano-lote', type=int, default=resumenes.TAMANO_LOTE,
+            help="Correos por envío y filas leídas por bloque."
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help="Segundos entre pasadas; 0 para una sola pasada."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.monotonic()
+            ejecucion = resumenes.enviar(options['tamano_lote'])
+            segundos = max(ejecucion.duracion_ms / 1000, 0.001)
+            self.stdout.write(
+                f"{ejecucion.inicio:%Y-%m-%d %H:%M:%S}: {ejecucion.correos_enviados} correos "
+                f"({ejecucion.correos_enviados / segundos:,.0f}/s) con {ejecucion.notificaciones} notificaciones "
+                f"en {ejecucion.lotes} lotes, {ejecucion.duracion_ms} ms"
+            )
+            if not options['intervalo']:
+                return
+            try:
+                time.sleep(max(options['intervalo'] - (time.monotonic() - inicio), 0))
+            except KeyboardInterrupt:
+                return
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea las particiones mensuales futuras de Mensaje y Notificacion y archiva "
+        "(CSV comprimido) las que superan la retención configurada. Solo PostgreSQL; "
+        "en otros motores no hace nada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convertir', action='store_true',
+            help="Convierte primero las tablas aún no particionadas (operación pesada, una sola vez)."
+        )
+        parser.add_argument(
+            '--meses-futuros', type=int, default=settings.PARTICIONES_MESES_FUTUROS,
+            help="Meses por delante para los que se crean particiones."
+        )
+        parser.add_argument(
+            '--sin-archivar', action='store_true',
+            help="No desvincula ni archiva particiones caducadas."
+        )
+
+    def handle(self, *args, **options):
+        if not particiones.soportado(connection):
+            self.stdout.write(f"Particionado no disponible en '{connection.vendor}'; no se hace nada.")
+            return
+        hoy = timezone.now().date()
+        for tabla, (columna, meses_retencion) in particiones.tablas_particionadas().items():
+            with transaction.atomic(), connection.cursor() as cursor:
+                if not particiones.esta_particionada(cursor, tabla):
+                    if not options['convertir']:
+                        self.stdout.write(self.style.WARNING(
+                            f"{tabla} no está particionada; usa --convertir para migrarla."
+                        ))
+                        continue
+                    particiones.convertir_tabla(cursor, tabla, columna, options['meses_futuros'], hoy)
+                    self.stdout.write(self.style.SUCCESS(f"{tabla} convertida a tabla particionada."))
+                mes = particiones.inicio_mes(hoy)
+                for _ in range(options['meses_futuros'] + 1):
+                    cursor.execute(particiones.sql_crear_particion(tabla, mes))
+                    mes = particiones.sumar_meses(mes, 1)
+            if options['sin_archivar']:
+                continue
+            with connection.cursor() as cursor:
+                caducadas = particiones.particiones_caducadas(
+                    particiones.particiones_existentes(cursor, tabla), hoy, meses_retencion
+                )
+            for particion in caducadas:
+                # Una transacción por partición: si falla el volcado, sigue vinculada
+                with transaction.atomic(), connection.cursor() as cursor:
+                    destino = particiones.archivar_particion(
+                        cursor, tabla, particion, settings.DIRECTORIO_ARCHIVO_PARTICIONES
+                    )
+                self.stdout.write(f"{particion} archivada en {destino}.")
+        self.stdout.write(self.style.SUCCESS("Particiones al día."))
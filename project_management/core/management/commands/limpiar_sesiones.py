@@ -0,0 +1,45 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las sesiones caducadas por lotes, para no bloquear django_session con un "
+        "único DELETE enorme. Con los motores sin tabla delega en clear_expired()."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=5000)
+        parser.add_argument(
+            '--pausa', type=float, default=0,
+            help="Segundos de espera entre lotes, para repartir la carga."
+        )
+
+    def handle(self, *args, **options):
+        if settings.SESSION_MODO not in ('db', 'cached_db'):
+            # file limpia su directorio; cache y cookies caducan solas
+            import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+            self.stdout.write(f"Modo '{settings.SESSION_MODO}': sin tabla de sesiones que limpiar.")
+            return
+
+        ahora = timezone.now()
+        inicio = time.perf_counter()
+        borradas = lotes = 0
+        while True:
+            claves = list(
+                Session.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:options['tamano_lote']]
+            )
+            if not claves:
+                break
+            borradas += Session.objects.filter(session_key__in=claves).delete()[0]
+            lotes += 1
+            if options['pausa']:
+                time.sleep(options['pausa'])
+        self.stdout.write(
+            f"{borradas} sesiones caducadas borradas en {lotes} lotes ({time.perf_counter() - inicio:.2f} s)"
+        )
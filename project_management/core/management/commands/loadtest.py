@@ -0,0 +1,282 @@
+import http.client
+import multiprocessing
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+from core.models import PerfilProyecto, User
+from .sembrar_loadtest import CONTRASENA, PREFIJO
+
+# Peso relativo de cada acción en la sesión de un usuario virtual
+MEZCLA = {
+    'lista_proyectos': 25,
+    'lista_tareas': 30,
+    'bandeja_json': 30,  # El chat abierto sondea su bandeja
+    'enviar_mensaje_chat': 10,
+    'crear_tarea': 5,
+}
+PATRON_CSRF = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+class UsuarioVirtual:
+    """Sesión HTTP de un usuario sintético: cookies propias y una conexión persistente."""
+
+    def __init__(self, url, username, pk, proyectos, destinatarios, timeout):
+        partes = urlsplit(url)
+        clase = http.client.HTTPSConnection if partes.scheme == 'https' else http.client.HTTPConnection
+        self.conexion = clase(partes.hostname, partes.port, timeout=timeout)
+        self.host = partes.netloc
+        self.username = username
+        self.pk = pk
+        self.proyectos = proyectos
+        self.destinatarios = destinatarios
+        self.cookies = {}
+
+    def peticion(self, metodo, ruta, datos=None):
+        """Devuelve (estado, cuerpo); reintenta una vez si el servidor cerró la conexión persistente."""
+        cabeceras = {'Host': self.host}
+        if self.cookies:
+            cabeceras['Cookie'] = '; '.join(f'{nombre}={valor}' for nombre, valor in self.cookies.items())
+        cuerpo = None
+        if datos is not None:
+            cuerpo = urlencode(datos)
+            cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+            cabeceras['X-CSRFToken'] = self.cookies.get('csrftoken', '')
+        for intento in range(2):
+            try:
+                self.conexion.request(metodo, ruta, body=cuerpo, headers=cabeceras)
+                respuesta = self.conexion.getresponse()
+                contenido = respuesta.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.conexion.close()
+                if intento:
+                    raise
+        for cabecera in respuesta.headers.get_all('Set-Cookie') or []:
+            for nombre, morsel in SimpleCookie(cabecera).items():
+                self.cookies[nombre] = morsel.value
+        return respuesta.status, contenido
+
+    def iniciar_sesion(self, contrasena):
+        ruta = reverse('login')
+        estado, contenido = self.peticion('GET', ruta)
+        token = PATRON_CSRF.search(contenido.decode(errors='replace'))
+        if estado != 200 or not token:
+            return estado
+        estado, _ = self.peticion('POST', ruta, {
+            'username': self.username, 'password': contrasena, 'csrfmiddlewaretoken': token.group(1)
+        })
+        return 'ok' if estado == 302 and 'sessionid' in self.cookies else estado
+
+    def ejecutar(self, accion, rng):
+        """Lanza la acción y devuelve 'ok' o el motivo del fallo."""
+        if accion == 'lista_proyectos':
+            estado, _ = self.peticion('GET', reverse('lista_proyectos'))
+            return 'ok' if estado == 200 else estado
+        if accion == 'lista_tareas':
+            estado, _ = self.peticion('GET', reverse('lista_tareas', args=[rng.choice(self.proyectos)]))
+            return 'ok' if estado == 200 else estado
+        if accion == 'bandeja_json':
+            estado, _ = self.peticion('GET', reverse('bandeja_entrada_json'))
+            return 'ok' if estado == 200 else estado
+        if accion == 'enviar_mensaje_chat':
+            estado, contenido = self.peticion('POST', reverse('enviar_mensaje_chat'), {
+                'destinatario': rng.choice(self.destinatarios), 'contenido': f'Mensaje de carga {rng.randrange(10**6)}'
+            })
+            return 'ok' if estado == 200 and b'"success": true' in contenido else estado
+        if accion == 'crear_tarea':
+            estado, _ = self.peticion('POST', reverse('crear_tarea', args=[rng.choice(self.proyectos)]), {
+                'titulo': f'Tarea de carga {rng.randrange(10**6)}', 'descripcion': 'Creada por loadtest',
+                'fecha_limite': (timezone.localdate() + timedelta(days=rng.randint(1, 60))).isoformat(),
+                'estado': 'pendiente', 'duracion_dias': rng.randint(1, 5), 'usuarios_asignados': self.pk,
+            })
+            # Con un formulario inválido la vista responde 200 y vuelve a mostrarlo
+            return 'ok' if estado == 302 else estado
+        raise ValueError(accion)
+
+
+def _sesion(parametros, usuario, resultados, candado):
+    """Hilo de un usuario virtual: inicia sesión y repite acciones hasta el final de la prueba."""
+    rng = random.Random(f"{parametros['semilla']}:{usuario[0]}")
+    virtual = UsuarioVirtual(parametros['url'], *usuario, timeout=parametros['timeout'])
+    acciones, pesos = list(parametros['mezcla']), list(parametros['mezcla'].values())
+    locales = defaultdict(list)
+    errores = Counter()
+
+    def medir(accion, funcion):
+        inicio = time.perf_counter()
+        try:
+            resultado = funcion()
+        except (OSError, http.client.HTTPException) as excepcion:
+            resultado = type(excepcion).__name__
+        if resultado == 'ok':
+            locales[accion].append(time.perf_counter() - inicio)
+        else:
+            errores[accion, str(resultado)] += 1
+        return resultado
+
+    # Arranque escalonado para no iniciar todas las sesiones en el mismo instante
+    time.sleep(rng.uniform(0, parametros['rampa']))
+    if medir('login', lambda: virtual.iniciar_sesion(parametros['contrasena'])) == 'ok':
+        while time.monotonic() < parametros['fin']:
+            accion = rng.choices(acciones, pesos)[0]
+            medir(accion, lambda: virtual.ejecutar(accion, rng))
+            if parametros['pausa']:
+                time.sleep(rng.expovariate(1 / parametros['pausa']))
+    virtual.conexion.close()
+    with candado:
+        for accion, tiempos in locales.items():
+            resultados['tiempos'][accion].extend(tiempos)
+        resultados['errores'].update(errores)
+
+
+def _proceso(parametros, usuarios):
+    """Un proceso del pool: un hilo por usuario virtual; devuelve latencias y errores agregados."""
+    resultados = {'tiempos': defaultdict(list), 'errores': Counter()}
+    candado = threading.Lock()
+    hilos = [
+        threading.Thread(target=_sesion, args=(parametros, usuario, resultados, candado), daemon=True)
+        for usuario in usuarios
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return dict(resultados['tiempos']), resultados['errores']
+
+
+def percentil(ordenados, fraccion):
+    """Percentil por el método del rango más cercano sobre una lista ya ordenada."""
+    if not ordenados:
+        return 0.0
+    return ordenados[min(int(fraccion * len(ordenados)), len(ordenados) - 1)]
+
+
+def resumir(tiempos, errores, duracion):
+    """Filas (acción, peticiones, errores, % error, peticiones/s, media, p50, p90, p99) con tiempos en ms."""
+    filas = []
+    acciones = sorted(set(tiempos) | {accion for accion, _ in errores})
+    for accion in acciones + ['total']:
+        if accion == 'total':
+            ordenados = sorted(t for nombre, lista in tiempos.items() if nombre != 'login' for t in lista)
+            fallos = sum(n for (nombre, _), n in errores.items() if nombre != 'login')
+        else:
+            ordenados = sorted(tiempos.get(accion, []))
+            fallos = sum(n for (nombre, _), n in errores.items() if nombre == accion)
+        peticiones = len(ordenados) + fallos
+        filas.append((
+            accion, peticiones, fallos, 100 * fallos / peticiones if peticiones else 0.0,
+            len(ordenados) / duracion, 1000 * sum(ordenados) / len(ordenados) if ordenados else 0.0,
+            *(1000 * percentil(ordenados, fraccion) for fraccion in (0.5, 0.9, 0.99)),
+        ))
+    return filas
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera carga contra un servidor ya arrancado con usuarios sintéticos de "
+        "sembrar_loadtest: cada uno inicia sesión en accounts/login/ y repite una mezcla "
+        "ponderada de páginas, sondeo del chat, envío de mensajes y creación de tareas. "
+        "Reparte los usuarios entre un pool de procesos (un hilo por usuario) e informa de "
+        "rendimiento, percentiles de latencia y errores. El servidor debe tener "
+        "LIMITE_LOGIN_POR_IP por encima de --usuarios, o los inicios de sesión recibirán 429."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--usuarios', type=int, default=50, help="Usuarios virtuales simultáneos.")
+        parser.add_argument('--procesos', type=int, default=multiprocessing.cpu_count())
+        parser.add_argument('--duracion', type=float, default=60, help="Segundos de prueba tras el inicio de sesión.")
+        parser.add_argument('--rampa', type=float, default=5, help="Segundos en los que se reparten los inicios de sesión.")
+        parser.add_argument(
+            '--pausa', type=float, default=1.0,
+            help="Media en segundos del tiempo de reflexión entre acciones (exponencial); 0 sin pausa."
+        )
+        parser.add_argument('--timeout', type=float, default=30)
+        parser.add_argument('--prefijo', default=PREFIJO)
+        parser.add_argument('--contrasena', default=CONTRASENA)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument(
+            '--mezcla', help="Pesos como accion=peso separados por comas, p. ej. 'lista_tareas=5,crear_tarea=1'."
+        )
+
+    def handle(self, *args, **options):
+        mezcla = self._mezcla(options['mezcla'])
+        usuarios = self._usuarios(options['prefijo'], options['usuarios'])
+        procesos = max(min(options['procesos'], len(usuarios)), 1)
+        parametros = {
+            'url': options['url'].rstrip('/'), 'contrasena': options['contrasena'], 'mezcla': mezcla,
+            'pausa': options['pausa'], 'rampa': options['rampa'], 'timeout': options['timeout'],
+            'semilla': options['semilla'],
+            # La rampa no cuenta en la duración medida
+            'fin': time.monotonic() + options['rampa'] + options['duracion'],
+        }
+        self.stdout.write(
+            f"{len(usuarios)} usuarios virtuales en {procesos} procesos contra {parametros['url']} "
+            f"durante {options['duracion']:.0f} s (+{options['rampa']:.0f} s de rampa)"
+        )
+        inicio = time.monotonic()
+        # fork: los procesos heredan Django ya configurado y solo hacen HTTP
+        with multiprocessing.get_context('fork').Pool(procesos) as pool:
+            partes = pool.starmap(_proceso, [(parametros, usuarios[i::procesos]) for i in range(procesos)])
+        duracion = max(time.monotonic() - inicio - options['rampa'], 0.001)
+
+        tiempos, errores = defaultdict(list), Counter()
+        for tiempos_proceso, errores_proceso in partes:
+            for accion, lista in tiempos_proceso.items():
+                tiempos[accion].extend(lista)
+            errores.update(errores_proceso)
+
+        self.stdout.write(
+            f"{'Acción':<22}{'peticiones':>11}{'errores':>9}{'% error':>9}{'pet/s':>9}"
+            f"{'media':>9}{'p50':>9}{'p90':>9}{'p99':>9}"
+        )
+        for accion, peticiones, fallos, tasa, por_segundo, media, p50, p90, p99 in resumir(tiempos, errores, duracion):
+            self.stdout.write(
+                f"{accion:<22}{peticiones:>11}{fallos:>9}{tasa:>8.1f}%{por_segundo:>9.1f}"
+                f"{media:>9.1f}{p50:>9.1f}{p90:>9.1f}{p99:>9.1f}"
+            )
+        self.stdout.write("Tiempos en ms; pet/s solo cuenta las peticiones correctas.")
+        for (accion, motivo), total in errores.most_common(10):
+            self.stdout.write(f"  {accion}: {motivo} × {total}")
+
+    def _mezcla(self, texto):
+        if not texto:
+            return dict(MEZCLA)
+        mezcla = {}
+        for parte in texto.split(','):
+            accion, _, peso = parte.partition('=')
+            if accion not in MEZCLA or not peso.isdigit():
+                raise CommandError(f"Peso inválido '{parte}'; acciones: {', '.join(MEZCLA)}")
+            mezcla[accion] = int(peso)
+        if not any(mezcla.values()):
+            raise CommandError("Al menos una acción debe tener peso mayor que cero.")
+        return mezcla
+
+    def _usuarios(self, prefijo, cuantos):
+        """[(username, id, [ids de sus proyectos], [ids de otros usuarios])] de los primeros `cuantos` sintéticos."""
+        sinteticos = dict(
+            User.objects.filter(username__startswith=prefijo, is_active=True).order_by('username')
+            .values_list('username', 'id')[:cuantos]
+        )
+        if not sinteticos:
+            raise CommandError(f"No hay usuarios '{prefijo}*'; créalos antes con sembrar_loadtest.")
+        proyectos = defaultdict(list)
+        for username, proyecto_id in PerfilProyecto.objects.filter(
+            usuario__username__in=sinteticos, proyecto__eliminado_en__isnull=True
+        ).values_list('usuario__username', 'proyecto_id').distinct():
+            proyectos[username].append(proyecto_id)
+        ids = list(sinteticos.values())
+        return [
+            (username, pk, proyectos[username], [otro for otro in ids if otro != pk] or [pk])
+            for username, pk in sinteticos.items() if proyectos[username]
+        ]
@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import purga
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra por lotes los datos de los proyectos eliminados. Una purga interrumpida "
+        "continúa desde su último lote confirmado. Sin --intervalo hace una sola pasada "
+        "(para cron); con él se queda en bucle. Debe haber una sola instancia en marcha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamano-lote', type=int, default=purga.TAMANO_LOTE)
+        parser.add_argument(
+            '--pausa', type=float, default=0,
+            help="Segundos de espera entre lotes, para no saturar la base de datos."
+        )
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help="Segundos entre pasadas; 0 para una sola pasada."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.monotonic()
+            for pendiente in purga.pendientes():
+                self._purgar(pendiente, options)
+            if not options['intervalo']:
+                return
+            try:
+                time.sleep(max(options['intervalo'] - (time.monotonic() - inicio), 0))
+            except KeyboardInterrupt:
+                return
+
+    def _purgar(self, pendiente, options):
+        num_pasos = len(purga.PASOS)
+        if pendiente.paso:
+            self.stdout.write(
+                f"Reanudando '{pendiente.titulo}' (id {pendiente.proyecto_id}) en el paso "
+                f"{pendiente.paso + 1}/{num_pasos}, {pendiente.filas_borradas} filas ya borradas"
+            )
+        inicio = time.perf_counter()
+
+        def progreso(paso, filas):
+            indice = purga.PASOS.index(paso) + 1
+            self.stdout.write(f"  [{indice}/{num_pasos}] {paso}: {filas} filas")
+
+        purga.purgar(pendiente, options['tamano_lote'], options['pausa'], progreso)
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"Proyecto '{pendiente.titulo}' (id {pendiente.proyecto_id}) purgado: "
+            f"{pendiente.filas_borradas} filas en {duracion:.2f} s"
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import recordatorios
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea notificaciones para las tareas que vencen pronto o ya han vencido. Sin "
+        "--intervalo hace una sola pasada (para cron); con él se queda en bucle. "
+        "Debe haber una sola instancia en marcha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.DIAS_AVISO_RECORDATORIO,
+            help="Avisar de las tareas que vencen dentro de estos días."
+        )
+        parser.add_argument(
+            '--dias-vencidas', type=int, default=settings.DIAS_RECORDATORIO_VENCIDAS,
+            help="Ignorar las tareas vencidas hace más de estos días."
+        )
+        parser.add_argument('--tamano-lote', type=int, default=recordatorios.TAMANO_LOTE)
+        parser.add_argument(
+            '--intervalo', type=int, default=0,
+            help="Segundos entre pasadas; 0 para una sola pasada."
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.monotonic()
+            ejecucion = recordatorios.ejecutar(options['dias'], options['dias_vencidas'], options['tamano_lote'])
+            por_segundo = ejecucion.asignaciones_revisadas / max(ejecucion.duracion_ms / 1000, 0.001)
+            self.stdout.write(
+                f"{ejecucion.inicio:%Y-%m-%d %H:%M:%S}: {ejecucion.asignaciones_revisadas} asignaciones "
+                f"revisadas en {ejecucion.duracion_ms} ms ({por_segundo:,.0f}/s), "
+                f"{ejecucion.recordatorios_enviados} enviados, {ejecucion.duplicados_omitidos} ya avisados, "
+                f"retraso medio {ejecucion.retraso_medio_s:.0f} s (máx. {ejecucion.retraso_max_s:.0f} s)"
+            )
+            if not options['intervalo']:
+                return
+            try:
+                time.sleep(max(options['intervalo'] - (time.monotonic() - inicio), 0))
+            except KeyboardInterrupt:
+                return
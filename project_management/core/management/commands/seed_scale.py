@@ -0,0 +1,376 @@
+import io
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core import opciones
+from core.models import (
+    Comentario, Conversacion, Grupo, Mensaje, Notificacion, PerfilProyecto, ParticipanteConversacion, Proyecto,
+    Tarea, User
+)
+
+TAMANO_LOTE = 50_000
+ESTADOS = ['pendiente', 'en_progreso', 'completada']
+PESOS_ESTADOS = [45, 30, 25]
+ROLES = ['administrador', 'miembro', 'invitado']
+
+
+class Tabla:
+    """Columnas de un modelo y valores por defecto, para generar filas como tuplas en ese orden.
+
+    COPY no aplica los valores por defecto de Django, así que toda fila lleva
+    todas las columnas concretas, ids incluidos: los ids se asignan aquí para
+    poder enlazar las filas de otras tablas sin leerlas de vuelta.
+    """
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.campos = modelo._meta.concrete_fields
+        self.attnames = [campo.attname for campo in self.campos]
+        self.columnas = [campo.column for campo in self.campos]
+        self.defectos = [None if campo.null else campo.get_default() for campo in self.campos]
+        self.siguiente_id = (modelo._base_manager.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+
+    def ids(self, cuantos):
+        inicio = self.siguiente_id
+        self.siguiente_id += cuantos
+        return range(inicio, inicio + cuantos)
+
+    def fila(self, **valores):
+        return tuple(valores.get(nombre, defecto) for nombre, defecto in zip(self.attnames, self.defectos))
+
+
+def _texto_copy(valor):
+    """Un valor en el formato de texto de COPY (\\N para NULL, escapes de barra, tabulador y saltos)."""
+    if valor is None:
+        return '\\N'
+    if valor is True:
+        return 't'
+    if valor is False:
+        return 'f'
+    if isinstance(valor, str):
+        return valor.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+
+class EscritorCopy:
+    """PostgreSQL: cada lote se envía con COPY FROM STDIN, sin pasar por el ORM."""
+    metodo = 'COPY'
+
+    def escribir(self, tabla, filas):
+        buffer = io.StringIO()
+        for fila in filas:
+            buffer.write('\t'.join(map(_texto_copy, fila)))
+            buffer.write('\n')
+        columnas = ', '.join(connection.ops.quote_name(columna) for columna in tabla.columnas)
+        sql = f'COPY {connection.ops.quote_name(tabla.modelo._meta.db_table)} ({columnas}) FROM STDIN'
+        buffer.seek(0)
+        with connection.cursor() as cursor:
+            cursor_crudo = cursor.cursor
+            if hasattr(cursor_crudo, 'copy_expert'):  # psycopg2
+                cursor_crudo.copy_expert(sql, buffer)
+            else:  # psycopg 3
+                with cursor_crudo.copy(sql) as copia:
+                    copia.write(buffer.getvalue())
+
+
+class EscritorBulk:
+    """Otros motores (SQLite): bulk_create por lotes."""
+    metodo = 'bulk_create'
+
+    def escribir(self, tabla, filas):
+        # Con auto_now_add, bulk_create pisaría las fechas generadas con la hora actual
+        automaticos = [campo for campo in tabla.campos if getattr(campo, 'auto_now_add', False)]
+        for campo in automaticos:
+            campo.auto_now_add = False
+        try:
+            tabla.modelo.objects.bulk_create(
+                [tabla.modelo(**dict(zip(tabla.attnames, fila))) for fila in filas], batch_size=5000
+            )
+        finally:
+            for campo in automaticos:
+                campo.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos a escala (usuarios, grupos, roles, proyectos, tareas con "
+        "asignados, comentarios, conversaciones con mensajes y notificaciones) con "
+        "distribuciones sesgadas como las reales: pocos proyectos y usuarios concentran "
+        "gran parte de la actividad. En PostgreSQL carga con COPY FROM STDIN; en otros "
+        "motores con bulk_create. Informa de filas por segundo por tabla. Solo para bases "
+        "de datos de pruebas: las filas se confirman por lotes y no se revierten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10_000)
+        parser.add_argument('--proyectos', type=int, default=1_000)
+        parser.add_argument('--tareas-por-proyecto', type=float, default=100, help="Media; el reparto es sesgado.")
+        parser.add_argument('--miembros-por-proyecto', type=float, default=12, help="Media; el reparto es sesgado.")
+        parser.add_argument('--asignados-por-tarea', type=int, default=3, help="Máximo; al menos uno.")
+        parser.add_argument('--comentarios-por-tarea', type=float, default=3, help="Media.")
+        parser.add_argument('--conversaciones-por-usuario', type=float, default=3, help="Media.")
+        parser.add_argument('--mensajes-por-conversacion', type=float, default=8, help="Media.")
+        parser.add_argument('--notificaciones-por-usuario', type=float, default=40, help="Media.")
+        parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE)
+        parser.add_argument('--prefijo', default='escala_')
+        parser.add_argument('--contrasena', default='escala-local-123')
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument(
+            '--bulk-create', action='store_true',
+            help="Usa bulk_create también en PostgreSQL, para comparar con COPY."
+        )
+
+    def handle(self, *args, **options):
+        if User.objects.filter(username__startswith=options['prefijo']).exists():
+            raise CommandError(f"Ya hay usuarios '{options['prefijo']}*'; usa otro --prefijo.")
+        self.opciones = options
+        self.rng = random.Random(options['semilla'])
+        self.escritor = (
+            EscritorCopy() if connection.vendor == 'postgresql' and not options['bulk_create'] else EscritorBulk()
+        )
+        self.tablas = {
+            modelo: Tabla(modelo) for modelo in (
+                User, Proyecto, Grupo, PerfilProyecto, Tarea, Tarea.usuarios_asignados.through, Comentario,
+                Conversacion, ParticipanteConversacion, Mensaje, Notificacion
+            )
+        }
+        self.filas = defaultdict(int)
+        self.segundos = defaultdict(float)
+        self.pendientes = defaultdict(list)
+        self.ahora = timezone.now().replace(microsecond=0)
+        self.hoy = timezone.localdate()
+
+        inicio = time.perf_counter()
+        usuarios = self._usuarios()
+        miembros = self._proyectos(usuarios)
+        self._tareas(miembros)
+        self._conversaciones(usuarios, miembros)
+        self._notificaciones(usuarios, miembros)
+        # Los ids se han dado a mano: las secuencias (PostgreSQL) deben seguir desde el último
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), list(self.tablas)):
+                cursor.execute(sql)
+        # Las filas no pasan por señales: se invalida a mano lo que mantienen core.signals
+        for ambito in ('global', 'grupos'):
+            transaction.on_commit(partial(opciones.invalidar, ambito))
+        total = time.perf_counter() - inicio
+
+        self.stdout.write(f"{'Tabla':<40}{'filas':>14}{'s':>9}{'filas/s':>12}")
+        for modelo, tabla in self.tablas.items():
+            filas, segundos = self.filas[modelo], self.segundos[modelo]
+            self.stdout.write(
+                f"{tabla.modelo._meta.db_table:<40}{filas:>14,}{segundos:>9.1f}{filas / max(segundos, 1e-6):>12,.0f}"
+            )
+        suma = sum(self.filas.values())
+        self.stdout.write(
+            f"Total ({self.escritor.metodo}): {suma:,} filas en {total:.1f} s, {suma / total:,.0f} filas/s "
+            f"incluida la generación"
+        )
+
+    # Escritura por lotes
+
+    def _anadir(self, modelo, fila):
+        self.pendientes[modelo].append(fila)
+
+    def _vaciar_si_lleno(self, *modelos):
+        """Escribe `modelos` juntos en cuanto uno llena su lote, para no adelantar hijos a sus padres."""
+        if any(len(self.pendientes[modelo]) >= self.opciones['tamano_lote'] for modelo in modelos):
+            self._vaciar(*modelos)
+
+    def _vaciar(self, *modelos):
+        """Escribe lo pendiente de `modelos` en ese orden (el de las claves foráneas)."""
+        for modelo in modelos:
+            lote = self.pendientes.pop(modelo, None)
+            if not lote:
+                continue
+            inicio = time.perf_counter()
+            self.escritor.escribir(self.tablas[modelo], lote)
+            self.segundos[modelo] += time.perf_counter() - inicio
+            self.filas[modelo] += len(lote)
+
+    # Distribuciones
+
+    def _sesgados(self, cuantos, alfa=1.5):
+        """Pesos de Pareto: unos pocos elementos se llevan gran parte de la actividad."""
+        return [self.rng.paretovariate(alfa) for _ in range(cuantos)]
+
+    def _cantidad(self, media):
+        """Entero de distribución geométrica con la media dada (0 incluido)."""
+        if media <= 0:
+            return 0
+        p = 1 / (media + 1)
+        return int(math.log(1 - self.rng.random()) / math.log(1 - p))
+
+    def _fecha_hora(self, dias_atras):
+        return self.ahora - timedelta(seconds=self.rng.randrange(max(int(dias_atras * 86400), 1)))
+
+    # Generadores
+
+    def _usuarios(self):
+        tabla = self.tablas[User]
+        contrasena = make_password(self.opciones['contrasena'])
+        ids = tabla.ids(self.opciones['usuarios'])
+        for pk in ids:
+            nombre = f"{self.opciones['prefijo']}{pk}"
+            self._anadir(User, tabla.fila(
+                id=pk, username=nombre, email=f'{nombre}@example.com', password=contrasena, is_active=True,
+                date_joined=self._fecha_hora(730)
+            ))
+            self._vaciar_si_lleno(User)
+        self._vaciar(User)
+        return list(ids)
+
+    def _proyectos(self, usuarios):
+        """Crea proyectos con su grupo y perfiles; devuelve {proyecto_id: [miembros]}."""
+        tabla, grupos, perfiles = self.tablas[Proyecto], self.tablas[Grupo], self.tablas[PerfilProyecto]
+        pesos_usuarios = list(self._acumulados(self._sesgados(len(usuarios))))
+        media = self.opciones['miembros_por_proyecto']
+        miembros = {}
+        for pk in tabla.ids(self.opciones['proyectos']):
+            inicio = self.hoy - timedelta(days=self.rng.randint(0, 365))
+            tamano = min(max(1, round(media * self.rng.lognormvariate(0, 0.8) / math.exp(0.32))), len(usuarios))
+            elegidos = list(dict.fromkeys(self.rng.choices(usuarios, cum_weights=pesos_usuarios, k=tamano)))
+            miembros[pk] = elegidos
+            grupo_id = grupos.ids(1)[0]
+            self._anadir(Proyecto, tabla.fila(
+                id=pk, titulo=f'Proyecto {pk}', descripcion='Proyecto sintético generado por seed_scale',
+                fecha_inicio=inicio, fecha_fin=inicio + timedelta(days=self.rng.randint(30, 540)),
+                creado_por_id=elegidos[0]
+            ))
+            self._anadir(Grupo, grupos.fila(id=grupo_id, nombre=f'Equipo {pk}', proyecto_id=pk))
+            for posicion, usuario in enumerate(elegidos):
+                rol = 'administrador' if posicion == 0 else self.rng.choices(ROLES, [5, 80, 15])[0]
+                self._anadir(PerfilProyecto, perfiles.fila(
+                    id=perfiles.ids(1)[0], usuario_id=usuario, proyecto_id=pk, grupo_id=grupo_id, rol=rol
+                ))
+            self._vaciar_si_lleno(Proyecto, Grupo, PerfilProyecto)
+        self._vaciar(Proyecto, Grupo, PerfilProyecto)
+        return miembros
+
+    def _tareas(self, miembros):
+        tareas, asignaciones, comentarios = (
+            self.tablas[Tarea], self.tablas[Tarea.usuarios_asignados.through], self.tablas[Comentario]
+        )
+        proyectos = list(miembros)
+        pesos = self._sesgados(len(proyectos), alfa=1.2)
+        escala = self.opciones['tareas_por_proyecto'] * len(proyectos) / sum(pesos)
+        maximo_asignados = self.opciones['asignados_por_tarea']
+        for proyecto_id, peso in zip(proyectos, pesos):
+            equipo = miembros[proyecto_id]
+            for pk in tareas.ids(round(peso * escala)):
+                num_comentarios = self._cantidad(self.opciones['comentarios_por_tarea'])
+                fechas = sorted(self._fecha_hora(180) for _ in range(num_comentarios))
+                self._anadir(Tarea, tareas.fila(
+                    id=pk, proyecto_id=proyecto_id, titulo=f'Tarea {pk}', descripcion='Tarea sintética de seed_scale',
+                    fecha_limite=self.hoy + timedelta(days=self.rng.randint(-60, 180)),
+                    estado=self.rng.choices(ESTADOS, PESOS_ESTADOS)[0], duracion_dias=self.rng.randint(1, 15),
+                    num_comentarios=num_comentarios, ultimo_comentario_at=fechas[-1] if fechas else None
+                ))
+                for usuario in self.rng.sample(equipo, min(self.rng.randint(1, maximo_asignados), len(equipo))):
+                    self._anadir(Tarea.usuarios_asignados.through, asignaciones.fila(
+                        id=asignaciones.ids(1)[0], tarea_id=pk, user_id=usuario
+                    ))
+                for fecha in fechas:
+                    self._anadir(Comentario, comentarios.fila(
+                        id=comentarios.ids(1)[0], tarea_id=pk, usuario_id=self.rng.choice(equipo),
+                        contenido=f'Comentario sintético sobre la tarea {pk}', fecha_hora=fecha
+                    ))
+                self._vaciar_si_lleno(Tarea, Tarea.usuarios_asignados.through, Comentario)
+        self._vaciar(Tarea, Tarea.usuarios_asignados.through, Comentario)
+
+    def _conversaciones(self, usuarios, miembros):
+        conversaciones, participantes, mensajes = (
+            self.tablas[Conversacion], self.tablas[ParticipanteConversacion], self.tablas[Mensaje]
+        )
+        proyectos_de = defaultdict(list)
+        for proyecto_id, equipo in miembros.items():
+            for usuario in equipo:
+                proyectos_de[usuario].append(proyecto_id)
+        pesos = list(self._acumulados(self._sesgados(len(usuarios))))
+        objetivo = round(self.opciones['conversaciones_por_usuario'] * len(usuarios) / 2)
+        parejas = set()
+        intentos = 0
+        # Los compañeros de proyecto conversan más; el resto son parejas al azar con sesgo
+        while len(parejas) < objetivo and intentos < objetivo * 3 and len(usuarios) > 1:
+            intentos += 1
+            a = self.rng.choices(usuarios, cum_weights=pesos)[0]
+            if proyectos_de[a] and self.rng.random() < 0.7:
+                b = self.rng.choice(miembros[self.rng.choice(proyectos_de[a])])
+            else:
+                b = self.rng.choices(usuarios, cum_weights=pesos)[0]
+            if a != b:
+                parejas.add((min(a, b), max(a, b)))
+
+        recientes = self.ahora - timedelta(days=7)
+        for a, b in sorted(parejas):
+            pk = conversaciones.ids(1)[0]
+            num_mensajes = max(1, self._cantidad(self.opciones['mensajes_por_conversacion']))
+            comunes = sorted(set(proyectos_de[a]) & set(proyectos_de[b]))
+            fechas = sorted(self._fecha_hora(365) for _ in range(num_mensajes))
+            no_leidos = {a: 0, b: 0}
+            ultimo = None
+            filas = []
+            for fecha in fechas:
+                remitente, destinatario = (a, b) if self.rng.random() < 0.5 else (b, a)
+                contenido = f'Mensaje sintético {self.rng.randrange(10**6)} entre {a} y {b}'
+                proyecto_id = self.rng.choice(comunes) if comunes and self.rng.random() < 0.3 else None
+                filas.append(mensajes.fila(
+                    id=mensajes.ids(1)[0], remitente_id=remitente, destinatario_id=destinatario,
+                    proyecto_id=proyecto_id, conversacion_id=pk, contenido=contenido, fecha_hora=fecha
+                ))
+                # Los mensajes de la última semana siguen sin leer
+                if fecha > recientes:
+                    no_leidos[destinatario] += 1
+                ultimo = (fecha, contenido, remitente)
+            self._anadir(Conversacion, conversaciones.fila(
+                id=pk, clave=Conversacion.clave_para(a, b), ultimo_mensaje_at=ultimo[0],
+                ultimo_fragmento=ultimo[1][:Conversacion.LONGITUD_FRAGMENTO], ultimo_remitente_id=ultimo[2]
+            ))
+            for usuario, contraparte in ((a, b), (b, a)):
+                self._anadir(ParticipanteConversacion, participantes.fila(
+                    id=participantes.ids(1)[0], conversacion_id=pk, usuario_id=usuario, contraparte_id=contraparte,
+                    no_leidos=no_leidos[usuario], ultimo_mensaje_at=ultimo[0]
+                ))
+            for fila in filas:
+                self._anadir(Mensaje, fila)
+            self._vaciar_si_lleno(Conversacion, ParticipanteConversacion, Mensaje)
+        self._vaciar(Conversacion, ParticipanteConversacion, Mensaje)
+
+    def _notificaciones(self, usuarios, miembros):
+        tabla = self.tablas[Notificacion]
+        proyectos_de = defaultdict(list)
+        for proyecto_id, equipo in miembros.items():
+            for usuario in equipo:
+                proyectos_de[usuario].append(proyecto_id)
+        pesos = self._sesgados(len(usuarios))
+        escala = self.opciones['notificaciones_por_usuario'] * len(usuarios) / sum(pesos)
+        for usuario, peso in zip(usuarios, pesos):
+            for pk in tabla.ids(round(peso * escala)):
+                fecha = self._fecha_hora(120)
+                proyecto_id = self.rng.choice(proyectos_de[usuario]) if proyectos_de[usuario] else None
+                self._anadir(Notificacion, tabla.fila(
+                    id=pk, usuario_id=usuario, proyecto_id=proyecto_id, fecha=fecha,
+                    mensaje=f"Aviso sintético del proyecto {proyecto_id}" if proyecto_id else 'Aviso sintético',
+                    # Lo antiguo casi siempre está leído
+                    leida=self.rng.random() < (0.95 if fecha < self.ahora - timedelta(days=14) else 0.4)
+                ))
+                self._vaciar_si_lleno(Notificacion)
+        self._vaciar(Notificacion)
+
+    @staticmethod
+    def _acumulados(pesos):
+        total = 0
+        for peso in pesos:
+            total += peso
+            yield total
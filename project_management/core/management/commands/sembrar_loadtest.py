@@ -0,0 +1,141 @@
+import random
+import time
+from datetime import timedelta
+from functools import partial
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core import opciones
+from core.models import Comentario, Grupo, Notificacion, PerfilProyecto, Proyecto, Tarea, User
+
+PREFIJO = 'carga_'
+CONTRASENA = 'carga-local-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea los usuarios sintéticos que usa loadtest (prefijo, contraseña común) con sus "
+        "proyectos, grupos, tareas asignadas, comentarios y notificaciones. Solo para bases "
+        "de datos de pruebas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--proyectos', type=int, default=50)
+        parser.add_argument('--miembros-por-proyecto', type=int, default=12)
+        parser.add_argument('--tareas-por-proyecto', type=int, default=60)
+        parser.add_argument('--comentarios-por-tarea', type=int, default=3)
+        parser.add_argument('--notificaciones-por-usuario', type=int, default=30)
+        parser.add_argument('--prefijo', default=PREFIJO)
+        parser.add_argument('--contrasena', default=CONTRASENA)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument(
+            '--borrar', action='store_true',
+            help="Elimina antes los usuarios con el prefijo y los proyectos que crearon."
+        )
+
+    def handle(self, *args, **options):
+        prefijo = options['prefijo']
+        existentes = User.objects.filter(username__startswith=prefijo)
+        if existentes.exists():
+            if not options['borrar']:
+                raise CommandError(f"Ya hay usuarios '{prefijo}*'; usa --borrar para regenerarlos.")
+            Proyecto.todos.filter(creado_por__in=existentes).delete()
+            existentes.delete()
+
+        inicio = time.perf_counter()
+        with transaction.atomic():
+            filas = self._crear(options)
+            # bulk_create no emite señales: se invalida a mano lo que mantienen core.signals
+            for ambito in ('global', 'grupos'):
+                transaction.on_commit(partial(opciones.invalidar, ambito))
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{sum(filas.values())} filas en {duracion:.1f} s: "
+            + ', '.join(f'{total} {nombre}' for nombre, total in filas.items())
+        )
+        self.stdout.write(f"Usuarios {prefijo}00000..{options['usuarios'] - 1:05d}, contraseña '{options['contrasena']}'")
+
+    def _crear(self, options):
+        rng = random.Random(options['semilla'])
+        hoy = timezone.localdate()
+        # Un único hash para todos: calcularlo por usuario costaría segundos cada cien
+        contrasena = make_password(options['contrasena'])
+        usuarios = User.objects.bulk_create([
+            User(username=f"{options['prefijo']}{i:05d}", email=f"{options['prefijo']}{i:05d}@example.com", password=contrasena)
+            for i in range(options['usuarios'])
+        ], batch_size=2000)
+        proyectos = Proyecto.objects.bulk_create([
+            Proyecto(
+                titulo=f'Proyecto de carga {i:04d}', descripcion='Datos sintéticos para loadtest',
+                fecha_inicio=hoy - timedelta(days=rng.randint(0, 180)), fecha_fin=hoy + timedelta(days=rng.randint(30, 365)),
+                creado_por=rng.choice(usuarios)
+            ) for i in range(options['proyectos'])
+        ])
+        grupos = Grupo.objects.bulk_create([Grupo(nombre=f'Equipo {proyecto.titulo}', proyecto=proyecto) for proyecto in proyectos])
+
+        miembros, perfiles = {}, []
+        for proyecto, grupo in zip(proyectos, grupos):
+            elegidos = rng.sample(usuarios, min(options['miembros_por_proyecto'], len(usuarios)))
+            miembros[proyecto.pk] = elegidos
+            for posicion, usuario in enumerate(elegidos):
+                rol = 'administrador' if posicion == 0 else rng.choices(['miembro', 'invitado'], [9, 1])[0]
+                perfiles.append(PerfilProyecto(usuario=usuario, proyecto=proyecto, grupo=grupo, rol=rol))
+        # Cada usuario pertenece al menos a un proyecto para que ninguno navegue en vacío
+        con_proyecto = {perfil.usuario_id for perfil in perfiles}
+        for usuario in usuarios:
+            if usuario.pk not in con_proyecto:
+                indice = rng.randrange(len(proyectos))
+                miembros[proyectos[indice].pk].append(usuario)
+                perfiles.append(PerfilProyecto(usuario=usuario, proyecto=proyectos[indice], grupo=grupos[indice]))
+        PerfilProyecto.objects.bulk_create(perfiles, batch_size=2000)
+
+        estados = [valor for valor, _ in Tarea.ESTADO_OPCIONES]
+        tareas = Tarea.objects.bulk_create([
+            Tarea(
+                proyecto=proyecto, titulo=f'Tarea {i:04d}', descripcion='Tarea sintética de carga',
+                fecha_limite=hoy + timedelta(days=rng.randint(-30, 120)), estado=rng.choices(estados, [5, 3, 2])[0],
+                duracion_dias=rng.randint(1, 10)
+            ) for proyecto in proyectos for i in range(options['tareas_por_proyecto'])
+        ], batch_size=2000)
+
+        asignaciones = Tarea.usuarios_asignados.through
+        filas_asignacion = [
+            asignaciones(tarea_id=tarea.pk, user_id=usuario.pk)
+            for tarea in tareas
+            for usuario in rng.sample(miembros[tarea.proyecto_id], min(rng.randint(1, 3), len(miembros[tarea.proyecto_id])))
+        ]
+        asignaciones.objects.bulk_create(filas_asignacion, batch_size=5000)
+
+        # bulk_create no pasa por Comentario.save: los contadores se fijan en la propia tarea
+        ahora = timezone.now()
+        comentarios = []
+        for tarea in tareas:
+            numero = rng.randint(0, 2 * options['comentarios_por_tarea'])
+            for i in range(numero):
+                comentarios.append(Comentario(
+                    tarea=tarea, usuario=rng.choice(miembros[tarea.proyecto_id]), contenido=f'Comentario {i} de carga'
+                ))
+            if numero:
+                tarea.num_comentarios, tarea.ultimo_comentario_at = numero, ahora
+        Comentario.objects.bulk_create(comentarios, batch_size=5000)
+        Tarea.objects.bulk_update(
+            [tarea for tarea in tareas if tarea.num_comentarios], ['num_comentarios', 'ultimo_comentario_at'],
+            batch_size=2000
+        )
+
+        notificaciones = Notificacion.objects.bulk_create([
+            Notificacion(
+                usuario=usuario, proyecto=proyecto, mensaje=f"Aviso sintético en '{proyecto.titulo}'",
+                leida=rng.random() < 0.7
+            )
+            for usuario in usuarios for proyecto in rng.choices(proyectos, k=options['notificaciones_por_usuario'])
+        ], batch_size=5000)
+
+        return {
+            'usuarios': len(usuarios), 'proyectos': len(proyectos), 'perfiles': len(perfiles), 'tareas': len(tareas),
+            'asignaciones': len(filas_asignacion), 'comentarios': len(comentarios), 'notificaciones': len(notificaciones),
+        }
@@ -0,0 +1,199 @@
+"""Métricas de la aplicación en el formato de texto de Prometheus (vista ``metricas``).
+
+Cada proceso acumula contadores e histogramas en memoria; registrar un valor
+es una suma en un diccionario bajo un candado, sin E/S. Si METRICAS_DIRECTORIO
+está definido, cada proceso vuelca sus valores a su propio archivo como mucho
+cada METRICAS_INTERVALO_VOLCADO segundos y al terminar. La vista suma los
+archivos de todos los procesos (p. ej. workers de gunicorn), incluidos los
+que ya han terminado, para que los contadores no retrocedan al reciclarse un
+worker. El directorio debe vaciarse al arrancar el servidor.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+_candado = threading.Lock()
+_registro = {}
+# Identifica el archivo del proceso; el instante de arranque evita pisar el de un pid reutilizado
+_archivo_proceso = f'{os.getpid()}-{time.time_ns()}.json'
+_ultimo_volcado = 0.0
+
+DURACIONES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CANTIDADES = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+class Contador:
+    tipo = 'counter'
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.valores = {}
+        _registro[nombre] = self
+
+    def inc(self, *valores, cantidad=1):
+        with _candado:
+            self.valores[valores] = self.valores.get(valores, 0) + cantidad
+
+    def _vacio(self):
+        return 0
+
+    def _sumar(self, acumulado, valor):
+        return acumulado + valor
+
+    def _lineas(self, etiquetas, valor):
+        yield f'{self.nombre}{_etiquetas(self.etiquetas, etiquetas)} {_numero(valor)}'
+
+class Histograma:
+    """Cuentas por intervalo (no acumuladas, se acumulan al exportar) más la suma al final."""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=DURACIONES):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self.limites = limites
+        self.valores = {}
+        _registro[nombre] = self
+
+    def observar(self, valor, *valores):
+        with _candado:
+            cuentas = self.valores.get(valores)
+            if cuentas is None:
+                cuentas = self.valores[valores] = self._vacio()
+            cuentas[bisect_left(self.limites, valor)] += 1
+            cuentas[-1] += valor
+
+    def _vacio(self):
+        return [0] * (len(self.limites) + 2)
+
+    def _sumar(self, acumulado, valor):
+        if len(valor) != len(acumulado):  # Archivo de una versión con otros intervalos
+            return acumulado
+        return [a + b for a, b in zip(acumulado, valor)]
+
+    def _lineas(self, etiquetas, cuentas):
+        acumulado = 0
+        for limite, cuenta in zip((*self.limites, '+Inf'), cuentas):
+            acumulado += cuenta
+            le = limite if limite == '+Inf' else _numero(limite)
+            yield f'{self.nombre}_bucket{_etiquetas((*self.etiquetas, "le"), (*etiquetas, le))} {acumulado}'
+        yield f'{self.nombre}_sum{_etiquetas(self.etiquetas, etiquetas)} {_numero(cuentas[-1])}'
+        yield f'{self.nombre}_count{_etiquetas(self.etiquetas, etiquetas)} {acumulado}'
+
+def _numero(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(float(valor))
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ''
+    return '{' + ','.join(f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)) + '}'
+
+def _instantanea():
+    """{métrica: {etiquetas en JSON: valor}} del proceso actual."""
+    with _candado:
+        return {
+            nombre: {json.dumps(etiquetas): (list(valor) if isinstance(valor, list) else valor)
+                     for etiquetas, valor in metrica.valores.items()}
+            for nombre, metrica in _registro.items()
+        }
+
+def _directorio():
+    if not settings.METRICAS_DIRECTORIO:
+        return None
+    directorio = Path(settings.METRICAS_DIRECTORIO)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+def volcar():
+    """Escribe los valores del proceso en su archivo (escritura atómica con rename)."""
+    global _ultimo_volcado
+    directorio = _directorio()
+    _ultimo_volcado = time.monotonic()
+    if directorio is None:
+        return
+    temporal = directorio / f'.{_archivo_proceso}.tmp'
+    temporal.write_text(json.dumps(_instantanea()), encoding='utf-8')
+    os.replace(temporal, directorio / _archivo_proceso)
+
+def volcar_si_toca():
+    """Vuelca si ha pasado el intervalo desde el último volcado; casi siempre no hace nada."""
+    if time.monotonic() - _ultimo_volcado >= settings.METRICAS_INTERVALO_VOLCADO:
+        volcar()
+
+atexit.register(lambda: settings.configured and volcar())
+
+def _agregado():
+    """Suma de los valores de todos los procesos con archivo (o solo los de este proceso)."""
+    directorio = _directorio()
+    if directorio is None:
+        instantaneas = [_instantanea()]
+    else:
+        volcar()
+        instantaneas = []
+        for ruta in directorio.glob('*.json'):
+            try:
+                instantaneas.append(json.loads(ruta.read_text(encoding='utf-8')))
+            except (OSError, ValueError):  # Borrado o a medio escribir por otra versión
+                continue
+    total = {}
+    for instantanea in instantaneas:
+        for nombre, series in instantanea.items():
+            metrica = _registro.get(nombre)
+            if metrica is None:
+                continue
+            destino = total.setdefault(nombre, {})
+            for etiquetas, valor in series.items():
+                destino[etiquetas] = metrica._sumar(destino.get(etiquetas, metrica._vacio()), valor)
+    return total
+
+def exportar():
+    """Texto de exposición de Prometheus (versión 0.0.4) con todas las métricas registradas."""
+    total = _agregado()
+    lineas = []
+    for nombre, metrica in _registro.items():
+        lineas.append(f'# HELP {nombre} {metrica.ayuda}')
+        lineas.append(f'# TYPE {nombre} {metrica.tipo}')
+        for etiquetas, valor in sorted(total.get(nombre, {}).items()):
+            lineas.extend(metrica._lineas(json.loads(etiquetas), valor))
+    return '\n'.join(lineas) + '\n'
+
+def reiniciar():
+    """Vacía los valores del proceso (para las pruebas)."""
+    with _candado:
+        for metrica in _registro.values():
+            metrica.valores.clear()
+
+PETICIONES = Histograma(
+    'app_peticion_segundos', 'Duración de las peticiones por vista, método y estado.',
+    ('vista', 'metodo', 'estado')
+)
+CONSULTAS = Histograma(
+    'app_consultas_por_peticion', 'Consultas SQL ejecutadas por petición.', ('vista',), CANTIDADES
+)
+NOTIFICACIONES = Histograma(
+    'app_notificaciones_por_evento', 'Destinatarios de cada evento que genera notificaciones.', ('evento',),
+    CANTIDADES
+)
+MENSAJES_CHAT = Contador(
+    'app_mensajes_chat_total', 'Mensajes privados enviados, en un proyecto o directos.', ('ambito',)
+)
+LOGINS_FALLIDOS = Contador(
+    'app_logins_fallidos_total', 'Inicios de sesión rechazados por credenciales o ráfaga y bloqueos de axes.',
+    ('motivo',)
+)
+CACHE = Contador('app_cache_total', 'Lecturas de las cachés de la aplicación.', ('cache', 'resultado'))
+
+def registrar_cache(nombre, valor):
+    """Cuenta el acierto o fallo de una lectura y devuelve el valor leído."""
+    CACHE.inc(nombre, 'fallo' if valor is None else 'acierto')
+    return valor
@@ -0,0 +1,187 @@
+import cProfile
+import re
+import time
+
+from axes.helpers import get_client_ip_address, get_client_username
+from django.conf import settings
+from django.db import connection
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from . import actividad, limites, metricas, perfilado
+
+try:
+    from pyinstrument import Profiler as PerfiladorMuestreo
+except ImportError:  # pyinstrument es opcional; sin él solo hay modo cProfile
+    PerfiladorMuestreo = None
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional; sin él solo se comprime con gzip
+    brotli = None
+
+ACEPTA_BROTLI = re.compile(r'\bbr\b')
+CALIDAD_BROTLI = 5  # Buen equilibrio entre ratio y CPU para respuestas dinámicas
+
+
+class PerfiladoMiddleware:
+    """Perfila una sola petición de un usuario staff que presenta un token firmado.
+
+    Debe ir después de AuthenticationMiddleware. Cubre la vista, el render de
+    plantillas y los context processors; ``?_perfilar_modo=muestreo`` usa
+    pyinstrument si está instalado.
+    """
+    PARAMETRO = '_perfilar'
+    CABECERA = 'HTTP_X_PERFILAR'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def _procesar(self, request):
+        response = self.get_response(request)
+        # Las respuestas perezosas (TemplateResponse) se renderizan dentro del perfil
+        if callable(getattr(response, 'render', None)):
+            response.render()
+        return response
+
+    def __call__(self, request):
+        token = request.GET.get(self.PARAMETRO) or request.META.get(self.CABECERA)
+        if not token or not request.user.is_staff or not perfilado.token_valido(token, request.user):
+            return self.get_response(request)
+
+        if request.GET.get('_perfilar_modo') == 'muestreo' and PerfiladorMuestreo is not None:
+            perfilador = PerfiladorMuestreo()
+            inicio = time.perf_counter()
+            perfilador.start()
+            try:
+                response = self._procesar(request)
+            finally:
+                perfilador.stop()
+            ruta = perfilado.ruta_nuevo_perfil(request, time.perf_counter() - inicio, '.txt')
+            ruta.write_text(perfilador.output_text(unicode=True), encoding='utf-8')
+        else:
+            perfilador = cProfile.Profile()
+            inicio = time.perf_counter()
+            perfilador.enable()
+            try:
+                response = self._procesar(request)
+            finally:
+                perfilador.disable()
+            ruta = perfilado.ruta_nuevo_perfil(request, time.perf_counter() - inicio, '.prof')
+            perfilador.dump_stats(str(ruta))
+        perfilado.aplicar_retencion()
+        response['X-Perfil'] = ruta.name
+        return response
+
+
+class MetricasMiddleware:
+    """Registra duración y consultas SQL de cada petición por nombre de ruta (core.metricas).
+
+    Debe ir el primero para medir también el resto de middlewares. Las
+    consultas se cuentan con un execute_wrapper que solo incrementa un entero.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        consultas = [0]
+
+        def contar(execute, sql, params, many, context):
+            consultas[0] += 1
+            return execute(sql, params, many, context)
+
+        inicio = time.perf_counter()
+        estado = 500
+        try:
+            with connection.execute_wrapper(contar):
+                response = self.get_response(request)
+            estado = response.status_code
+            return response
+        finally:
+            ruta = getattr(request, 'resolver_match', None)
+            # El nombre de la ruta y no la URL: acota la cardinalidad de las series
+            vista = (ruta.url_name or ruta.view_name) if ruta else 'sin_ruta'
+            metricas.PETICIONES.observar(time.perf_counter() - inicio, vista, request.method, estado)
+            metricas.CONSULTAS.observar(consultas[0], vista)
+            metricas.volcar_si_toca()
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """GZipMiddleware de Django con Brotli opcional y un umbral de tamaño configurable.
+
+    Las respuestas menores que COMPRESION_TAMANO_MINIMO se envían tal cual. Las
+    respuestas en streaming se comprimen por fragmentos con gzip, sin cargarlas
+    en memoria. El HTML lleva el token CSRF, así que siempre va con gzip y el
+    relleno aleatorio que GZipMiddleware añade contra BREACH; Brotli no tiene
+    dónde meter ese relleno y solo se usa para el resto (JSON, CSS, JS...).
+    Debe ir antes que cualquier middleware que lea el cuerpo.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESION_TAMANO_MINIMO:
+            return response
+        if (
+            brotli is None
+            or response.streaming
+            or response.has_header('Content-Encoding')
+            or response.get('Content-Type', '').startswith('text/html')
+            or not ACEPTA_BROTLI.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        comprimido = brotli.compress(response.content, quality=CALIDAD_BROTLI)
+        if len(comprimido) >= len(response.content):
+            return response
+        response.content = comprimido
+        response.headers['Content-Length'] = str(len(comprimido))
+        # Igual que GZipMiddleware: el cuerpo cambia, así que el ETag pasa a ser débil
+        if response.has_header('ETag'):
+            response.headers['ETag'] = re.sub(r'^"([^"]*)"$', r'W/"\1"', response.headers['ETag'])
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class ActividadMiddleware:
+    """Inserta con un solo bulk_create los eventos de actividad registrados en la petición."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = actividad.iniciar()
+        try:
+            return self.get_response(request)
+        finally:
+            # También si la vista falla: lo registrado ya se guardó en la base de datos
+            actividad.volcar(token)
+
+
+class LimiteLoginMiddleware:
+    """Frena ráfagas de intentos de login antes del backend de autenticación.
+
+    Cuenta los POST a LIMITE_LOGIN_RUTAS por IP y por usuario en la caché
+    (ver core.limites). Por encima del límite responde con la vista lockout y
+    un 429, sin que axes escriba en la base de datos ni se calcule ningún hash.
+    Debe ir después de AuthenticationMiddleware, que necesita la plantilla.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method != 'POST' or request.path not in settings.LIMITE_LOGIN_RUTAS:
+            return self.get_response(request)
+        # Mismos criterios que axes para la IP (ipware, proxies) y el campo de usuario
+        ip = get_client_ip_address(request)
+        usuario = get_client_username(request)
+        if limites.excede(ip, usuario):
+            from .views import lockout
+            response = lockout(request, credentials={'username': usuario})
+            metricas.LOGINS_FALLIDOS.inc('rafaga')
+            response.status_code = 429
+            response['Retry-After'] = str(limites.segundos_hasta_reintento())
+            return response
+        limites.registrar(ip, usuario)
+        return self.get_response(request)
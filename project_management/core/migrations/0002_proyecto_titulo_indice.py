@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='proyecto',
+            name='titulo',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
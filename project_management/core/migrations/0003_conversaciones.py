@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_proyecto_titulo_indice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParticipanteConversacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('no_leidos', models.PositiveIntegerField(default=0)),
+                ('ultimo_mensaje_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Conversacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(max_length=50, unique=True)),
+                ('ultimo_mensaje_at', models.DateTimeField(blank=True, null=True)),
+                ('ultimo_fragmento', models.CharField(blank=True, max_length=100)),
+                ('ultimo_remitente', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='mensaje',
+            name='conversacion',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='mensajes', to='core.conversacion'),
+        ),
+        migrations.AddIndex(
+            model_name='mensaje',
+            index=models.Index(fields=['conversacion', 'fecha_hora'], name='mensaje_conversacion_idx'),
+        ),
+        migrations.AddField(
+            model_name='participanteconversacion',
+            name='contraparte',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='participanteconversacion',
+            name='conversacion',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participaciones', to='core.conversacion'),
+        ),
+        migrations.AddField(
+            model_name='participanteconversacion',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participaciones', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversacion',
+            name='participantes',
+            field=models.ManyToManyField(related_name='conversaciones', through='core.ParticipanteConversacion', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='participanteconversacion',
+            index=models.Index(fields=['usuario', '-ultimo_mensaje_at'], name='participante_bandeja_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='participanteconversacion',
+            constraint=models.UniqueConstraint(fields=('conversacion', 'usuario'), name='participante_conversacion_unico'),
+        ),
+    ]
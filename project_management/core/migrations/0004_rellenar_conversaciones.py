@@ -0,0 +1,85 @@
+from django.db import migrations, transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Substr
+
+TAMANO_LOTE = 1000
+LONGITUD_FRAGMENTO = 100
+
+
+def _clave(usuario_a_id, usuario_b_id):
+    menor, mayor = sorted((usuario_a_id, usuario_b_id))
+    return f'{menor}-{mayor}'
+
+
+def rellenar_conversaciones(apps, schema_editor):
+    """Agrupa los mensajes existentes en conversaciones, por lotes de TAMANO_LOTE."""
+    Mensaje = apps.get_model('core', 'Mensaje')
+    Conversacion = apps.get_model('core', 'Conversacion')
+    ParticipanteConversacion = apps.get_model('core', 'ParticipanteConversacion')
+
+    # 1. Asignar conversación a cada mensaje, recorriendo por id ascendente
+    ultimo_id = 0
+    while True:
+        lote = list(
+            Mensaje.objects.filter(id__gt=ultimo_id, conversacion__isnull=True)
+            .order_by('id').values_list('id', 'remitente_id', 'destinatario_id')[:TAMANO_LOTE]
+        )
+        if not lote:
+            break
+        with transaction.atomic():
+            pares = {_clave(remitente, destinatario): (remitente, destinatario) for _, remitente, destinatario in lote}
+            existentes = dict(Conversacion.objects.filter(clave__in=pares).values_list('clave', 'id'))
+            nuevas = [clave for clave in pares if clave not in existentes]
+            Conversacion.objects.bulk_create([Conversacion(clave=clave) for clave in nuevas])
+            existentes.update(Conversacion.objects.filter(clave__in=nuevas).values_list('clave', 'id'))
+            ParticipanteConversacion.objects.bulk_create([
+                participante
+                for clave in nuevas
+                for participante in (
+                    ParticipanteConversacion(conversacion_id=existentes[clave], usuario_id=pares[clave][0], contraparte_id=pares[clave][1]),
+                    ParticipanteConversacion(conversacion_id=existentes[clave], usuario_id=pares[clave][1], contraparte_id=pares[clave][0]),
+                )
+            ], ignore_conflicts=True)
+            mensajes_por_conversacion = {}
+            for mensaje_id, remitente, destinatario in lote:
+                mensajes_por_conversacion.setdefault(existentes[_clave(remitente, destinatario)], []).append(mensaje_id)
+            for conversacion_id, ids in mensajes_por_conversacion.items():
+                Mensaje.objects.filter(id__in=ids).update(conversacion_id=conversacion_id)
+        ultimo_id = lote[-1][0]
+
+    # 2. Desnormalizar el último mensaje con UPDATEs por rangos de conversaciones
+    ultimo_mensaje = Mensaje.objects.filter(conversacion_id=OuterRef('pk')).order_by('-fecha_hora', '-id')
+    ultimo_id = 0
+    while True:
+        ids = list(
+            Conversacion.objects.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:TAMANO_LOTE]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            Conversacion.objects.filter(id__in=ids).update(
+                ultimo_mensaje_at=Subquery(ultimo_mensaje.values('fecha_hora')[:1]),
+                ultimo_fragmento=Subquery(
+                    ultimo_mensaje.annotate(fragmento=Substr('contenido', 1, LONGITUD_FRAGMENTO)).values('fragmento')[:1]
+                ),
+                ultimo_remitente_id=Subquery(ultimo_mensaje.values('remitente_id')[:1]),
+            )
+            ParticipanteConversacion.objects.filter(conversacion_id__in=ids).update(
+                ultimo_mensaje_at=Subquery(
+                    Conversacion.objects.filter(pk=OuterRef('conversacion_id')).values('ultimo_mensaje_at')[:1]
+                )
+            )
+        ultimo_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    # Sin transacción global: cada lote se confirma por separado en tablas grandes
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_conversaciones'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_conversaciones, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_rellenar_conversaciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='dependencias',
+            field=models.ManyToManyField(blank=True, related_name='bloquea', to='core.tarea'),
+        ),
+        migrations.AddField(
+            model_name='tarea',
+            name='duracion_dias',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_tarea_dependencias'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionRecordatorios',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('duracion_ms', models.PositiveIntegerField()),
+                ('asignaciones_revisadas', models.PositiveIntegerField()),
+                ('recordatorios_enviados', models.PositiveIntegerField()),
+                ('duplicados_omitidos', models.PositiveIntegerField()),
+                ('retraso_medio_s', models.FloatField(default=0)),
+                ('retraso_max_s', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RecordatorioEnviado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('proxima', 'Vence pronto'), ('vencida', 'Vencida')], max_length=10)),
+                ('fecha_limite', models.DateField()),
+                ('enviado_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(condition=models.Q(('estado', 'completada'), _negated=True), fields=['fecha_limite'], name='tarea_abierta_limite_idx'),
+        ),
+        migrations.AddField(
+            model_name='recordatorioenviado',
+            name='tarea',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.tarea'),
+        ),
+        migrations.AddField(
+            model_name='recordatorioenviado',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='recordatorioenviado',
+            constraint=models.UniqueConstraint(fields=('tarea', 'usuario', 'tipo', 'fecha_limite'), name='recordatorio_unico'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_recordatorios'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Actividad',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('tarea_creada', 'Tarea creada'), ('tarea_estado', 'Cambio de estado'), ('tarea_asignacion', 'Cambio de asignación'), ('tarea_editada', 'Tarea editada'), ('comentario', 'Comentario'), ('proyecto_editado', 'Proyecto editado')], max_length=20)),
+                ('tarea_id', models.BigIntegerField(blank=True, null=True)),
+                ('datos', models.JSONField(blank=True, default=dict)),
+                ('fecha', models.DateTimeField(auto_now_add=True)),
+                ('proyecto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='actividad', to='core.proyecto')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='actividad', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['proyecto', '-id'], name='actividad_proyecto_idx'), models.Index(fields=['usuario', '-id'], name='actividad_usuario_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_actividad'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='proyecto',
+            name='eliminado_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='PurgaProyecto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proyecto_id', models.BigIntegerField(unique=True)),
+                ('titulo', models.CharField(max_length=200)),
+                ('solicitada_en', models.DateTimeField(auto_now_add=True)),
+                ('paso', models.PositiveSmallIntegerField(default=0)),
+                ('filas_borradas', models.BigIntegerField(default=0)),
+                ('terminada_en', models.DateTimeField(blank=True, null=True)),
+                ('solicitada_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['solicitada_en'],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_purga_proyectos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='num_comentarios',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tarea',
+            name='ultimo_comentario_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comentario',
+            index=models.Index(fields=['tarea', 'id'], name='comentario_tarea_idx'),
+        ),
+    ]
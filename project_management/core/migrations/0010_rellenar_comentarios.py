@@ -0,0 +1,36 @@
+from django.db import migrations, transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+TAMANO_LOTE = 1000
+
+
+def rellenar_comentarios(apps, schema_editor):
+    """Calcula num_comentarios y ultimo_comentario_at de las tareas existentes, por lotes de TAMANO_LOTE."""
+    Tarea = apps.get_model('core', 'Tarea')
+    Comentario = apps.get_model('core', 'Comentario')
+    por_tarea = Comentario.objects.filter(tarea_id=OuterRef('pk')).order_by().values('tarea_id')
+    ultimo_id = 0
+    while True:
+        ids = list(Tarea.objects.filter(id__gt=ultimo_id).order_by('id').values_list('id', flat=True)[:TAMANO_LOTE])
+        if not ids:
+            break
+        with transaction.atomic():
+            Tarea.objects.filter(id__in=ids).update(
+                num_comentarios=Coalesce(Subquery(por_tarea.annotate(total=Count('id')).values('total')), 0),
+                ultimo_comentario_at=Subquery(por_tarea.annotate(ultimo=Max('fecha_hora')).values('ultimo')),
+            )
+        ultimo_id = ids[-1]
+
+
+class Migration(migrations.Migration):
+    # Sin transacción global: cada lote se confirma por separado en tablas grandes
+    atomic = False
+
+    dependencies = [
+        ('core', '0009_comentarios_desnormalizados'),
+    ]
+
+    operations = [
+        migrations.RunPython(rellenar_comentarios, migrations.RunPython.noop),
+    ]
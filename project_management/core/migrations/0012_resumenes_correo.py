@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-19 19:53
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0011_notificaciones_agrupadas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EjecucionResumenes',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('duracion_ms', models.PositiveIntegerField()),
+                ('notificaciones', models.PositiveIntegerField()),
+                ('correos_enviados', models.PositiveIntegerField()),
+                ('lotes', models.PositiveIntegerField()),
+            ],
+            options={
+                'ordering': ['-inicio'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenEnviado',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_enviado', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('ultima_notificacion_id', models.BigIntegerField()),
+                ('enviado_en', models.DateTimeField()),
+            ],
+        ),
+    ]
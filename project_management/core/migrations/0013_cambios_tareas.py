@@ -0,0 +1,48 @@
+# Generated by Django 5.1.6 on 2026-10-19 20:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_resumenes_correo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TareaEliminada',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tarea_id', models.BigIntegerField()),
+                ('version', models.PositiveBigIntegerField()),
+                ('eliminada_en', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='proyecto',
+            name='version_tareas',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tarea',
+            name='version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='tarea',
+            index=models.Index(fields=['proyecto', 'version'], name='tarea_proyecto_version_idx'),
+        ),
+        migrations.AddField(
+            model_name='tareaeliminada',
+            name='proyecto',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.proyecto'),
+        ),
+        migrations.AddIndex(
+            model_name='tareaeliminada',
+            index=models.Index(fields=['proyecto', 'version'], name='tarea_eliminada_version_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_tablero_tareas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tarea',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
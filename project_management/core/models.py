@@ -1,16 +1,41 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Subquery, When
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist
+
+class ProyectoActivoManager(models.Manager):
+    """Excluye los proyectos eliminados que esperan a ser purgados (ver core.purga)."""
+    def get_queryset(self):
+        return super().get_queryset().filter(eliminado_en__isnull=True)
 
 class Proyecto(models.Model):
-    titulo = models.CharField(max_length=200)
+    titulo = models.CharField(max_length=200, db_index=True)
     descripcion = models.TextField()
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField()
     creado_por = models.ForeignKey(User, on_delete=models.CASCADE, related_name='proyectos_creados')
+    eliminado_en = models.DateTimeField(null=True, blank=True, editable=False)
+    # Último número de la secuencia de cambios de sus tareas (ver siguiente_version_tareas)
+    version_tareas = models.PositiveBigIntegerField(default=0, editable=False)
+
+    objects = ProyectoActivoManager()
+    todos = models.Manager()
 
     def __str__(self):
         return self.titulo
 
+def siguiente_version_tareas(proyecto_id):
+    """Incrementa y devuelve la versión de cambios de tareas del proyecto.
+
+    Debe llamarse dentro de la transacción que hace el cambio: el UPDATE bloquea
+    la fila del proyecto hasta el commit, así que las versiones de un proyecto
+    se confirman en orden y quien lee la versión N ya ve todos los cambios <= N.
+    """
+    proyectos = Proyecto.todos.filter(pk=proyecto_id)
+    proyectos.update(version_tareas=F('version_tareas') + 1)
+    return proyectos.values_list('version_tareas', flat=True).get()
+
 class Grupo(models.Model):
     nombre = models.CharField(max_length=100)
     proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='grupos', null=True, blank=True)
@@ -45,35 +70,393 @@ class Tarea(models.Model):
     fecha_limite = models.DateField()
     estado = models.CharField(max_length=20, choices=ESTADO_OPCIONES, default='pendiente')
     usuarios_asignados = models.ManyToManyField(User, related_name='tareas_asignadas')
+    # Tareas que bloquean a esta (deben terminar antes de que empiece); ver core.planificacion
+    dependencias = models.ManyToManyField('self', symmetrical=False, related_name='bloquea', blank=True)
+    duracion_dias = models.PositiveIntegerField(default=1)
+    # Desnormalizados por Comentario.save/delete para listar sin contar comentarios
+    num_comentarios = models.PositiveIntegerField(default=0)
+    ultimo_comentario_at = models.DateTimeField(null=True, blank=True)
+    # Versión del proyecto en el último cambio de la tarea; la lee el sondeo de lista_tareas
+    version = models.PositiveBigIntegerField(default=0, editable=False)
+    # Posición dentro de su columna del tablero (core.tablero); empates por id
+    rango = models.FloatField(default=0, editable=False)
+    # Contador propio de la tarea para la concurrencia optimista del tablero (core.tablero)
+    revision = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # Búsqueda por rango de fecha límite de las tareas abiertas (core.recordatorios)
+            models.Index(
+                fields=['fecha_limite'], name='tarea_abierta_limite_idx', condition=~models.Q(estado='completada')
+            ),
+            # Tareas cambiadas desde una versión (vista cambios_tareas)
+            models.Index(fields=['proyecto', 'version'], name='tarea_proyecto_version_idx'),
+            # Vecinas de una tarjeta en su columna del tablero
+            models.Index(fields=['proyecto', 'estado', 'rango'], name='tarea_tablero_idx'),
+        ]
 
     def __str__(self):
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        """Guarda la tarea con la siguiente versión de cambios de su proyecto y una revisión más."""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version', 'revision'}
+        if not self._state.adding:
+            self.revision += 1
+        with transaction.atomic():
+            self.version = siguiente_version_tareas(self.proyecto_id)
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def marcar_cambiadas(cls, tarea_ids):
+        """Da una nueva versión a tareas cambiadas sin pasar por save (p. ej. sus asignaciones)."""
+        por_proyecto = {}
+        for tarea_id, proyecto_id in cls.objects.filter(id__in=tarea_ids).values_list('id', 'proyecto_id'):
+            por_proyecto.setdefault(proyecto_id, []).append(tarea_id)
+        with transaction.atomic():
+            for proyecto_id, ids in por_proyecto.items():
+                cls.objects.filter(id__in=ids).update(version=siguiente_version_tareas(proyecto_id))
+
+class TareaEliminada(models.Model):
+    """Lápida de una tarea borrada, para que el sondeo de lista_tareas la quite."""
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='+')
+    tarea_id = models.BigIntegerField()
+    version = models.PositiveBigIntegerField()
+    eliminada_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['proyecto', 'version'], name='tarea_eliminada_version_idx'),
+        ]
+
+    def __str__(self):
+        return f'Tarea {self.tarea_id} eliminada (versión {self.version})'
+
+class Conversacion(models.Model):
+    """Hilo entre dos usuarios con los datos del último mensaje desnormalizados."""
+    LONGITUD_FRAGMENTO = 100
+
+    clave = models.CharField(max_length=50, unique=True)  # "<id menor>-<id mayor>"
+    participantes = models.ManyToManyField(
+        User, through='ParticipanteConversacion', through_fields=('conversacion', 'usuario'),
+        related_name='conversaciones'
+    )
+    ultimo_mensaje_at = models.DateTimeField(null=True, blank=True)
+    ultimo_fragmento = models.CharField(max_length=LONGITUD_FRAGMENTO, blank=True)
+    ultimo_remitente = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+
+    def __str__(self):
+        return f'Conversación {self.clave}'
+
+    @staticmethod
+    def clave_para(usuario_a_id, usuario_b_id):
+        menor, mayor = sorted((usuario_a_id, usuario_b_id))
+        return f'{menor}-{mayor}'
+
+    @classmethod
+    def obtener_para(cls, usuario_a_id, usuario_b_id):
+        """Devuelve (creándola si hace falta) la conversación entre dos usuarios."""
+        conversacion, creada = cls.objects.get_or_create(clave=cls.clave_para(usuario_a_id, usuario_b_id))
+        if creada:
+            ParticipanteConversacion.objects.bulk_create([
+                ParticipanteConversacion(conversacion=conversacion, usuario_id=usuario_a_id, contraparte_id=usuario_b_id),
+                ParticipanteConversacion(conversacion=conversacion, usuario_id=usuario_b_id, contraparte_id=usuario_a_id),
+            ], ignore_conflicts=True)
+        return conversacion
+
+    def registrar_mensaje(self, mensaje):
+        """Actualiza el último mensaje y suma un no leído al destinatario."""
+        self.ultimo_mensaje_at = mensaje.fecha_hora
+        self.ultimo_fragmento = mensaje.contenido[:self.LONGITUD_FRAGMENTO]
+        self.ultimo_remitente_id = mensaje.remitente_id
+        Conversacion.objects.filter(pk=self.pk).update(
+            ultimo_mensaje_at=self.ultimo_mensaje_at,
+            ultimo_fragmento=self.ultimo_fragmento,
+            ultimo_remitente_id=self.ultimo_remitente_id
+        )
+        self.participaciones.update(
+            ultimo_mensaje_at=mensaje.fecha_hora,
+            no_leidos=Case(
+                When(usuario_id=mensaje.destinatario_id, then=F('no_leidos') + 1),
+                default=F('no_leidos'),
+                output_field=models.PositiveIntegerField()
+            )
+        )
+
+    def marcar_leida(self, usuario):
+        """Pone a cero los no leídos del usuario en esta conversación."""
+        self.participaciones.filter(usuario=usuario, no_leidos__gt=0).update(no_leidos=0)
+
+class ParticipanteConversacion(models.Model):
+    conversacion = models.ForeignKey(Conversacion, on_delete=models.CASCADE, related_name='participaciones')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='participaciones')
+    contraparte = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    no_leidos = models.PositiveIntegerField(default=0)
+    # Copia de Conversacion.ultimo_mensaje_at para ordenar la bandeja con un solo índice
+    ultimo_mensaje_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['conversacion', 'usuario'], name='participante_conversacion_unico'),
+        ]
+        indexes = [
+            models.Index(fields=['usuario', '-ultimo_mensaje_at'], name='participante_bandeja_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.usuario} en {self.conversacion}'
+
 class Mensaje(models.Model):
     remitente = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mensajes_enviados')
     destinatario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='mensajes_recibidos')
     proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='mensajes', null=True, blank=True)
+    conversacion = models.ForeignKey(Conversacion, on_delete=models.CASCADE, related_name='mensajes', null=True, blank=True)
     contenido = models.TextField()
     fecha_hora = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['conversacion', 'fecha_hora'], name='mensaje_conversacion_idx'),
+        ]
+
     def __str__(self):
         return f'Mensaje de {self.remitente} a {self.destinatario}'
 
+    def save(self, *args, **kwargs):
+        """Asigna la conversación y mantiene sus datos desnormalizados al crear."""
+        nuevo = self._state.adding
+        with transaction.atomic():
+            if self.conversacion_id is None:
+                self.conversacion = Conversacion.obtener_para(self.remitente_id, self.destinatario_id)
+            super().save(*args, **kwargs)
+            if nuevo:
+                self.conversacion.registrar_mensaje(self)
+
 class Comentario(models.Model):
     tarea = models.ForeignKey(Tarea, on_delete=models.CASCADE, related_name='comentarios')
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     contenido = models.TextField()
     fecha_hora = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Paginación por id dentro de cada tarea (keyset) y consulta de nuevos
+            models.Index(fields=['tarea', 'id'], name='comentario_tarea_idx'),
+        ]
+
     def __str__(self):
         return f'Comentario de {self.usuario} en {self.tarea}'
 
+    def save(self, *args, **kwargs):
+        """Al crear, suma uno al contador de la tarea, actualiza su último comentario y su versión."""
+        nuevo = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if nuevo:
+                Tarea.objects.filter(pk=self.tarea_id).update(
+                    num_comentarios=F('num_comentarios') + 1,
+                    ultimo_comentario_at=Greatest(Coalesce('ultimo_comentario_at', self.fecha_hora), self.fecha_hora),
+                    version=siguiente_version_tareas(self.tarea.proyecto_id)
+                )
+
+    def delete(self, *args, **kwargs):
+        """Resta uno al contador y recalcula el último comentario de la tarea."""
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            Tarea.objects.filter(pk=self.tarea_id).update(
+                num_comentarios=Greatest(F('num_comentarios') - 1, 0),
+                ultimo_comentario_at=Subquery(
+                    Comentario.objects.filter(tarea_id=self.tarea_id).order_by('-fecha_hora').values('fecha_hora')[:1]
+                ),
+                version=siguiente_version_tareas(self.tarea.proyecto_id)
+            )
+        return resultado
+
 class Notificacion(models.Model):
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notificaciones')
     mensaje = models.TextField()
     fecha = models.DateTimeField(auto_now_add=True)
     leida = models.BooleanField(default=False)
     proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, null=True, blank=True)
+    # Avisos repetidos con la misma clave se acumulan en una fila sin leer (ver core.notificaciones)
+    clave_agrupacion = models.CharField(max_length=100, blank=True, default='')
+    contador = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Sirve al contador de no leídas, al marcado masivo y a la búsqueda de filas agrupables
+            models.Index(
+                fields=['usuario', 'clave_agrupacion'], condition=models.Q(leida=False),
+                name='notificacion_no_leida_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Notificación para {self.usuario}: {self.mensaje}"
+
+class Actividad(models.Model):
+    """Evento del historial de un proyecto. Solo se insertan filas, nunca se modifican.
+
+    ``datos`` guarda lo necesario para describir el evento (título de la tarea,
+    estados, usuarios añadidos/quitados...) sin tener que unirlo con otras tablas.
+    """
+    TIPOS = [
+        ('tarea_creada', 'Tarea creada'),
+        ('tarea_estado', 'Cambio de estado'),
+        ('tarea_asignacion', 'Cambio de asignación'),
+        ('tarea_editada', 'Tarea editada'),
+        ('comentario', 'Comentario'),
+        ('proyecto_editado', 'Proyecto editado'),
+    ]
+    proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='actividad')
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='actividad')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    tarea_id = models.BigIntegerField(null=True, blank=True)  # Sin FK: el historial sobrevive a la tarea
+    datos = models.JSONField(default=dict, blank=True)
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # Las líneas de tiempo se paginan por id descendente (keyset)
+        indexes = [
+            models.Index(fields=['proyecto', '-id'], name='actividad_proyecto_idx'),
+            models.Index(fields=['usuario', '-id'], name='actividad_usuario_idx'),
+        ]
 
     def __str__(self):
-        return f"Notificación para {self.usuario}: {self.mensaje}"
\ No newline at end of file
+        return f'{self.get_tipo_display()} en {self.proyecto_id}'
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('La actividad es de solo inserción.')
+        super().save(*args, **kwargs)
+
+    def _campos(self, modelo):
+        nombres = []
+        for campo in self.datos.get('campos', []):
+            try:
+                nombres.append(str(modelo._meta.get_field(campo).verbose_name))
+            except FieldDoesNotExist:
+                nombres.append(campo)
+        return ', '.join(nombres)
+
+    def descripcion(self):
+        datos = self.datos
+        tarea = datos.get('tarea', '')
+        if self.tipo == 'tarea_creada':
+            return f"creó la tarea '{tarea}'"
+        if self.tipo == 'tarea_estado':
+            return f"movió '{tarea}' de {datos.get('de')} a {datos.get('a')}"
+        if self.tipo == 'tarea_asignacion':
+            partes = []
+            if datos.get('anadidos'):
+                partes.append(f"asignó a {', '.join(datos['anadidos'])}")
+            if datos.get('quitados'):
+                partes.append(f"quitó a {', '.join(datos['quitados'])}")
+            return f"{' y '.join(partes)} en '{tarea}'"
+        if self.tipo == 'tarea_editada':
+            return f"editó {self._campos(Tarea)} de '{tarea}'"
+        if self.tipo == 'comentario':
+            return f"comentó en '{tarea}': {datos.get('fragmento', '')}"
+        return f"editó {self._campos(Proyecto)} del proyecto"
+
+class RecordatorioEnviado(models.Model):
+    """Clave (tarea, usuario, tipo, fecha límite) de cada recordatorio ya enviado.
+
+    Incluir la fecha límite hace que, si se aplaza la tarea, se vuelva a avisar.
+    """
+    TIPOS = [
+        ('proxima', 'Vence pronto'),
+        ('vencida', 'Vencida'),
+    ]
+    tarea = models.ForeignKey(Tarea, on_delete=models.CASCADE, related_name='+')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    fecha_limite = models.DateField()
+    enviado_en = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tarea', 'usuario', 'tipo', 'fecha_limite'], name='recordatorio_unico'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_tipo_display()}: {self.tarea_id} para {self.usuario_id}'
+
+class EjecucionRecordatorios(models.Model):
+    """Métricas de cada pasada del programador de recordatorios."""
+    inicio = models.DateTimeField()
+    duracion_ms = models.PositiveIntegerField()
+    asignaciones_revisadas = models.PositiveIntegerField()
+    recordatorios_enviados = models.PositiveIntegerField()
+    duplicados_omitidos = models.PositiveIntegerField()
+    # Segundos entre que un recordatorio pasó a ser debido y esta pasada
+    retraso_medio_s = models.FloatField(default=0)
+    retraso_max_s = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['-inicio']
+
+    def __str__(self):
+        return f'Recordatorios {self.inicio:%Y-%m-%d %H:%M}: {self.recordatorios_enviados} enviados'
+
+class ResumenEnviado(models.Model):
+    """Última notificación incluida en el resumen por correo de cada usuario (ver core.resumenes)."""
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='resumen_enviado')
+    # Sin FK: las notificaciones antiguas se archivan con sus particiones
+    ultima_notificacion_id = models.BigIntegerField()
+    enviado_en = models.DateTimeField()
+
+    def __str__(self):
+        return f'Resumen de {self.usuario_id} hasta la notificación {self.ultima_notificacion_id}'
+
+class EjecucionResumenes(models.Model):
+    """Métricas de cada pasada de envío de resúmenes por correo."""
+    inicio = models.DateTimeField()
+    duracion_ms = models.PositiveIntegerField()
+    notificaciones = models.PositiveIntegerField()
+    correos_enviados = models.PositiveIntegerField()
+    lotes = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['-inicio']
+
+    def __str__(self):
+        return f'Resúmenes {self.inicio:%Y-%m-%d %H:%M}: {self.correos_enviados} correos'
+
+class PurgaProyecto(models.Model):
+    """Progreso del borrado en segundo plano de un proyecto eliminado."""
+    proyecto_id = models.BigIntegerField(unique=True)  # Sin FK: la fila del proyecto se borra al final
+    titulo = models.CharField(max_length=200)
+    solicitada_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    solicitada_en = models.DateTimeField(auto_now_add=True)
+    paso = models.PositiveSmallIntegerField(default=0)  # Índice en core.purga.PASOS
+    filas_borradas = models.BigIntegerField(default=0)
+    terminada_en = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['solicitada_en']
+
+    def __str__(self):
+        estado = 'terminada' if self.terminada_en else f'paso {self.paso}'
+        return f"Purga de '{self.titulo}' ({estado})"
+
+def proyectos_del_usuario(usuario):
+    """Proyectos a los que el usuario pertenece a través de sus grupos."""
+    return Proyecto.objects.filter(grupos__miembros=usuario).distinct()
+
+def grupos_activos():
+    """Grupos generales y de proyectos no eliminados."""
+    return Grupo.objects.filter(Q(proyecto__isnull=True) | Q(proyecto__eliminado_en__isnull=True))
+
+def proyectos_administrados(usuario):
+    """Proyectos que el usuario puede administrar (todos si es superusuario)."""
+    if usuario.is_superuser:
+        return Proyecto.objects.all()
+    return Proyecto.objects.filter(
+        perfilproyecto__usuario=usuario,
+        perfilproyecto__rol='administrador'
+    ).distinct()
@@ -0,0 +1,63 @@
+"""Alta agrupada y marcado masivo de notificaciones.
+
+Los avisos repetidos de un mismo objeto (por ejemplo, cada edición de una
+tarea) llevan una ``clave_agrupacion``: mientras el destinatario no lea la
+notificación, los siguientes avisos con esa clave incrementan su ``contador``
+y actualizan mensaje y fecha en lugar de insertar otra fila.
+
+No hay restricción única sobre (usuario, clave): Notificacion está particionada
+por fecha en PostgreSQL y una única tendría que incluirla. Dos altas
+simultáneas pueden dejar dos filas sin leer con la misma clave; se agrupan de
+nuevo en cuanto se leen.
+
+Tampoco se agrupa en una fila que ya ha salido en un resumen por correo
+(core.resumenes guarda el id de la última notificación resumida): el aviso
+nuevo va en una fila aparte para que el siguiente resumen lo incluya.
+"""
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import metricas
+from .models import Notificacion
+
+def clave_tarea_modificada(tarea):
+    return f'tarea_modificada:{tarea.pk}'
+
+def notificar_agrupada(usuario_ids, clave, mensaje, proyecto=None):
+    """Avisa a `usuario_ids` agrupando con sus notificaciones sin leer de la misma clave.
+
+    Cuesta como mucho tres consultas sea cual sea el número de usuarios:
+    localizar las agrupables, un UPDATE para todas ellas y un INSERT para el resto.
+    """
+    usuario_ids = set(usuario_ids)
+    metricas.NOTIFICACIONES.observar(len(usuario_ids), clave.partition(':')[0])
+    if not usuario_ids:
+        return
+    pendientes = Notificacion.objects.filter(
+        usuario_id__in=usuario_ids, clave_agrupacion=clave, leida=False
+    ).alias(
+        resumida_hasta=Coalesce('usuario__resumen_enviado__ultima_notificacion_id', 0)
+    ).filter(id__gt=F('resumida_hasta'))
+    agrupables = dict(pendientes.values_list('id', 'usuario_id'))
+    if agrupables:
+        Notificacion.objects.filter(id__in=agrupables).update(
+            contador=F('contador') + 1, mensaje=mensaje, fecha=timezone.now()
+        )
+    Notificacion.objects.bulk_create([
+        Notificacion(usuario_id=usuario_id, mensaje=mensaje, proyecto=proyecto, clave_agrupacion=clave)
+        for usuario_id in sorted(usuario_ids - set(agrupables.values()))
+    ])
+
+def marcar_leidas(usuario, proyecto_id=None, hasta=None):
+    """Marca como leídas las notificaciones de `usuario` con un solo UPDATE; devuelve cuántas.
+
+    `proyecto_id` limita a las de un proyecto y `hasta` a las de id menor o
+    igual, para no marcar las que lleguen después de lo que el usuario ha visto.
+    """
+    notificaciones = Notificacion.objects.filter(usuario=usuario, leida=False)
+    if proyecto_id is not None:
+        notificaciones = notificaciones.filter(proyecto_id=proyecto_id)
+    if hasta is not None:
+        notificaciones = notificaciones.filter(id__lte=hasta)
+    return notificaciones.update(leida=True)
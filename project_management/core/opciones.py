@@ -0,0 +1,72 @@
+"""Caché de las opciones de los formularios (grupos y usuarios asignables).
+
+Las claves incluyen una versión de membresía que las señales de
+``core.signals`` incrementan, de modo que nunca hace falta borrar entradas:
+basta con que la versión cambie para que las antiguas dejen de usarse.
+
+Todo vive en la caché CACHE_COMPARTIDA: una invalidación hecha en un worker
+debe verse en los demás (ver el check core.E001).
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+
+from . import metricas
+from .models import grupos_activos
+
+PREFIJO = 'core:opciones'
+TIEMPO_CACHE = 60 * 60  # Las entradas huérfanas caducan solas en una hora
+
+def _cache():
+    return caches[settings.CACHE_COMPARTIDA]
+
+def _clave_version(ambito):
+    return f'{PREFIJO}:version:{ambito}'
+
+def versiones(*ambitos):
+    """Devuelve la versión actual de cada ámbito ('global', 'grupos', 'proyecto:<id>')."""
+    claves = [_clave_version(ambito) for ambito in ambitos]
+    encontradas = _cache().get_many(claves)
+    resultado = []
+    for clave in claves:
+        if clave not in encontradas:
+            # Se parte de una marca de tiempo para no reutilizar versiones si la clave se pierde
+            _cache().add(clave, time.time_ns(), None)
+            encontradas[clave] = _cache().get(clave)
+        resultado.append(encontradas[clave])
+    return resultado
+
+def invalidar(ambito):
+    """Incrementa la versión de un ámbito para descartar sus opciones cacheadas."""
+    clave = _clave_version(ambito)
+    try:
+        _cache().incr(clave)
+    except ValueError:
+        _cache().add(clave, time.time_ns(), None)
+
+def _obtener(clave, consulta):
+    opciones = metricas.registrar_cache('opciones', _cache().get(clave))
+    if opciones is None:
+        opciones = list(consulta())
+        _cache().set(clave, opciones, TIEMPO_CACHE)
+    return opciones
+
+def grupos_disponibles():
+    """Lista de (id, nombre, proyecto_id) de todos los grupos."""
+    version_global, = versiones('global')
+    return _obtener(
+        f'{PREFIJO}:grupos:{version_global}',
+        lambda: grupos_activos().order_by('nombre', 'id').values_list('id', 'nombre', 'proyecto_id')
+    )
+
+def usuarios_elegibles(proyecto_id):
+    """Lista de (id, username) de los miembros de los grupos del proyecto."""
+    version_global, version_proyecto = versiones('global', f'proyecto:{proyecto_id}')
+    return _obtener(
+        f'{PREFIJO}:usuarios:{proyecto_id}:{version_global}:{version_proyecto}',
+        lambda: User.objects.filter(
+            grupos__proyecto=proyecto_id
+        ).distinct().order_by('username').values_list('id', 'username')
+    )
@@ -0,0 +1,294 @@
+"""Lectura anidada del panel (proyectos → tareas → asignados → comentarios).
+
+La consulta usa una sintaxis de selección al estilo GraphQL, por ejemplo::
+
+    proyectos(10){titulo,tareas(20){titulo,estado,asignados{username},
+                  comentarios(3){contenido,usuario{username}}}}
+
+Antes de ejecutarla se comprueban la profundidad y un coste estimado (filas
+máximas que puede devolver). Después se resuelve por niveles: en cada nivel
+todas las relaciones piden sus claves a los cargadores de core.cargadores y se
+despachan juntas, así que cada relación cuesta una consulta ``IN`` por nivel,
+sea cual sea el número de proyectos o tareas.
+"""
+import re
+from functools import partial
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .cargadores import Cargador, Cargadores
+from .models import Comentario, Grupo, Tarea, User, proyectos_del_usuario
+
+CONSULTA_POR_DEFECTO = (
+    'proyectos{id,titulo,fecha_fin,tareas{id,titulo,estado,fecha_limite,asignados{id,username},'
+    'comentarios{id,contenido,fecha_hora,usuario{id,username}}}}'
+)
+
+class ConsultaInvalida(ValueError):
+    pass
+
+class Campo:
+    """Campo seleccionado: nombre, límite opcional entre paréntesis y subselección."""
+    __slots__ = ('nombre', 'limite', 'hijos')
+
+    def __init__(self, nombre, limite=None, hijos=None):
+        self.nombre = nombre
+        self.limite = limite
+        self.hijos = hijos
+
+_TOKEN = re.compile(r'\s*(?:([A-Za-z_]\w*)|(\d+)|([{}(),]))')
+
+def _tokens(texto):
+    tokens, posicion = [], 0
+    texto = texto.strip()
+    while posicion < len(texto):
+        encontrado = _TOKEN.match(texto, posicion)
+        if not encontrado:
+            raise ConsultaInvalida(f"Carácter inesperado en la posición {posicion}")
+        tokens.append(encontrado.group(encontrado.lastindex))
+        posicion = encontrado.end()
+    return tokens
+
+def _demasiado_profunda(profundidad_maxima):
+    return ConsultaInvalida(f"La consulta supera la profundidad máxima ({profundidad_maxima})")
+
+def analizar(texto, profundidad_maxima=None):
+    """Convierte el texto de la consulta en una lista de Campo.
+
+    Con `profundidad_maxima` se corta el análisis en cuanto el anidamiento la
+    supera, antes de que una consulta con miles de llaves agote la pila.
+    """
+    tokens = _tokens(texto)
+    posicion = 0
+
+    def siguiente(esperado=None):
+        nonlocal posicion
+        if posicion >= len(tokens):
+            raise ConsultaInvalida('Consulta incompleta')
+        token = tokens[posicion]
+        if esperado is not None and token != esperado:
+            raise ConsultaInvalida(f"Se esperaba '{esperado}' y se encontró '{token}'")
+        posicion += 1
+        return token
+
+    def mirar():
+        return tokens[posicion] if posicion < len(tokens) else None
+
+    def seleccion(cierre, profundidad):
+        # Los campos escalares del último nivel de relaciones están un nivel por debajo
+        if profundidad_maxima is not None and profundidad > profundidad_maxima + 1:
+            raise _demasiado_profunda(profundidad_maxima)
+        campos = []
+        while True:
+            nombre = siguiente()
+            if not re.fullmatch(r'[A-Za-z_]\w*', nombre):
+                raise ConsultaInvalida(f"Nombre de campo inválido: '{nombre}'")
+            campo = Campo(nombre)
+            if mirar() == '(':
+                siguiente('(')
+                limite = siguiente()
+                if not limite.isdigit():
+                    raise ConsultaInvalida(f"Límite inválido en '{nombre}'")
+                campo.limite = int(limite)
+                siguiente(')')
+            if mirar() == '{':
+                siguiente('{')
+                campo.hijos = seleccion('}', profundidad + 1)
+            campos.append(campo)
+            if mirar() == ',':
+                siguiente(',')
+                continue
+            if cierre is not None:
+                siguiente(cierre)
+            return campos
+
+    if mirar() == '{':
+        siguiente('{')
+        campos = seleccion('}', 1)
+    else:
+        campos = seleccion(None, 1)
+    if posicion != len(tokens):
+        raise ConsultaInvalida(f"Sobra texto a partir de '{tokens[posicion]}'")
+    return campos
+
+# Funciones de lote: reciben las claves de los padres y devuelven {clave: filas}
+
+def _por_padre(queryset, padre, orden, limite, columnas):
+    """Las `limite` primeras filas de cada padre en una consulta, numerándolas con ROW_NUMBER."""
+    filas = queryset.annotate(
+        posicion=Window(RowNumber(), partition_by=F(padre), order_by=orden)
+    ).filter(posicion__lte=limite).order_by(padre, 'posicion').values(padre, *columnas)
+    resultado = {}
+    for fila in filas:
+        resultado.setdefault(fila.pop(padre), []).append(fila)
+    return resultado
+
+def _usuarios(claves):
+    return {fila['id']: fila for fila in User.objects.filter(id__in=claves).values(*USUARIO.columnas)}
+
+def _cargador_usuarios(cargadores):
+    return cargadores.obtener('usuarios', lambda: Cargador(_usuarios))
+
+def _proyectos(claves, limite, cargadores):
+    # La raíz tiene una sola clave: el usuario de la petición
+    usuario_id, = claves
+    filas = proyectos_del_usuario(User(pk=usuario_id)).order_by('titulo', 'id').values(*PROYECTO.columnas)[:limite]
+    return {usuario_id: list(filas)}
+
+def _tareas(claves, limite, cargadores):
+    return _por_padre(
+        Tarea.objects.filter(proyecto_id__in=claves), 'proyecto_id',
+        [F('fecha_limite').asc(), F('id').asc()], limite, TAREA.columnas
+    )
+
+def _comentarios(claves, limite, cargadores):
+    """Los últimos `limite` comentarios de cada tarea, del más reciente al más antiguo."""
+    return _por_padre(
+        Comentario.objects.filter(tarea_id__in=claves), 'tarea_id', [F('id').desc()], limite, COMENTARIO.columnas
+    )
+
+def _asignados(claves, limite, cargadores):
+    usuarios = _cargador_usuarios(cargadores)
+    resultado = {}
+    for tarea_id, usuario_id, username in Tarea.usuarios_asignados.through.objects.filter(
+        tarea_id__in=claves
+    ).order_by('user__username').values_list('tarea_id', 'user_id', 'user__username'):
+        fila = {'id': usuario_id, 'username': username}
+        # Los autores de comentarios que ya están asignados no se vuelven a leer
+        usuarios.cebar(usuario_id, fila)
+        resultado.setdefault(tarea_id, []).append(fila)
+    return resultado
+
+def _grupos(claves, limite, cargadores):
+    return _por_padre(
+        Grupo.objects.filter(proyecto_id__in=claves), 'proyecto_id', [F('nombre').asc()], limite, GRUPO.columnas
+    )
+
+class Relacion:
+    """Relación navegable: tipo destino, columna clave del padre y forma de cargarla.
+
+    Las de lista tienen un límite por padre (`limite`, hasta `limite_maximo`);
+    las que no lo admiten se estiman con `estimacion` filas para el coste.
+    """
+
+    def __init__(self, tipo, clave, cargar=None, lista=True, limite=None, limite_maximo=None, estimacion=None):
+        self.tipo = tipo
+        self.clave = clave
+        self.cargar = cargar
+        self.lista = lista
+        self.limite = limite
+        self.limite_maximo = limite_maximo
+        self.estimacion = estimacion
+
+    def filas_por_padre(self, limite):
+        if not self.lista:
+            return 1
+        return limite if limite is not None else self.estimacion
+
+    def cargador(self, nombre, limite, cargadores):
+        if self.cargar is None:
+            # Relación a un solo objeto: se comparte el cargador por id del tipo destino
+            return _cargador_usuarios(cargadores)
+        return cargadores.obtener(
+            f'{nombre}:{limite}', lambda: Cargador(partial(self.cargar, limite=limite, cargadores=cargadores), list)
+        )
+
+class Tipo:
+    def __init__(self, nombre, columnas, relaciones=None):
+        self.nombre = nombre
+        self.columnas = columnas
+        self.relaciones = relaciones or {}
+
+USUARIO = Tipo('Usuario', ('id', 'username'))
+GRUPO = Tipo('Grupo', ('id', 'nombre'))
+COMENTARIO = Tipo('Comentario', ('id', 'contenido', 'fecha_hora', 'usuario_id'), {
+    'usuario': Relacion(USUARIO, 'usuario_id', lista=False),
+})
+TAREA = Tipo('Tarea', ('id', 'titulo', 'descripcion', 'estado', 'fecha_limite', 'duracion_dias'), {
+    'asignados': Relacion(USUARIO, 'id', _asignados, estimacion=5),
+    'comentarios': Relacion(COMENTARIO, 'id', _comentarios, limite=3, limite_maximo=20),
+})
+PROYECTO = Tipo('Proyecto', ('id', 'titulo', 'descripcion', 'fecha_inicio', 'fecha_fin'), {
+    'tareas': Relacion(TAREA, 'id', _tareas, limite=50, limite_maximo=200),
+    'grupos': Relacion(GRUPO, 'id', _grupos, limite=10, limite_maximo=50),
+})
+RAIZ = Tipo('Consulta', (), {
+    'proyectos': Relacion(PROYECTO, 'usuario', _proyectos, limite=20, limite_maximo=100),
+})
+
+def _validar(tipo, seleccion, profundidad, multiplicidad, profundidad_maxima):
+    """Comprueba la selección contra el esquema, fija los límites y devuelve su coste estimado."""
+    coste = 0
+    vistos = set()
+    for campo in seleccion:
+        if campo.nombre in vistos:
+            raise ConsultaInvalida(f"Campo repetido: '{campo.nombre}'")
+        vistos.add(campo.nombre)
+        relacion = tipo.relaciones.get(campo.nombre)
+        if relacion is None:
+            if campo.nombre not in tipo.columnas or campo.nombre.endswith('_id'):
+                raise ConsultaInvalida(f"{tipo.nombre} no tiene el campo '{campo.nombre}'")
+            if campo.hijos is not None or campo.limite is not None:
+                raise ConsultaInvalida(f"'{campo.nombre}' no admite subselección ni límite")
+            continue
+        if not campo.hijos:
+            raise ConsultaInvalida(f"'{campo.nombre}' necesita una subselección entre llaves")
+        if profundidad > profundidad_maxima:
+            raise _demasiado_profunda(profundidad_maxima)
+        if campo.limite is not None:
+            if relacion.limite_maximo is None:
+                raise ConsultaInvalida(f"'{campo.nombre}' no admite límite")
+            if not 1 <= campo.limite <= relacion.limite_maximo:
+                raise ConsultaInvalida(f"El límite de '{campo.nombre}' debe estar entre 1 y {relacion.limite_maximo}")
+        else:
+            campo.limite = relacion.limite
+        filas = multiplicidad * relacion.filas_por_padre(campo.limite)
+        coste += filas + _validar(relacion.tipo, campo.hijos, profundidad + 1, filas, profundidad_maxima)
+    return coste
+
+def preparar(texto, profundidad_maxima, coste_maximo):
+    """Analiza y valida la consulta; devuelve (selección, coste) o lanza ConsultaInvalida."""
+    seleccion = analizar(texto, profundidad_maxima)
+    coste = _validar(RAIZ, seleccion, 1, 1, profundidad_maxima)
+    if coste > coste_maximo:
+        raise ConsultaInvalida(f"La consulta puede devolver hasta {coste} filas (máximo {coste_maximo})")
+    return seleccion, coste
+
+def ejecutar(seleccion, usuario):
+    """Resuelve la selección nivel a nivel; devuelve (datos, número de lotes)."""
+    cargadores = Cargadores()
+    datos = {}
+    nivel = [(RAIZ, [{'usuario': usuario.pk}], [datos], seleccion)]
+    while nivel:
+        pendientes = []
+        for tipo, filas, salidas, campos in nivel:
+            for campo in campos:
+                relacion = tipo.relaciones.get(campo.nombre)
+                if relacion is None:
+                    for fila, salida in zip(filas, salidas):
+                        salida[campo.nombre] = fila[campo.nombre]
+                    continue
+                cargador = relacion.cargador(f'{tipo.nombre}.{campo.nombre}', campo.limite, cargadores)
+                diferidos = [cargador.cargar(fila[relacion.clave]) for fila in filas]
+                pendientes.append((relacion, campo, salidas, diferidos))
+        # Una consulta por cargador con claves pendientes, para todo el nivel
+        cargadores.despachar()
+        nivel = []
+        for relacion, campo, salidas, diferidos in pendientes:
+            filas_hijas, salidas_hijas = [], []
+            for salida, diferido in zip(salidas, diferidos):
+                valor = diferido.valor()
+                if relacion.lista:
+                    salida[campo.nombre] = [{} for _ in valor]
+                    filas_hijas.extend(valor)
+                    salidas_hijas.extend(salida[campo.nombre])
+                elif valor is None:
+                    salida[campo.nombre] = None
+                else:
+                    salida[campo.nombre] = {}
+                    filas_hijas.append(valor)
+                    salidas_hijas.append(salida[campo.nombre])
+            if filas_hijas:
+                nivel.append((relacion.tipo, filas_hijas, salidas_hijas, campo.hijos))
+    return datos, cargadores.lotes
@@ -0,0 +1,143 @@
+"""Particionado mensual por rango de Mensaje y Notificacion (solo PostgreSQL).
+
+Cada tabla se divide en particiones ``<tabla>_pAAAAMM`` sobre su columna de
+fecha, más una partición por defecto que debería quedar siempre vacía. En
+otros motores (SQLite en los tests) todas las operaciones son no-ops.
+"""
+import gzip
+import re
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import Mensaje, Notificacion
+
+SUFIJO_DEFECTO = 'pdefault'
+PATRON_PARTICION = re.compile(r'_p(\d{4})(\d{2})$')
+
+def tablas_particionadas():
+    """Devuelve {tabla: (columna de fecha, meses de retención)}."""
+    return {
+        Mensaje._meta.db_table: ('fecha_hora', settings.RETENCION_MENSAJES_MESES),
+        Notificacion._meta.db_table: ('fecha', settings.RETENCION_NOTIFICACIONES_MESES),
+    }
+
+def soportado(connection):
+    return connection.vendor == 'postgresql'
+
+def inicio_mes(fecha):
+    return date(fecha.year, fecha.month, 1)
+
+def sumar_meses(fecha, meses):
+    indice = fecha.year * 12 + fecha.month - 1 + meses
+    return date(indice // 12, indice % 12 + 1, 1)
+
+def nombre_particion(tabla, mes):
+    return f'{tabla}_p{mes:%Y%m}'
+
+def mes_de_particion(nombre):
+    """Extrae el primer día del mes de un nombre ``<tabla>_pAAAAMM`` (None si no encaja)."""
+    coincidencia = PATRON_PARTICION.search(nombre)
+    if not coincidencia:
+        return None
+    return date(int(coincidencia.group(1)), int(coincidencia.group(2)), 1)
+
+def sql_crear_particion(tabla, mes):
+    siguiente = sumar_meses(mes, 1)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{nombre_particion(tabla, mes)}" PARTITION OF "{tabla}" '
+        f"FOR VALUES FROM ('{mes:%Y-%m-%d}') TO ('{siguiente:%Y-%m-%d}')"
+    )
+
+def particiones_caducadas(nombres, hoy, meses_retencion):
+    """Particiones cuyo mes completo queda fuera de la ventana de retención."""
+    limite = sumar_meses(inicio_mes(hoy), -meses_retencion)
+    return sorted(
+        nombre for nombre in nombres
+        if mes_de_particion(nombre) is not None and sumar_meses(mes_de_particion(nombre), 1) <= limite
+    )
+
+def esta_particionada(cursor, tabla):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [tabla]
+    )
+    return cursor.fetchone() is not None
+
+def particiones_existentes(cursor, tabla):
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = %s::regclass",
+        [tabla]
+    )
+    return [fila[0] for fila in cursor.fetchall()]
+
+def convertir_tabla(cursor, tabla, columna, meses_futuros, hoy):
+    """Convierte una tabla normal en particionada copiando sus filas.
+
+    Se ejecuta dentro de la transacción del llamador: si algo falla, la tabla
+    original queda intacta. Abre un mes por cada mes con datos más los futuros.
+    """
+    cursor.execute(
+        "SELECT 1 FROM pg_constraint WHERE confrelid = %s::regclass AND contype = 'f'", [tabla]
+    )
+    if cursor.fetchone():
+        raise ValueError(f'{tabla} es referenciada por claves foráneas y no puede particionarse.')
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+        "WHERE indrelid = %s::regclass AND NOT indisprimary AND NOT indisunique",
+        [tabla]
+    )
+    indices = [fila[0] for fila in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [tabla]
+    )
+    claves_foraneas = cursor.fetchall()
+    cursor.execute(f'SELECT MIN("{columna}"), MAX("{columna}") FROM "{tabla}"')
+    minimo, maximo = cursor.fetchone()
+
+    antigua = f'{tabla}_antigua'
+    cursor.execute(f'ALTER TABLE "{tabla}" RENAME TO "{antigua}"')
+    cursor.execute(
+        f'CREATE TABLE "{tabla}" (LIKE "{antigua}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+        f'INCLUDING CONSTRAINTS INCLUDING STORAGE) PARTITION BY RANGE ("{columna}")'
+    )
+    cursor.execute(f'ALTER TABLE "{tabla}" ADD PRIMARY KEY ("id", "{columna}")')
+    primero = inicio_mes(minimo) if minimo else inicio_mes(hoy)
+    ultimo = sumar_meses(inicio_mes(max(maximo.date(), hoy) if maximo else hoy), meses_futuros)
+    mes = primero
+    while mes <= ultimo:
+        cursor.execute(sql_crear_particion(tabla, mes))
+        mes = sumar_meses(mes, 1)
+    cursor.execute(f'CREATE TABLE "{tabla}_{SUFIJO_DEFECTO}" PARTITION OF "{tabla}" DEFAULT')
+    cursor.execute(f'INSERT INTO "{tabla}" SELECT * FROM "{antigua}"')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{tabla}\"', 'id'), COALESCE(MAX(id), 0) + 1, false) FROM \"{tabla}\""
+    )
+    cursor.execute(f'DROP TABLE "{antigua}"')
+    for indice in indices:
+        cursor.execute(indice)
+    for nombre, definicion in claves_foraneas:
+        cursor.execute(f'ALTER TABLE "{tabla}" ADD CONSTRAINT "{nombre}" {definicion}')
+
+def archivar_particion(cursor, tabla, particion, directorio):
+    """Desvincula la partición, vuelca sus filas a CSV comprimido y la elimina."""
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    destino = directorio / f'{particion}.csv.gz'
+    cursor.execute(f'ALTER TABLE "{tabla}" DETACH PARTITION "{particion}"')
+    consulta = f'COPY "{particion}" TO STDOUT WITH (FORMAT csv, HEADER)'
+    cursor_crudo = cursor.cursor
+    with gzip.open(destino, 'wb') as archivo:
+        if hasattr(cursor_crudo, 'copy_expert'):  # psycopg2
+            cursor_crudo.copy_expert(consulta, archivo)
+        else:  # psycopg 3
+            with cursor_crudo.copy(consulta) as copia:
+                for bloque in copia:
+                    archivo.write(bloque)
+    cursor.execute(f'DROP TABLE "{particion}"')
+    return destino
@@ -0,0 +1,77 @@
+"""Perfilado bajo demanda de peticiones individuales (solo personal staff).
+
+Una petición se perfila cuando lleva un token firmado en ``?_perfilar=`` o en
+la cabecera ``X-Perfilar``. El perfil se guarda en PERFILADO_DIRECTORIO y
+solo se conservan los PERFILADO_MAX_ARCHIVOS más recientes.
+"""
+import pstats
+import re
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+SAL = 'core.perfilado'
+EXTENSIONES = ('.prof', '.txt')
+
+def generar_token(usuario):
+    """Token firmado y con caducidad que habilita el perfilado para ese usuario."""
+    return signing.TimestampSigner(salt=SAL).sign(str(usuario.pk))
+
+def token_valido(token, usuario):
+    try:
+        valor = signing.TimestampSigner(salt=SAL).unsign(token, max_age=settings.PERFILADO_VALIDEZ_TOKEN)
+    except signing.BadSignature:
+        return False
+    return valor == str(usuario.pk)
+
+def _directorio():
+    directorio = Path(settings.PERFILADO_DIRECTORIO)
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+def ruta_nuevo_perfil(request, duracion, extension):
+    """Nombre con marca de tiempo, vista y duración para poder ordenarlos y reconocerlos."""
+    vista = request.resolver_match.url_name if request.resolver_match else None
+    vista = re.sub(r'[^A-Za-z0-9_-]+', '-', vista or request.path).strip('-') or 'raiz'
+    return _directorio() / f'{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10**6:06d}_{vista}_{duracion * 1000:.0f}ms{extension}'
+
+def aplicar_retencion():
+    """Borra los perfiles más antiguos por encima del máximo configurado."""
+    perfiles = listar_perfiles()
+    for ruta in perfiles[settings.PERFILADO_MAX_ARCHIVOS:]:
+        ruta.unlink(missing_ok=True)
+
+def listar_perfiles():
+    """Perfiles guardados, el más reciente primero."""
+    directorio = Path(settings.PERFILADO_DIRECTORIO)
+    if not directorio.exists():
+        return []
+    return sorted(
+        (ruta for ruta in directorio.iterdir() if ruta.suffix in EXTENSIONES),
+        key=lambda ruta: ruta.name,
+        reverse=True
+    )
+
+def obtener_perfil(nombre):
+    """Ruta de un perfil por su nombre, sin permitir salir del directorio."""
+    for ruta in listar_perfiles():
+        if ruta.name == nombre:
+            return ruta
+    return None
+
+def resumen(ruta, limite=20):
+    """Las `limite` funciones con más tiempo acumulado de un perfil cProfile."""
+    estadisticas = pstats.Stats(str(ruta))
+    filas = [
+        {
+            'funcion': f'{archivo}:{linea}({funcion})',
+            'llamadas': llamadas,
+            'tiempo_propio': tiempo_propio,
+            'tiempo_acumulado': tiempo_acumulado,
+        }
+        for (archivo, linea, funcion), (_, llamadas, tiempo_propio, tiempo_acumulado, _) in estadisticas.stats.items()
+    ]
+    filas.sort(key=lambda fila: fila['tiempo_acumulado'], reverse=True)
+    return {'tiempo_total': estadisticas.total_tt, 'funciones': filas[:limite]}
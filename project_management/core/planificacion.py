@@ -0,0 +1,300 @@
+"""Planificación por ruta crítica (CPM) de las tareas de un proyecto.
+
+``tarea.dependencias`` son las tareas que bloquean a ``tarea``: forman un grafo
+dirigido que debe ser acíclico. El cálculo completo es lineal en tareas y
+aristas (orden topológico de Kahn más una pasada hacia delante y otra hacia
+atrás). Los días se cuentan desde el inicio del proyecto.
+
+El resultado se cachea por proyecto y versión en la caché CACHE_COMPARTIDA,
+para que todos los workers vean cada cambio, y las señales de
+``core.signals`` se lo aplican de forma incremental bajo la versión
+siguiente, recorriendo solo las tareas afectadas. Quien cree tareas o
+dependencias con ``bulk_create`` debe llamar a ``invalidar(proyecto_id)``,
+porque no se emiten señales.
+"""
+import heapq
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import metricas
+from .models import Tarea
+
+PREFIJO = 'core:planificacion'
+TIEMPO_CACHE = 60 * 60  # Las entradas de versiones antiguas caducan solas en una hora
+
+class CicloError(ValueError):
+    """Las dependencias forman un ciclo, así que no existe orden topológico."""
+
+class Planificacion:
+    """Inicio/fin temprano y tardío y holgura de cada tarea de un proyecto."""
+
+    def __init__(self, duraciones, aristas):
+        """`duraciones` son pares (tarea_id, días); `aristas`, pares (bloqueante_id, tarea_id)."""
+        self.duraciones = dict(duraciones)
+        self.sucesores = {tarea: set() for tarea in self.duraciones}
+        self.predecesores = {tarea: set() for tarea in self.duraciones}
+        for bloqueante, tarea in aristas:
+            self.sucesores[bloqueante].add(tarea)
+            self.predecesores[tarea].add(bloqueante)
+        self.recalcular()
+
+    # Consultas
+
+    def fin_temprano(self, tarea):
+        return self.inicio_temprano[tarea] + self.duraciones[tarea]
+
+    def inicio_tardio(self, tarea):
+        return self.fin_tardio[tarea] - self.duraciones[tarea]
+
+    def holgura(self, tarea):
+        return self.fin_tardio[tarea] - self.fin_temprano(tarea)
+
+    def filas(self):
+        """Una fila por tarea, ordenadas por inicio temprano (estable según el orden topológico)."""
+        return [
+            {
+                'id': tarea,
+                'inicio_temprano': self.inicio_temprano[tarea],
+                'fin_temprano': self.fin_temprano(tarea),
+                'inicio_tardio': self.inicio_tardio(tarea),
+                'fin_tardio': self.fin_tardio[tarea],
+                'holgura': self.holgura(tarea),
+            }
+            for tarea in sorted(self.orden, key=self.inicio_temprano.__getitem__)
+        ]
+
+    def ruta_critica(self):
+        """Tareas sin holgura, en orden de inicio."""
+        return [fila['id'] for fila in self.filas() if fila['holgura'] == 0]
+
+    def crearia_ciclo(self, tarea, bloqueantes):
+        """True si hacer que `bloqueantes` bloqueen a `tarea` cerraría un ciclo."""
+        return _alcanza(self.sucesores, tarea, bloqueantes)
+
+    # Cálculo completo
+
+    def recalcular(self):
+        grados = {tarea: len(predecesores) for tarea, predecesores in self.predecesores.items()}
+        pendientes = deque(sorted(tarea for tarea, grado in grados.items() if grado == 0))
+        orden = []
+        while pendientes:
+            tarea = pendientes.popleft()
+            orden.append(tarea)
+            for sucesora in self.sucesores[tarea]:
+                grados[sucesora] -= 1
+                if grados[sucesora] == 0:
+                    pendientes.append(sucesora)
+        if len(orden) != len(self.duraciones):
+            raise CicloError('Las dependencias de las tareas forman un ciclo.')
+        self.orden = orden
+        # Las posiciones solo necesitan respetar el orden relativo, no ser consecutivas
+        self.posicion = {tarea: indice for indice, tarea in enumerate(orden)}
+        self.inicio_temprano = {}
+        for tarea in orden:
+            self.inicio_temprano[tarea] = max(
+                (self.fin_temprano(predecesora) for predecesora in self.predecesores[tarea]), default=0
+            )
+        self.duracion_total = max((self.fin_temprano(tarea) for tarea in orden), default=0)
+        self._pasada_atras()
+
+    def _pasada_atras(self):
+        self.fin_tardio = {}
+        for tarea in reversed(self.orden):
+            self.fin_tardio[tarea] = self._calcular_fin_tardio(tarea)
+
+    def _calcular_fin_tardio(self, tarea):
+        return min(
+            (self.inicio_tardio(sucesora) for sucesora in self.sucesores[tarea]), default=self.duracion_total
+        )
+
+    # Cambios incrementales
+
+    def _propagar(self, hacia_delante, hacia_atras):
+        """Reajusta solo las tareas alcanzables desde las de origen.
+
+        Hacia delante se avanza en orden topológico y hacia atrás en el inverso,
+        así cada tarea se recalcula una vez con sus vecinas ya al día. Si cambia
+        la duración del proyecto, todas las fechas tardías se mueven y se hace
+        la pasada hacia atrás completa.
+        """
+        self._propagar_en_orden(
+            hacia_delante, 1, self.sucesores,
+            lambda tarea: max(
+                (self.fin_temprano(predecesora) for predecesora in self.predecesores[tarea]), default=0
+            ),
+            self.inicio_temprano
+        )
+        duracion_total = max((self.fin_temprano(tarea) for tarea in self.orden), default=0)
+        if duracion_total != self.duracion_total:
+            self.duracion_total = duracion_total
+            self._pasada_atras()
+            return
+        self._propagar_en_orden(hacia_atras, -1, self.predecesores, self._calcular_fin_tardio, self.fin_tardio)
+
+    def _propagar_en_orden(self, origenes, sentido, vecinas, calcular, valores):
+        origenes = {tarea for tarea in origenes if tarea in self.posicion}
+        monticulo = [(sentido * self.posicion[tarea], tarea) for tarea in origenes]
+        heapq.heapify(monticulo)
+        vistas = set()
+        while monticulo:
+            _, tarea = heapq.heappop(monticulo)
+            if tarea in vistas:
+                continue
+            vistas.add(tarea)
+            anterior = valores.get(tarea)
+            valores[tarea] = calcular(tarea)
+            # En los orígenes cambió la duración o una arista aunque su valor no cambie
+            if valores[tarea] != anterior or tarea in origenes:
+                for vecina in vecinas[tarea]:
+                    heapq.heappush(monticulo, (sentido * self.posicion[vecina], vecina))
+
+    def agregar_tarea(self, tarea, duracion):
+        if tarea in self.duraciones:
+            return self.cambiar_duracion(tarea, duracion)
+        self.duraciones[tarea] = duracion
+        self.sucesores[tarea] = set()
+        self.predecesores[tarea] = set()
+        self.posicion[tarea] = self.posicion[self.orden[-1]] + 1 if self.orden else 0
+        self.orden.append(tarea)
+        self._propagar({tarea}, {tarea})
+
+    def cambiar_duracion(self, tarea, duracion):
+        if self.duraciones[tarea] == duracion:
+            return
+        self.duraciones[tarea] = duracion
+        self._propagar({tarea}, {tarea})
+
+    def quitar_tarea(self, tarea):
+        if tarea not in self.duraciones:
+            return
+        sucesoras, predecesoras = self.sucesores.pop(tarea), self.predecesores.pop(tarea)
+        for sucesora in sucesoras:
+            self.predecesores[sucesora].discard(tarea)
+        for predecesora in predecesoras:
+            self.sucesores[predecesora].discard(tarea)
+        del self.duraciones[tarea], self.posicion[tarea], self.inicio_temprano[tarea], self.fin_tardio[tarea]
+        self.orden.remove(tarea)
+        self._propagar(sucesoras, predecesoras)
+
+    def agregar_dependencia(self, bloqueante, tarea):
+        if bloqueante in self.predecesores[tarea]:
+            return
+        if self.crearia_ciclo(tarea, [bloqueante]):
+            raise CicloError(f'La tarea {bloqueante} ya depende de la tarea {tarea}.')
+        self.sucesores[bloqueante].add(tarea)
+        self.predecesores[tarea].add(bloqueante)
+        if self.posicion[bloqueante] < self.posicion[tarea]:
+            self._propagar({tarea}, {bloqueante})
+        else:
+            self.recalcular()  # La arista invierte el orden topológico actual
+
+    def quitar_dependencia(self, bloqueante, tarea):
+        if bloqueante not in self.predecesores.get(tarea, ()):
+            return
+        self.sucesores[bloqueante].discard(tarea)
+        self.predecesores[tarea].discard(bloqueante)
+        self._propagar({tarea}, {bloqueante})
+
+def _alcanza(sucesores, tarea, bloqueantes):
+    """True si alguna de `bloqueantes` es `tarea` o se alcanza desde ella siguiendo `sucesores`."""
+    bloqueantes = set(bloqueantes)
+    if tarea in bloqueantes:
+        return True
+    if tarea not in sucesores:
+        return False  # Tarea nueva: aún nada depende de ella
+    visitadas, pendientes = {tarea}, [tarea]
+    while pendientes:
+        for sucesora in sucesores.get(pendientes.pop(), ()):
+            if sucesora in bloqueantes:
+                return True
+            if sucesora not in visitadas:
+                visitadas.add(sucesora)
+                pendientes.append(sucesora)
+    return False
+
+def _cache():
+    return caches[settings.CACHE_COMPARTIDA]
+
+def _clave_version(proyecto_id):
+    return f'{PREFIJO}:version:{proyecto_id}'
+
+def _clave(proyecto_id, version):
+    return f'{PREFIJO}:{proyecto_id}:{version}'
+
+def calcular(proyecto_id):
+    """Planificación del proyecto desde la base de datos (dos consultas)."""
+    relacion = Tarea.dependencias.through
+    return Planificacion(
+        Tarea.objects.filter(proyecto_id=proyecto_id).values_list('id', 'duracion_dias'),
+        relacion.objects.filter(
+            from_tarea__proyecto_id=proyecto_id, to_tarea__proyecto_id=proyecto_id
+        ).values_list('to_tarea_id', 'from_tarea_id')
+    )
+
+def crearia_ciclo(proyecto_id, tarea_id, bloqueantes):
+    """Como Planificacion.crearia_ciclo, pero con las dependencias de la base de datos.
+
+    No depende de la caché ni exige que el resto del grafo sea acíclico. Dentro
+    de la transacción que guarda la tarea, después de Tarea.save, la fila del
+    proyecto ya está bloqueada: dos ediciones simultáneas se comprueban una
+    tras otra y la segunda ve las dependencias de la primera.
+    """
+    sucesores = {}
+    relacion = Tarea.dependencias.through
+    for bloqueante, tarea in relacion.objects.filter(
+        from_tarea__proyecto_id=proyecto_id, to_tarea__proyecto_id=proyecto_id
+    ).values_list('to_tarea_id', 'from_tarea_id'):
+        sucesores.setdefault(bloqueante, set()).add(tarea)
+    return _alcanza(sucesores, tarea_id, bloqueantes)
+
+def _version(proyecto_id):
+    """Versión actual de la planificación del proyecto en la caché compartida."""
+    clave = _clave_version(proyecto_id)
+    version = _cache().get(clave)
+    if version is None:
+        # Se parte de una marca de tiempo para no reutilizar versiones si la clave se pierde
+        _cache().add(clave, time.time_ns(), None)
+        version = _cache().get(clave)
+    return version
+
+def obtener(proyecto_id):
+    """Planificación cacheada del proyecto, calculándola si no está en caché."""
+    # La versión se lee antes que la base de datos: si un cambio se confirma
+    # entretanto, lo calculado queda bajo una versión que ya nadie pedirá
+    clave = _clave(proyecto_id, _version(proyecto_id))
+    planificacion = metricas.registrar_cache('planificacion', _cache().get(clave))
+    if planificacion is None:
+        planificacion = calcular(proyecto_id)
+        _cache().set(clave, planificacion, TIEMPO_CACHE)
+    return planificacion
+
+def actualizar(proyecto_id, operacion, *args):
+    """Aplica un cambio a la planificación cacheada, si la hay, sin recalcularla entera.
+
+    El resultado se guarda bajo la versión siguiente solo si nadie más la ha
+    incrementado a la vez; si no, esa versión se queda sin entrada y se
+    recalculará al pedirla, en lugar de pisar el cambio del otro worker.
+    """
+    version = _cache().get(_clave_version(proyecto_id))
+    planificacion = None if version is None else _cache().get(_clave(proyecto_id, version))
+    nueva = invalidar(proyecto_id)
+    if planificacion is None or nueva != version + 1:
+        return
+    try:
+        getattr(planificacion, operacion)(*args)
+    except (KeyError, CicloError):
+        # La copia cacheada no cuadra con la base de datos: se recalculará al pedirla
+        return
+    _cache().set(_clave(proyecto_id, nueva), planificacion, TIEMPO_CACHE)
+
+def invalidar(proyecto_id):
+    """Incrementa la versión del proyecto para descartar su planificación cacheada; devuelve la nueva."""
+    clave = _clave_version(proyecto_id)
+    try:
+        return _cache().incr(clave)
+    except ValueError:
+        _cache().add(clave, time.time_ns(), None)
+        return None
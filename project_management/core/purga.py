@@ -0,0 +1,114 @@
+"""Borrado en segundo plano de proyectos eliminados.
+
+``eliminar`` solo marca el proyecto (Proyecto.eliminado_en), que desde ese
+momento deja de aparecer en Proyecto.objects, y registra su PurgaProyecto. El
+comando ``purgar_proyectos`` recorre después PASOS en orden de dependencias con
+sentencias DELETE (o UPDATE) de tamaño fijo, sin cargar objetos en memoria
+como haría el collector de ``Model.delete()``. Cada lote se confirma junto con
+el progreso, así que una purga interrumpida continúa donde se quedó.
+"""
+import time
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import opciones, planificacion
+from .models import (
+    Actividad, Comentario, Grupo, Mensaje, Notificacion, PerfilProyecto, Proyecto, PurgaProyecto,
+    RecordatorioEnviado, Tarea, TareaEliminada
+)
+
+TAMANO_LOTE = 5000
+
+def _tabla(modelo):
+    return connection.ops.quote_name(modelo._meta.db_table)
+
+def _pasos():
+    """(nombre, modelo, condición, asignación) de cada paso; sin asignación el paso borra."""
+    tareas = f'SELECT id FROM {_tabla(Tarea)} WHERE proyecto_id = %(proyecto)s'
+    grupos = f'SELECT id FROM {_tabla(Grupo)} WHERE proyecto_id = %(proyecto)s'
+    return [
+        ('comentarios', Comentario, f'tarea_id IN ({tareas})', None),
+        ('recordatorios', RecordatorioEnviado, f'tarea_id IN ({tareas})', None),
+        ('asignaciones', Tarea.usuarios_asignados.through, f'tarea_id IN ({tareas})', None),
+        (
+            'dependencias', Tarea.dependencias.through,
+            f'from_tarea_id IN ({tareas}) OR to_tarea_id IN ({tareas})', None
+        ),
+        ('tareas', Tarea, 'proyecto_id = %(proyecto)s', None),
+        ('tareas_eliminadas', TareaEliminada, 'proyecto_id = %(proyecto)s', None),
+        ('notificaciones', Notificacion, 'proyecto_id = %(proyecto)s', None),
+        ('mensajes', Mensaje, 'proyecto_id = %(proyecto)s', None),
+        ('actividad', Actividad, 'proyecto_id = %(proyecto)s', None),
+        ('perfiles', PerfilProyecto, 'proyecto_id = %(proyecto)s', None),
+        # Perfiles de otros proyectos que apuntan a un grupo de este (on_delete=SET_NULL)
+        ('perfiles_de_grupos', PerfilProyecto, f'grupo_id IN ({grupos})', 'grupo_id = NULL'),
+        ('grupos', Grupo, 'proyecto_id = %(proyecto)s', None),
+    ]
+
+PASOS = [nombre for nombre, *_ in _pasos()]
+
+def eliminar(proyecto, usuario):
+    """Oculta el proyecto y encarga su purga; devuelve la PurgaProyecto."""
+    with transaction.atomic():
+        proyecto.eliminado_en = timezone.now()
+        proyecto.save(update_fields=['eliminado_en'])
+        purga = PurgaProyecto.objects.create(
+            proyecto_id=proyecto.pk, titulo=proyecto.titulo, solicitada_por=usuario
+        )
+        # Sus grupos desaparecen de las opciones de los formularios
+        transaction.on_commit(partial(opciones.invalidar, 'global'))
+    return purga
+
+def _lote(paso, proyecto_id, tamano):
+    """Ejecuta un lote del paso y devuelve las filas afectadas."""
+    _, modelo, condicion, asignacion = _pasos()[paso]
+    tabla = _tabla(modelo)
+    seleccion = f'SELECT id FROM {tabla} WHERE {condicion} LIMIT %(lote)s'
+    if asignacion is None:
+        sql = f'DELETE FROM {tabla} WHERE id IN ({seleccion})'
+    else:
+        sql = f'UPDATE {tabla} SET {asignacion} WHERE id IN ({seleccion})'
+    with connection.cursor() as cursor:
+        cursor.execute(sql, {'proyecto': proyecto_id, 'lote': tamano})
+        return cursor.rowcount
+
+def purgar(purga, tamano_lote=TAMANO_LOTE, pausa=0, progreso=None):
+    """Avanza la purga desde su paso actual hasta terminarla.
+
+    `progreso`, si se indica, recibe (nombre del paso, filas del paso) al
+    completar cada paso.
+    """
+    num_pasos = len(PASOS)
+    while purga.paso < num_pasos:
+        filas_paso = 0
+        while True:
+            with transaction.atomic():
+                filas = _lote(purga.paso, purga.proyecto_id, tamano_lote)
+                terminado = filas < tamano_lote
+                PurgaProyecto.objects.filter(pk=purga.pk).update(
+                    paso=purga.paso + terminado, filas_borradas=F('filas_borradas') + filas
+                )
+            filas_paso += filas
+            purga.filas_borradas += filas
+            if terminado:
+                break
+            if pausa:
+                time.sleep(pausa)
+        if progreso:
+            progreso(PASOS[purga.paso], filas_paso)
+        purga.paso += 1
+
+    with transaction.atomic():
+        Proyecto.todos.filter(pk=purga.proyecto_id).delete()
+        purga.terminada_en = timezone.now()
+        purga.save(update_fields=['terminada_en'])
+        for ambito in ('global', 'grupos', f'proyecto:{purga.proyecto_id}'):
+            transaction.on_commit(partial(opciones.invalidar, ambito))
+        transaction.on_commit(partial(planificacion.invalidar, purga.proyecto_id))
+    return purga
+
+def pendientes():
+    return PurgaProyecto.objects.filter(terminada_en__isnull=True)
@@ -0,0 +1,82 @@
+"""Recordatorios de tareas que vencen pronto o ya han vencido.
+
+Cada pasada recorre, con una consulta por rango sobre el índice parcial
+``tarea_abierta_limite_idx``, las asignaciones de tareas abiertas cuya fecha
+límite cae entre hace DIAS_RECORDATORIO_VENCIDAS días y dentro de
+DIAS_AVISO_RECORDATORIO días. Se procesan por lotes: los ya enviados se
+descartan con la clave única de RecordatorioEnviado y el resto se inserta con
+``bulk_create`` junto a su Notificacion.
+"""
+import time
+from datetime import datetime, time as hora, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import lotes
+from .models import EjecucionRecordatorios, Notificacion, RecordatorioEnviado, Tarea
+
+TAMANO_LOTE = 2000
+
+def _debido_desde(tipo, fecha_limite, dias_aviso):
+    """Momento en que el recordatorio pasó a deberse, para medir el retraso."""
+    dia = fecha_limite + timedelta(days=1) if tipo == 'vencida' else fecha_limite - timedelta(days=dias_aviso)
+    return timezone.make_aware(datetime.combine(dia, hora.min))
+
+def _texto(tipo, titulo, proyecto, fecha_limite):
+    if tipo == 'vencida':
+        return f"La tarea '{titulo}' del proyecto '{proyecto}' venció el {fecha_limite:%d/%m/%Y}"
+    return f"La tarea '{titulo}' del proyecto '{proyecto}' vence el {fecha_limite:%d/%m/%Y}"
+
+def ejecutar(dias_aviso, dias_vencidas, tamano_lote=TAMANO_LOTE, ahora=None):
+    """Una pasada completa; guarda y devuelve su EjecucionRecordatorios."""
+    ahora = ahora or timezone.now()
+    hoy = timezone.localdate(ahora)
+    inicio = time.perf_counter()
+    revisadas = enviados = duplicados = 0
+    retraso_total = retraso_max = 0.0
+
+    asignaciones = Tarea.usuarios_asignados.through.objects.filter(
+        tarea__fecha_limite__gte=hoy - timedelta(days=dias_vencidas),
+        tarea__fecha_limite__lte=hoy + timedelta(days=dias_aviso),
+        tarea__proyecto__eliminado_en__isnull=True,
+    ).exclude(tarea__estado='completada').values_list(
+        'tarea_id', 'user_id', 'tarea__fecha_limite', 'tarea__titulo',
+        'tarea__proyecto_id', 'tarea__proyecto__titulo'
+    ).iterator(chunk_size=tamano_lote)
+
+    for lote in lotes.partir(asignaciones, tamano_lote):
+        revisadas += len(lote)
+        enviados_antes = set(RecordatorioEnviado.objects.filter(
+            tarea_id__in={fila[0] for fila in lote}
+        ).values_list('tarea_id', 'usuario_id', 'tipo', 'fecha_limite'))
+        recordatorios, notificaciones = [], []
+        for tarea_id, usuario_id, fecha_limite, titulo, proyecto_id, proyecto in lote:
+            tipo = 'vencida' if fecha_limite < hoy else 'proxima'
+            if (tarea_id, usuario_id, tipo, fecha_limite) in enviados_antes:
+                duplicados += 1
+                continue
+            recordatorios.append(RecordatorioEnviado(
+                tarea_id=tarea_id, usuario_id=usuario_id, tipo=tipo, fecha_limite=fecha_limite
+            ))
+            notificaciones.append(Notificacion(
+                usuario_id=usuario_id, proyecto_id=proyecto_id, mensaje=_texto(tipo, titulo, proyecto, fecha_limite)
+            ))
+            retraso = max((ahora - _debido_desde(tipo, fecha_limite, dias_aviso)).total_seconds(), 0)
+            retraso_total += retraso
+            retraso_max = max(retraso_max, retraso)
+        if recordatorios:
+            with transaction.atomic():
+                RecordatorioEnviado.objects.bulk_create(recordatorios)
+                Notificacion.objects.bulk_create(notificaciones)
+            enviados += len(recordatorios)
+
+    return EjecucionRecordatorios.objects.create(
+        inicio=ahora,
+        duracion_ms=round((time.perf_counter() - inicio) * 1000),
+        asignaciones_revisadas=revisadas,
+        recordatorios_enviados=enviados,
+        duplicados_omitidos=duplicados,
+        retraso_medio_s=retraso_total / enviados if enviados else 0,
+        retraso_max_s=retraso_max,
+    )
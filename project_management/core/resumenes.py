@@ -0,0 +1,93 @@
+"""Resúmenes por correo de las notificaciones sin leer.
+
+Cada pasada lee con una sola consulta en streaming, ordenada por usuario, las
+notificaciones sin leer posteriores al último resumen de cada usuario
+(ResumenEnviado). Cada usuario recibe un correo con la plantilla
+``core/correo_resumen.txt``, que se compila una vez por pasada. Los correos se
+envían por lotes sobre una única conexión SMTP abierta durante toda la pasada.
+Tras enviar cada lote se guarda hasta qué notificación llega el resumen de
+cada usuario. Si la pasada se corta entre el envío y ese guardado, los
+correos de ese lote se repiten en la siguiente, pero nunca se pierde un aviso.
+"""
+import time
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F
+from django.db.models.functions import Coalesce
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import EjecucionResumenes, Notificacion, ResumenEnviado
+
+TAMANO_LOTE = 500
+
+def pendientes():
+    """(usuario_id, username, email, id, mensaje, fecha, contador, proyecto) ordenadas por usuario e id."""
+    return Notificacion.objects.filter(
+        leida=False, usuario__is_active=True
+    ).exclude(usuario__email='').alias(
+        desde=Coalesce('usuario__resumen_enviado__ultima_notificacion_id', 0)
+    ).filter(id__gt=F('desde')).order_by('usuario_id', 'id').values_list(
+        'usuario_id', 'usuario__username', 'usuario__email', 'id', 'mensaje', 'fecha', 'contador',
+        'proyecto__titulo'
+    )
+
+def _enviar_lote(conexion, correos, marcas):
+    conexion.send_messages(correos)
+    ResumenEnviado.objects.bulk_create(
+        marcas, update_conflicts=True, unique_fields=['usuario'],
+        update_fields=['ultima_notificacion_id', 'enviado_en']
+    )
+
+def enviar(tamano_lote=TAMANO_LOTE, maximo=None, conexion=None, ahora=None):
+    """Una pasada completa; guarda y devuelve su EjecucionResumenes.
+
+    `maximo` limita las notificaciones listadas en cada correo (las demás solo
+    se cuentan) y `conexion` permite usar un backend de correo distinto del
+    configurado.
+    """
+    ahora = ahora or timezone.now()
+    maximo = maximo or settings.RESUMEN_MAX_NOTIFICACIONES
+    inicio = time.perf_counter()
+    plantilla = get_template('core/correo_resumen.txt')
+    conexion = conexion or get_connection()
+    total_notificaciones = enviados = lotes = 0
+    correos, marcas = [], []
+
+    with conexion:
+        for usuario_id, filas in groupby(pendientes().iterator(chunk_size=tamano_lote), key=itemgetter(0)):
+            listadas, total = [], 0
+            for _, username, email, notificacion_id, mensaje, fecha, contador, proyecto in filas:
+                total += 1
+                if len(listadas) < maximo:
+                    listadas.append({'mensaje': mensaje, 'fecha': fecha, 'contador': contador, 'proyecto': proyecto})
+            total_notificaciones += total
+            cuerpo = plantilla.render({
+                'username': username, 'notificaciones': listadas, 'total': total, 'restantes': total - len(listadas),
+            })
+            asunto = f"Tienes {total} notificación sin leer" if total == 1 else f"Tienes {total} notificaciones sin leer"
+            correos.append(EmailMessage(asunto, cuerpo, to=[email], connection=conexion))
+            # `notificacion_id` es el de la última fila del grupo: el orden es por id
+            marcas.append(ResumenEnviado(
+                usuario_id=usuario_id, ultima_notificacion_id=notificacion_id, enviado_en=ahora
+            ))
+            if len(correos) >= tamano_lote:
+                _enviar_lote(conexion, correos, marcas)
+                enviados += len(correos)
+                lotes += 1
+                correos, marcas = [], []
+        if correos:
+            _enviar_lote(conexion, correos, marcas)
+            enviados += len(correos)
+            lotes += 1
+
+    return EjecucionResumenes.objects.create(
+        inicio=ahora,
+        duracion_ms=round((time.perf_counter() - inicio) * 1000),
+        notificaciones=total_notificaciones,
+        correos_enviados=enviados,
+        lotes=lotes,
+    )
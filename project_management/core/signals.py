@@ -0,0 +1,110 @@
+from functools import partial
+
+from axes.signals import user_locked_out
+from django.contrib.auth.signals import user_login_failed
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from . import metricas, opciones, planificacion
+from .models import Grupo, Mensaje, PerfilProyecto, Proyecto, Tarea, TareaEliminada, User, siguiente_version_tareas
+
+@receiver([post_save, post_delete], sender=Grupo)
+def invalidar_opciones_grupo(sender, instance, **kwargs):
+    """Un grupo creado, renombrado o movido de proyecto cambia todas las opciones."""
+    opciones.invalidar('global')
+
+@receiver([post_save, post_delete], sender=User)
+def invalidar_opciones_usuario(sender, instance, update_fields=None, **kwargs):
+    """Invalida las opciones cuando cambia un usuario, salvo en el login."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    opciones.invalidar('global')
+
+@receiver([post_save, post_delete], sender=PerfilProyecto)
+def invalidar_opciones_perfil(sender, instance, **kwargs):
+    """Invalida los usuarios asignables del proyecto del grupo y del perfil."""
+    proyecto_grupo = Grupo.objects.filter(
+        id=instance.grupo_id
+    ).values_list('proyecto_id', flat=True).first()
+    for proyecto_id in {proyecto_grupo, instance.proyecto_id}:
+        if proyecto_id:
+            opciones.invalidar(f'proyecto:{proyecto_id}')
+    opciones.invalidar('grupos')
+
+@receiver([post_save, post_delete], sender=Proyecto)
+def invalidar_listado_grupos(sender, instance, **kwargs):
+    """El listado de grupos muestra el título del proyecto de cada grupo."""
+    opciones.invalidar('grupos')
+
+@receiver(m2m_changed, sender=Grupo.miembros.through)
+def invalidar_opciones_miembros(sender, instance, action, reverse, **kwargs):
+    """Cubre grupo.miembros.add/remove/clear, que no emiten post_save."""
+    if not action.startswith('post_'):
+        return
+    if not reverse and instance.proyecto_id:
+        opciones.invalidar(f'proyecto:{instance.proyecto_id}')
+    else:
+        opciones.invalidar('global')
+
+def _actualizar_planificacion(proyecto_id, operacion, *args):
+    """Aplica el cambio a la planificación cacheada solo si la transacción se confirma."""
+    transaction.on_commit(partial(planificacion.actualizar, proyecto_id, operacion, *args))
+
+@receiver(post_save, sender=Tarea)
+def planificacion_tarea_guardada(sender, instance, created, **kwargs):
+    operacion = 'agregar_tarea' if created else 'cambiar_duracion'
+    _actualizar_planificacion(instance.proyecto_id, operacion, instance.id, instance.duracion_dias)
+
+@receiver(post_delete, sender=Tarea)
+def planificacion_tarea_eliminada(sender, instance, **kwargs):
+    _actualizar_planificacion(instance.proyecto_id, 'quitar_tarea', instance.id)
+
+@receiver(m2m_changed, sender=Tarea.dependencias.through)
+def planificacion_dependencias(sender, instance, action, reverse, pk_set, **kwargs):
+    """tarea.dependencias.add/remove (o bloqueante.bloquea.* con reverse) actualizan aristas."""
+    if action == 'post_clear':
+        transaction.on_commit(partial(planificacion.invalidar, instance.proyecto_id))
+        return
+    if action not in ('post_add', 'post_remove'):
+        return
+    operacion = 'agregar_dependencia' if action == 'post_add' else 'quitar_dependencia'
+    for otra in pk_set:
+        bloqueante, tarea = (instance.id, otra) if reverse else (otra, instance.id)
+        _actualizar_planificacion(instance.proyecto_id, operacion, bloqueante, tarea)
+
+@receiver(post_delete, sender=Tarea)
+def lapida_tarea_eliminada(sender, instance, origin=None, **kwargs):
+    """Deja constancia del borrado para el sondeo de lista_tareas, salvo si se borra el proyecto entero."""
+    modelo = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if modelo is Proyecto:
+        return
+    TareaEliminada.objects.create(
+        proyecto_id=instance.proyecto_id, tarea_id=instance.id, version=siguiente_version_tareas(instance.proyecto_id)
+    )
+
+@receiver(m2m_changed, sender=Tarea.usuarios_asignados.through)
+def version_asignaciones(sender, instance, action, reverse, pk_set, **kwargs):
+    """Las asignaciones cambian qué tareas muestra lista_tareas filtrada por usuario."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Tarea.marcar_cambiadas([instance.id])
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Tarea.marcar_cambiadas(pk_set)
+    elif action == 'pre_clear':
+        # En post_clear ya no se sabe qué tareas tenía asignadas el usuario
+        Tarea.marcar_cambiadas(list(instance.tareas_asignadas.values_list('id', flat=True)))
+
+@receiver(post_save, sender=Mensaje)
+def contar_mensaje(sender, instance, created, **kwargs):
+    if created:
+        metricas.MENSAJES_CHAT.inc('proyecto' if instance.proyecto_id else 'directo')
+
+@receiver(user_login_failed)
+def contar_login_fallido(sender, credentials, request=None, **kwargs):
+    metricas.LOGINS_FALLIDOS.inc('credenciales')
+
+@receiver(user_locked_out)
+def contar_bloqueo(sender, request=None, **kwargs):
+    metricas.LOGINS_FALLIDOS.inc('bloqueo')
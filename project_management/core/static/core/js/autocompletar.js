@@ -0,0 +1,50 @@
+// Buscador para los <select data-autocompletar>: las opciones se piden al
+// servidor por prefijo en lugar de venir todas incrustadas en el HTML.
+document.addEventListener('DOMContentLoaded', function () {
+    function buscar(select, texto) {
+        var url = new URL(select.dataset.autocompletar, window.location.origin);
+        url.searchParams.set('q', texto);
+        fetch(url, {credentials: 'same-origin'})
+            .then(function (respuesta) { return respuesta.json(); })
+            .then(function (data) {
+                // Se conservan las opciones marcadas (una o varias en un select multiple)
+                var seleccionados = {};
+                Array.from(select.options).forEach(function (opcion) {
+                    if (opcion.value && !opcion.selected) {
+                        opcion.remove();
+                    } else {
+                        seleccionados[opcion.value] = true;
+                    }
+                });
+                data.resultados.forEach(function (resultado) {
+                    if (!seleccionados[String(resultado.id)]) {
+                        select.add(new Option(resultado.texto, resultado.id));
+                    }
+                });
+            });
+    }
+
+    document.querySelectorAll('select[data-autocompletar]').forEach(function (select) {
+        // base.html y form.media pueden cargar este script dos veces
+        if (select.dataset.autocompletarListo) {
+            return;
+        }
+        select.dataset.autocompletarListo = '1';
+        var buscador = document.createElement('input');
+        var temporizador = null;
+        buscador.type = 'search';
+        buscador.className = 'form-control form-control-sm mb-1';
+        buscador.placeholder = 'Buscar...';
+        select.parentNode.insertBefore(buscador, select);
+        buscador.addEventListener('input', function () {
+            clearTimeout(temporizador);
+            temporizador = setTimeout(function () { buscar(select, buscador.value); }, 250);
+        });
+        if ('autocompletarDiferido' in select.dataset) {
+            // Selects siempre presentes (el chat): la primera carga espera a que se muestren
+            select.addEventListener('autocompletar:cargar', function () { buscar(select, buscador.value); });
+        } else {
+            buscar(select, '');
+        }
+    });
+});
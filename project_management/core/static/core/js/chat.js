@@ -0,0 +1,85 @@
+// Chat privado de la esquina inferior derecha.
+// Las URLs llegan en los atributos data-url-* de #chatPanel.
+$(document).ready(function() {
+    // Toggle del chat
+    $('#chatTab').click(function() {
+        $('#chatPanel').slideToggle('fast');
+    });
+
+    // Cargar mensajes al abrir el chat
+    $('#chatTab').click(function() {
+        $.ajax({
+            url: $('#chatPanel').data('url-bandeja'),
+            method: 'GET',
+            success: function(data) {
+                let mensajesHtml = '';
+                if (data.conversaciones.length > 0) {
+                    data.conversaciones.forEach(function(conversacion) {
+                        mensajesHtml += `
+                            <div class="chat-message mb-2">
+                                <a href="${conversacion.url}"><strong>${conversacion.contraparte}</strong></a>
+                                ${conversacion.no_leidos > 0 ? '<span class="badge bg-danger">' + conversacion.no_leidos + '</span>' : ''} <br>
+                                ${conversacion.fragmento} <br>
+                                <small>${conversacion.fecha_hora}</small>
+                            </div>`;
+                    });
+                } else {
+                    mensajesHtml = '<p>No hay conversaciones.</p>';
+                }
+                $('#chatMensajes').html(mensajesHtml);
+
+                // Destinatario y proyecto se buscan por prefijo (autocompletar.js)
+                $('#chatDestinatario, #chatProyecto').each(function() {
+                    this.dispatchEvent(new Event('autocompletar:cargar'));
+                });
+
+                // Al abrir el chat se dan por vistas las notificaciones que había al cargarlo
+                if (data.ultima_notificacion) {
+                    $.post($('#chatPanel').data('url-marcar'), {
+                        hasta: data.ultima_notificacion,
+                        csrfmiddlewaretoken: $('#chatForm [name=csrfmiddlewaretoken]').val()
+                    }, function(respuesta) {
+                        let badge = $('#chatTab .badge.bg-danger');
+                        if (respuesta.no_leidas > 0) {
+                            badge.text(respuesta.no_leidas);
+                        } else {
+                            badge.hide();
+                        }
+                    });
+                }
+            },
+            error: function() {
+                $('#chatMensajes').html('<p>Error al cargar los mensajes.</p>');
+            }
+        });
+    });
+
+    // Enviar mensaje con AJAX
+    $('#chatForm').on('submit', function(e) {
+        e.preventDefault();
+        $.ajax({
+            url: $('#chatPanel').data('url-enviar'),
+            method: 'POST',
+            data: $(this).serialize(),
+            success: function(response) {
+                if (response.success) {
+                    $('#chatContenido').val('');
+                    let nuevoMensaje = `
+                        <div class="chat-message mb-2">
+                            <strong>Para:</strong> ${$('#chatDestinatario option:selected').text()} <br>
+                            ${$('#chatProyecto').val() ? '<strong>Proyecto:</strong> ' + $('#chatProyecto option:selected').text() + '<br>' : ''}
+                            ${response.contenido} <br>
+                            <small>${response.fecha_hora}</small>
+                        </div>`;
+                    $('#chatMensajes').append(nuevoMensaje);
+                    $('#chatMensajes').scrollTop($('#chatMensajes')[0].scrollHeight);
+                } else {
+                    alert('Error al enviar el mensaje: ' + response.error);
+                }
+            },
+            error: function() {
+                alert('Error al enviar el mensaje.');
+            }
+        });
+    });
+});
@@ -0,0 +1,55 @@
+// Sondeo de comentarios nuevos en comentarios_tarea: pide solo los posteriores
+// al último id mostrado y los añade al final, sin recargar la página.
+document.addEventListener('DOMContentLoaded', function () {
+    var contenedor = document.getElementById('comentarios');
+    if (!contenedor || !contenedor.dataset.urlNuevos) {
+        return;
+    }
+    var INTERVALO_MS = 15000;
+    var ultimo = parseInt(contenedor.dataset.ultimo, 10) || 0;
+
+    function crearComentario(comentario) {
+        var tarjeta = document.createElement('div');
+        tarjeta.className = 'comentario card ' + (comentario.propio ? 'bg-light' : 'bg-white');
+        tarjeta.style.marginBottom = '1rem';
+        var cuerpo = document.createElement('div');
+        cuerpo.className = 'card-body';
+        var texto = document.createElement('p');
+        var autor = document.createElement('strong');
+        autor.textContent = comentario.usuario + ':';
+        texto.appendChild(autor);
+        texto.appendChild(document.createTextNode(' ' + comentario.contenido));
+        var fecha = document.createElement('small');
+        fecha.className = 'text-muted';
+        fecha.textContent = comentario.fecha_hora;
+        cuerpo.appendChild(texto);
+        cuerpo.appendChild(fecha);
+        tarjeta.appendChild(cuerpo);
+        return tarjeta;
+    }
+
+    function sondear() {
+        if (document.hidden) {
+            return;
+        }
+        fetch(contenedor.dataset.urlNuevos + '?despues=' + ultimo, {credentials: 'same-origin'})
+            .then(function (respuesta) { return respuesta.ok ? respuesta.json() : null; })
+            .then(function (datos) {
+                if (!datos || !datos.comentarios.length) {
+                    return;
+                }
+                var vacio = contenedor.querySelector('.sin-comentarios');
+                if (vacio) {
+                    vacio.remove();
+                }
+                datos.comentarios.forEach(function (comentario) {
+                    contenedor.appendChild(crearComentario(comentario));
+                    ultimo = comentario.id;
+                });
+                document.getElementById('numComentarios').textContent = datos.num_comentarios;
+            })
+            .catch(function () {});
+    }
+
+    setInterval(sondear, INTERVALO_MS);
+});
@@ -0,0 +1,97 @@
+// Diagrama de Gantt con filas virtualizadas: aunque el proyecto tenga decenas
+// de miles de tareas, en el DOM solo están las filas visibles en cada momento.
+document.addEventListener('DOMContentLoaded', function () {
+    var gantt = document.getElementById('gantt');
+    if (!gantt) {
+        return;
+    }
+    var contenido = gantt.querySelector('.gantt-contenido');
+    var ALTO_FILA = 28;
+    var FILAS_EXTRA = 10;
+    var tareas = [];
+    var duracionTotal = 1;
+    var fechaInicio = null;
+
+    function porcentaje(dias) {
+        return (dias / duracionTotal * 100) + '%';
+    }
+
+    function fecha(dias) {
+        var resultado = new Date(fechaInicio.getTime());
+        resultado.setDate(resultado.getDate() + dias);
+        return resultado.toLocaleDateString();
+    }
+
+    function crearFila(indice) {
+        // tarea = [id, titulo, estado, inicio, duracion, holgura]
+        var tarea = tareas[indice];
+        var fila = document.createElement('div');
+        fila.className = 'gantt-fila';
+        fila.style.top = (indice * ALTO_FILA) + 'px';
+
+        var titulo = document.createElement('a');
+        titulo.className = 'gantt-titulo';
+        titulo.href = gantt.dataset.urlEditar.replace('/0/', '/' + tarea[0] + '/');
+        titulo.textContent = tarea[1];
+        fila.appendChild(titulo);
+
+        var pista = document.createElement('div');
+        pista.className = 'gantt-pista';
+        if (tarea[5] > 0) {
+            var holgura = document.createElement('div');
+            holgura.className = 'gantt-holgura';
+            holgura.style.left = porcentaje(tarea[3] + tarea[4]);
+            holgura.style.width = porcentaje(tarea[5]);
+            pista.appendChild(holgura);
+        }
+        var barra = document.createElement('div');
+        barra.className = 'gantt-barra' + (tarea[5] === 0 ? ' critica' : '');
+        barra.style.left = porcentaje(tarea[3]);
+        barra.style.width = porcentaje(Math.max(tarea[4], 0.2));
+        barra.title = tarea[1] + ': ' + fecha(tarea[3]) + ' - ' + fecha(tarea[3] + tarea[4]) +
+            ' (holgura ' + tarea[5] + ' días)';
+        pista.appendChild(barra);
+        fila.appendChild(pista);
+        return fila;
+    }
+
+    function pintar() {
+        var primera = Math.max(Math.floor(gantt.scrollTop / ALTO_FILA) - FILAS_EXTRA, 0);
+        var ultima = Math.min(
+            Math.ceil((gantt.scrollTop + gantt.clientHeight) / ALTO_FILA) + FILAS_EXTRA, tareas.length
+        );
+        var fragmento = document.createDocumentFragment();
+        for (var indice = primera; indice < ultima; indice++) {
+            fragmento.appendChild(crearFila(indice));
+        }
+        contenido.replaceChildren(fragmento);
+    }
+
+    var pendiente = false;
+    gantt.addEventListener('scroll', function () {
+        if (!pendiente) {
+            pendiente = true;
+            window.requestAnimationFrame(function () {
+                pendiente = false;
+                pintar();
+            });
+        }
+    });
+
+    fetch(gantt.dataset.url, {credentials: 'same-origin'})
+        .then(function (respuesta) { return respuesta.json(); })
+        .then(function (data) {
+            if (data.error) {
+                contenido.textContent = data.error;
+                return;
+            }
+            tareas = data.tareas;
+            duracionTotal = Math.max(data.duracion_total, 1);
+            fechaInicio = new Date(data.fecha_inicio + 'T00:00:00');
+            contenido.style.height = (tareas.length * ALTO_FILA) + 'px';
+            document.getElementById('ganttResumen').textContent =
+                tareas.length + ' tareas, ' + data.duracion_total + ' días, ' +
+                data.ruta_critica.length + ' en la ruta crítica';
+            pintar();
+        });
+});
@@ -0,0 +1,105 @@
+// Tablero Kanban: al soltar una tarjeta se envía un PATCH con el estado de la
+// columna, la tarjeta que queda encima y la revisión que se mostró. Si otro
+// usuario la ha cambiado entretanto (409), la tarjeta vuelve a su sitio.
+document.addEventListener('DOMContentLoaded', function () {
+    var tablero = document.getElementById('tablero');
+    if (!tablero) {
+        return;
+    }
+    var aviso = document.getElementById('tableroAviso');
+    var csrf = document.querySelector('[name=csrfmiddlewaretoken]').value;
+    var arrastrada = null;
+    var origen = null;
+
+    function tarjetaSiguiente(columna, y) {
+        // Primera tarjeta cuyo centro queda por debajo del cursor
+        var tarjetas = columna.querySelectorAll('.tablero-tarjeta:not(.arrastrando)');
+        for (var i = 0; i < tarjetas.length; i++) {
+            var caja = tarjetas[i].getBoundingClientRect();
+            if (y < caja.top + caja.height / 2) {
+                return tarjetas[i];
+            }
+        }
+        return null;
+    }
+
+    function actualizarContadores() {
+        tablero.querySelectorAll('.tablero-columna').forEach(function (columna) {
+            columna.parentNode.querySelector('.badge').textContent = columna.querySelectorAll('.tablero-tarjeta').length;
+        });
+    }
+
+    function deshacer(tarjeta, posicion, mensaje) {
+        posicion.columna.insertBefore(tarjeta, posicion.siguiente);
+        actualizarContadores();
+        aviso.textContent = mensaje;
+    }
+
+    function guardar(tarjeta, posicion) {
+        var columna = tarjeta.parentNode;
+        var anterior = tarjeta.previousElementSibling;
+        tarjeta.classList.add('guardando');
+        aviso.textContent = '';
+        fetch(tablero.dataset.urlMover.replace('/0/', '/' + tarjeta.dataset.tarea + '/'), {
+            method: 'PATCH',
+            credentials: 'same-origin',
+            headers: {'Content-Type': 'application/json', 'X-CSRFToken': csrf},
+            body: JSON.stringify({
+                estado: columna.dataset.estado,
+                revision: parseInt(tarjeta.dataset.revision, 10),
+                despues_de: anterior ? parseInt(anterior.dataset.tarea, 10) : null
+            })
+        })
+            .then(function (respuesta) {
+                return respuesta.json().then(function (datos) { return {estado: respuesta.status, datos: datos}; });
+            })
+            .then(function (resultado) {
+                if (resultado.estado === 200) {
+                    tarjeta.dataset.revision = resultado.datos.revision;
+                } else if (resultado.estado === 409) {
+                    deshacer(tarjeta, posicion, 'Otro usuario ha cambiado la tarea; recarga el tablero para ver su estado actual.');
+                } else {
+                    deshacer(tarjeta, posicion, resultado.datos.error || 'No se ha podido mover la tarea.');
+                }
+            })
+            .catch(function () {
+                deshacer(tarjeta, posicion, 'No se ha podido mover la tarea.');
+            })
+            .finally(function () {
+                tarjeta.classList.remove('guardando');
+            });
+    }
+
+    tablero.addEventListener('dragstart', function (evento) {
+        arrastrada = evento.target.closest('.tablero-tarjeta');
+        if (!arrastrada) {
+            return;
+        }
+        origen = {columna: arrastrada.parentNode, siguiente: arrastrada.nextElementSibling};
+        arrastrada.classList.add('arrastrando');
+        evento.dataTransfer.effectAllowed = 'move';
+    });
+
+    tablero.addEventListener('dragover', function (evento) {
+        var columna = evento.target.closest('.tablero-columna');
+        if (!arrastrada || !columna) {
+            return;
+        }
+        evento.preventDefault();
+        columna.insertBefore(arrastrada, tarjetaSiguiente(columna, evento.clientY));
+    });
+
+    tablero.addEventListener('dragend', function () {
+        if (!arrastrada) {
+            return;
+        }
+        var tarjeta = arrastrada;
+        tarjeta.classList.remove('arrastrando');
+        arrastrada = null;
+        if (tarjeta.parentNode === origen.columna && tarjeta.nextElementSibling === origen.siguiente) {
+            return;
+        }
+        actualizarContadores();
+        guardar(tarjeta, origen);
+    });
+});
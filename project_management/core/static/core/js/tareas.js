@@ -0,0 +1,63 @@
+// Sondeo de cambios en lista_tareas: pide solo las tareas creadas, modificadas o
+// eliminadas desde la última versión vista y las sustituye en su sitio.
+document.addEventListener('DOMContentLoaded', function () {
+    var contenedor = document.getElementById('tareas');
+    if (!contenedor || !contenedor.dataset.urlCambios) {
+        return;
+    }
+    var INTERVALO_MS = 15000;
+    var version = parseInt(contenedor.dataset.version, 10) || 0;
+    // Los mismos filtros (estado, usuario) con los que se ha cargado la lista
+    var filtros = new URLSearchParams(window.location.search);
+
+    function tarjeta(id) {
+        return contenedor.querySelector('[data-tarea="' + id + '"]');
+    }
+
+    function aplicar(datos) {
+        datos.eliminadas.forEach(function (id) {
+            var actual = tarjeta(id);
+            if (actual) {
+                actual.remove();
+            }
+        });
+        datos.tareas.forEach(function (tarea) {
+            var plantilla = document.createElement('template');
+            plantilla.innerHTML = tarea.html.trim();
+            var nueva = plantilla.content.firstElementChild;
+            var actual = tarjeta(tarea.id);
+            if (actual) {
+                actual.replaceWith(nueva);
+            } else {
+                contenedor.appendChild(nueva);
+            }
+        });
+        var vacio = contenedor.querySelector('.sin-tareas');
+        if (vacio && datos.tareas.length) {
+            vacio.remove();
+        }
+    }
+
+    function sondear() {
+        if (document.hidden) {
+            return;
+        }
+        filtros.set('desde', version);
+        fetch(contenedor.dataset.urlCambios + '?' + filtros.toString(), {credentials: 'same-origin'})
+            .then(function (respuesta) { return respuesta.ok ? respuesta.json() : null; })
+            .then(function (datos) {
+                if (!datos) {
+                    return;
+                }
+                if (datos.recargar) {
+                    window.location.reload();
+                    return;
+                }
+                aplicar(datos);
+                version = datos.version;
+            })
+            .catch(function () {});
+    }
+
+    setInterval(sondear, INTERVALO_MS);
+});
@@ -0,0 +1,86 @@
+"""Tablero Kanban de un proyecto: columnas por estado y orden por rango.
+
+Mover una tarjeta es un UPDATE condicionado a la ``revision`` de la tarea que el
+cliente vio (concurrencia optimista): no se bloquea la tarea entre la lectura y
+la escritura, y si otro usuario la ha cambiado mientras tanto el UPDATE no
+afecta a ninguna fila y se informa del conflicto sin haber tocado nada más. La
+revisión es de cada tarea, así que los movimientos de tarjetas distintas no se
+esperan entre sí (salvo si ambos renumeran la misma columna); la versión del
+feed de cambios del proyecto (``Tarea.version``) se asigna después, en una
+transacción aparte y corta. El rango de la tarjeta movida es el punto medio
+entre sus vecinas, así que no hay que reescribir el resto de la columna salvo
+cuando dos rangos empatan (tareas nuevas, todas con 0) o se agota la precisión.
+Renumerar conserva el orden, así que no cambia la revisión de las demás
+tarjetas, solo su versión del feed.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Tarea, siguiente_version_tareas
+
+def columnas(proyecto):
+    """[(estado, etiqueta, tareas)] en el orden de Tarea.ESTADO_OPCIONES."""
+    por_estado = {estado: [] for estado, _ in Tarea.ESTADO_OPCIONES}
+    tareas = Tarea.objects.filter(proyecto=proyecto).only(
+        'id', 'proyecto_id', 'titulo', 'estado', 'fecha_limite', 'rango', 'revision', 'num_comentarios'
+    ).order_by('rango', 'id')
+    for tarea in tareas:
+        por_estado.setdefault(tarea.estado, []).append(tarea)
+    return [(estado, etiqueta, por_estado[estado]) for estado, etiqueta in Tarea.ESTADO_OPCIONES]
+
+def _renumerar(columna):
+    """Reparte rangos 1, 2, 3... en la columna respetando su orden actual; devuelve los ids."""
+    tareas = list(columna.order_by('rango', 'id').only('id', 'rango'))
+    for posicion, tarea in enumerate(tareas, start=1):
+        tarea.rango = float(posicion)
+    Tarea.objects.bulk_update(tareas, ['rango'], batch_size=500)
+    return [tarea.id for tarea in tareas]
+
+def calcular_rango(proyecto_id, estado, tarea_id, despues_de=None):
+    """(rango, ids renumerados) para colocar la tarea justo después de `despues_de` (o la primera).
+
+    Lanza Tarea.DoesNotExist si `despues_de` no está en esa columna del proyecto.
+    Si hay que renumerar la columna, los cambios quedan en la transacción en curso.
+    """
+    columna = Tarea.objects.filter(proyecto_id=proyecto_id, estado=estado).exclude(pk=tarea_id)
+    renumeradas = []
+    for _ in range(2):
+        if despues_de is None:
+            anterior = None
+            siguiente = columna.order_by('rango', 'id').values_list('rango', flat=True).first()
+            if siguiente is None:
+                return 0.0, renumeradas
+            rango = siguiente - 1
+        else:
+            anterior, anterior_id = columna.filter(pk=despues_de).values_list('rango', 'id').get()
+            siguiente = columna.filter(
+                Q(rango__gt=anterior) | Q(rango=anterior, id__gt=anterior_id)
+            ).order_by('rango', 'id').values_list('rango', flat=True).first()
+            if siguiente is None:
+                return anterior + 1, renumeradas
+            rango = (anterior + siguiente) / 2
+        if rango not in (anterior, siguiente):
+            return rango, renumeradas
+        renumeradas = _renumerar(columna)
+    return rango, renumeradas
+
+def mover(tarea_id, proyecto_id, revision, estado, despues_de=None):
+    """Coloca la tarea en `estado` tras `despues_de` si sigue en `revision`.
+
+    Devuelve (nueva revisión, rango) o None si hay conflicto. Lanza
+    Tarea.DoesNotExist como calcular_rango, deshaciendo el cambio de estado.
+    """
+    with transaction.atomic():
+        movidas = Tarea.objects.filter(pk=tarea_id, proyecto_id=proyecto_id, revision=revision).update(
+            estado=estado, revision=F('revision') + 1
+        )
+        if not movidas:
+            return None
+        rango, renumeradas = calcular_rango(proyecto_id, estado, tarea_id, despues_de)
+        Tarea.objects.filter(pk=tarea_id).update(rango=rango)
+    # Transacción aparte y corta: la fila del proyecto no se bloquea mientras se mueve o renumera
+    with transaction.atomic():
+        Tarea.objects.filter(pk__in=[tarea_id, *renumeradas]).update(
+            version=siguiente_version_tareas(proyecto_id)
+        )
+    return revision + 1, rango
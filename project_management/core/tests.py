@@ -1,9 +1,36 @@
-from django.test import TestCase, Client
+from django.test import LiveServerTestCase, TestCase, Client, RequestFactory, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Proyecto, Grupo, PerfilProyecto, Tarea, Mensaje, Notificacion
-from .forms import ProyectoForm, TareaForm, MensajeForm, AsignarUsuarioGrupoForm
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, F
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from .models import (
+    Proyecto, Grupo, PerfilProyecto, Tarea, Mensaje, Notificacion, Conversacion, ParticipanteConversacion,
+    RecordatorioEnviado, Actividad, Comentario, PurgaProyecto, ResumenEnviado, TareaEliminada
+)
+from .forms import ProyectoForm, TareaForm, MensajeForm, AsignarUsuarioGrupoForm, CrearUsuarioForm
+from . import (
+    actividad, checks, clonacion, limites, metricas, notificaciones, opciones, panel, particiones, perfilado, planificacion,
+    purga, recordatorios, reportes, resumenes, tablero
+)
+from .management.commands import benchmark_sesiones, loadtest
+from .middleware import CompresionMiddleware
+from collections import Counter
 from datetime import date, timedelta
+import gzip
+import json
+import random
+import importlib
+from io import StringIO
+import tempfile
+from unittest import mock
 
 class CoreTests(TestCase):
     def setUp(self):
@@ -178,4 +205,1452 @@ class CoreTests(TestCase):
         self.assertTrue(PerfilProyecto.objects.filter(usuario=self.new_user, grupo=self.grupo, rol='miembro').exists())
 
 def es_admin_o_superusuario(user):
-    return user.is_superuser or PerfilProyecto.objects.filter(usuario=user, rol='administrador').exists()
\ No newline at end of file
+    return user.is_superuser or PerfilProyecto.objects.filter(usuario=user, rol='administrador').exists()
+
+class AutocompletarTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.admin = User.objects.create_superuser(username='admin', password='admin123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test',
+            descripcion='Descripción de prueba',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1),
+            creado_por=self.user
+        )
+        self.grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=self.grupo, rol='miembro')
+        User.objects.bulk_create([User(username=f'masivo{i:03d}') for i in range(30)])
+        self.client.force_login(self.user)
+
+    def test_autocompletar_usuarios_por_prefijo_y_paginado(self):
+        response = self.client.get(reverse('autocompletar_usuarios'), {'q': 'masivo', 'limite': 10})
+        data = response.json()
+        self.assertEqual(len(data['resultados']), 10)
+        self.assertTrue(data['hay_mas'])
+        self.assertEqual(data['resultados'][0]['texto'], 'masivo000')
+        response = self.client.get(reverse('autocompletar_usuarios'), {'q': 'masivo', 'limite': 10, 'desplazamiento': 25})
+        data = response.json()
+        self.assertEqual([r['texto'] for r in data['resultados']], [f'masivo{i:03d}' for i in range(25, 30)])
+        self.assertFalse(data['hay_mas'])
+
+    def test_autocompletar_excluye_usuario_propio(self):
+        response = self.client.get(reverse('autocompletar_usuarios'), {'q': 'test', 'excluir_propio': 1})
+        self.assertEqual(response.json()['resultados'], [])
+
+    def test_autocompletar_proyectos_respeta_ambito(self):
+        response = self.client.get(reverse('autocompletar_proyectos'), {'q': 'Proy'})
+        self.assertEqual(response.json()['resultados'], [{'id': self.proyecto.id, 'texto': 'Proyecto Test'}])
+        response = self.client.get(reverse('autocompletar_proyectos'), {'ambito': 'administrados'})
+        self.assertEqual(response.json()['resultados'], [])
+
+    def test_mensaje_form_no_renderiza_todos_los_usuarios(self):
+        form = MensajeForm(usuario=self.user, initial={'destinatario': self.admin})
+        with self.assertNumQueries(1):
+            html = form['destinatario'].as_widget()
+        self.assertIn('admin', html)
+        self.assertNotIn('masivo', html)
+        self.assertIn('data-autocompletar', html)
+
+    def test_chat_no_incrusta_usuarios(self):
+        datos = self.client.get(reverse('bandeja_entrada_json')).json()
+        self.assertNotIn('usuarios', datos)
+        self.assertNotIn('proyectos', datos)
+        response = self.client.get(reverse('lista_proyectos'))
+        self.assertContains(response, f'data-autocompletar="{reverse("autocompletar_usuarios")}?excluir_propio=1"')
+        self.assertNotContains(response, 'masivo')
+
+    def test_mensaje_form_valida_ambito(self):
+        form = MensajeForm(data={'destinatario': str(self.user.id), 'contenido': 'Hola'}, usuario=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('destinatario', form.errors)
+
+    def test_crear_usuario_form_limita_proyectos_administrados(self):
+        form = CrearUsuarioForm(usuario=self.user, data={
+            'username': 'nuevo', 'email': 'nuevo@example.com',
+            'password1': 'ClaveSegura123', 'password2': 'ClaveSegura123',
+            'rol': 'miembro', 'proyecto': str(self.proyecto.id)
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('proyecto', form.errors)
+
+
+class OpcionesCacheadasTests(TestCase):
+    def setUp(self):
+        # La caché compartida está en disco y sobrevive entre ejecuciones de las pruebas
+        caches[settings.CACHE_COMPARTIDA].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='otropass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test',
+            descripcion='Descripción de prueba',
+            fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1),
+            creado_por=self.user
+        )
+        self.grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=self.grupo, rol='miembro')
+        self.datos_tarea = {
+            'titulo': 'Nueva Tarea',
+            'descripcion': 'Descripción tarea',
+            'fecha_limite': (date.today() + timedelta(days=7)).strftime('%Y-%m-%d'),
+            'estado': 'pendiente',
+            'usuarios_asignados': [self.user.id]
+        }
+
+    def test_tarea_form_reutiliza_opciones_cacheadas(self):
+        TareaForm(data=self.datos_tarea, proyecto=self.proyecto).is_valid()
+        with self.assertNumQueries(0):
+            form = TareaForm(data=self.datos_tarea, proyecto=self.proyecto)
+            self.assertTrue(form.is_valid(), msg=f"Errores del formulario: {form.errors}")
+            str(form['usuarios_asignados'])
+
+    def test_tarea_form_rechaza_usuario_fuera_del_proyecto(self):
+        datos = dict(self.datos_tarea, usuarios_asignados=[self.otro.id])
+        form = TareaForm(data=datos, proyecto=self.proyecto)
+        self.assertFalse(form.is_valid())
+        self.assertIn('usuarios_asignados', form.errors)
+
+    def test_nuevo_miembro_invalida_opciones(self):
+        self.assertEqual(opciones.usuarios_elegibles(self.proyecto.id), [(self.user.id, 'testuser')])
+        PerfilProyecto.objects.create(usuario=self.otro, proyecto=self.proyecto, grupo=self.grupo, rol='miembro')
+        self.assertEqual(
+            opciones.usuarios_elegibles(self.proyecto.id),
+            [(self.otro.id, 'otro'), (self.user.id, 'testuser')]
+        )
+
+    def test_versiones_en_la_cache_compartida(self):
+        version, = opciones.versiones('global')
+        cache.clear()  # Lo que otro worker no comparte con este
+        self.assertEqual(opciones.versiones('global'), [version])
+        opciones.invalidar('global')
+        self.assertNotEqual(caches[settings.CACHE_COMPARTIDA].get(opciones._clave_version('global')), version)
+
+    @override_settings(DEBUG=False)
+    def test_check_rechaza_locmem(self):
+        compartida = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={**settings.CACHES, settings.CACHE_COMPARTIDA: compartida}):
+            self.assertEqual([error.id for error in checks.cache_compartida(None)], ['core.E001'])
+        self.assertEqual(checks.cache_compartida(None), [])
+
+    def test_proyecto_form_grupos_iniciales_sin_consultas(self):
+        ProyectoForm(instance=self.proyecto)
+        with self.assertNumQueries(0):
+            form = ProyectoForm(instance=self.proyecto)
+        self.assertEqual(form.initial['grupos'], [self.grupo.id])
+        Grupo.objects.create(nombre='Grupo Nuevo')
+        form = ProyectoForm(instance=self.proyecto)
+        self.assertEqual(len(form.fields['grupos'].choices), 2)
+
+
+class ConversacionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.admin = User.objects.create_superuser(username='admin', password='admin123')
+        self.client.force_login(self.user)
+
+    def test_mensaje_crea_conversacion_y_desnormaliza(self):
+        Mensaje.objects.create(remitente=self.admin, destinatario=self.user, contenido='Hola')
+        respuesta = Mensaje.objects.create(remitente=self.user, destinatario=self.admin, contenido='Qué tal')
+        self.assertEqual(Conversacion.objects.count(), 1)
+        conversacion = respuesta.conversacion
+        conversacion.refresh_from_db()
+        self.assertEqual(conversacion.ultimo_fragmento, 'Qué tal')
+        self.assertEqual(conversacion.ultimo_remitente, self.user)
+        no_leidos = dict(conversacion.participaciones.values_list('usuario__username', 'no_leidos'))
+        self.assertEqual(no_leidos, {'testuser': 1, 'admin': 1})
+
+    def test_bandeja_lista_conversaciones(self):
+        Mensaje.objects.create(remitente=self.admin, destinatario=self.user, contenido='Hola')
+        response = self.client.get(reverse('bandeja_entrada'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['conversaciones']), 1)
+        self.assertContains(response, 'admin')
+
+    def test_ver_conversacion_marca_leida(self):
+        mensaje = Mensaje.objects.create(remitente=self.admin, destinatario=self.user, contenido='Hola')
+        response = self.client.get(reverse('ver_conversacion', args=[mensaje.conversacion_id]))
+        self.assertEqual(response.status_code, 200)
+        participante = ParticipanteConversacion.objects.get(conversacion=mensaje.conversacion, usuario=self.user)
+        self.assertEqual(participante.no_leidos, 0)
+
+    def test_ver_conversacion_ajena_da_404(self):
+        tercero = User.objects.create_user(username='tercero', password='tercero123')
+        mensaje = Mensaje.objects.create(remitente=self.admin, destinatario=tercero, contenido='Hola')
+        response = self.client.get(reverse('ver_conversacion', args=[mensaje.conversacion_id]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_migracion_rellena_conversaciones(self):
+        from django.apps import apps
+        migracion = importlib.import_module('core.migrations.0004_rellenar_conversaciones')
+        Mensaje.objects.create(remitente=self.admin, destinatario=self.user, contenido='Primero')
+        Mensaje.objects.create(remitente=self.user, destinatario=self.admin, contenido='Segundo')
+        Conversacion.objects.all().delete()
+        Mensaje.objects.bulk_create([Mensaje(remitente=self.admin, destinatario=self.user, contenido='Antiguo')])
+        migracion.rellenar_conversaciones(apps, None)
+        conversacion = Conversacion.objects.get()
+        self.assertEqual(conversacion.mensajes.count(), 1)
+        self.assertEqual(conversacion.ultimo_fragmento, 'Antiguo')
+        self.assertEqual(conversacion.participaciones.filter(ultimo_mensaje_at__isnull=False).count(), 2)
+
+
+class ParticionesTests(TestCase):
+    def test_sql_crear_particion(self):
+        self.assertEqual(
+            particiones.sql_crear_particion('core_mensaje', date(2025, 12, 1)),
+            'CREATE TABLE IF NOT EXISTS "core_mensaje_p202512" PARTITION OF "core_mensaje" '
+            "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+        )
+
+    def test_particiones_caducadas_respeta_retencion(self):
+        nombres = ['core_mensaje_p202501', 'core_mensaje_p202502', 'core_mensaje_p202503', 'core_mensaje_pdefault']
+        caducadas = particiones.particiones_caducadas(nombres, date(2025, 5, 20), 3)
+        self.assertEqual(caducadas, ['core_mensaje_p202501'])
+
+    def test_comando_no_hace_nada_fuera_de_postgresql(self):
+        salida = StringIO()
+        call_command('gestionar_particiones', stdout=salida)
+        self.assertIn('no se hace nada', salida.getvalue())
+
+
+class PerfiladoTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ajustes = override_settings(PERFILADO_DIRECTORIO=self.directorio.name, PERFILADO_MAX_ARCHIVOS=2)
+        self.ajustes.enable()
+        self.admin = User.objects.create_superuser(username='admin', password='admin123')
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def tearDown(self):
+        self.ajustes.disable()
+        self.directorio.cleanup()
+
+    def test_token_firmado_por_usuario(self):
+        token = perfilado.generar_token(self.admin)
+        self.assertTrue(perfilado.token_valido(token, self.admin))
+        self.assertFalse(perfilado.token_valido(token, self.user))
+        self.assertFalse(perfilado.token_valido(token + 'x', self.admin))
+
+    def test_peticion_perfilada_para_staff_con_token(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('lista_proyectos'), {'_perfilar': perfilado.generar_token(self.admin)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('lista_proyectos', response['X-Perfil'])
+        self.assertEqual(len(perfilado.listar_perfiles()), 1)
+        response = self.client.get(reverse('lista_perfiles'))
+        self.assertContains(response, '(lista_proyectos)')
+
+    def test_no_perfila_sin_staff(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('lista_proyectos'), {'_perfilar': perfilado.generar_token(self.user)})
+        self.assertNotIn('X-Perfil', response)
+        self.assertEqual(perfilado.listar_perfiles(), [])
+
+    def test_retencion_conserva_los_mas_recientes(self):
+        self.client.force_login(self.admin)
+        token = perfilado.generar_token(self.admin)
+        for _ in range(3):
+            self.client.get(reverse('lista_proyectos'), HTTP_X_PERFILAR=token)
+        self.assertEqual(len(perfilado.listar_perfiles()), 2)
+
+class BenchmarkPlantillasTests(TestCase):
+    def test_mide_todas_las_plantillas_y_revierte_los_datos(self):
+        salida = StringIO()
+        call_command(
+            'benchmark_plantillas', repeticiones=1, usuarios=3, grupos=2, tareas=3,
+            comentarios=2, mensajes=2, notificaciones=2, stdout=salida
+        )
+        self.assertNotIn('Sin medir', salida.getvalue())
+        self.assertIn('core/lista_tareas.html', salida.getvalue())
+        self.assertFalse(User.objects.filter(username='benchmark_admin').exists())
+        self.assertEqual(Proyecto.objects.count(), 0)
+
+class CompresionYCondicionalTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Descripción', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.user
+        )
+        self.notificacion = Notificacion.objects.create(usuario=self.user, mensaje='Aviso', proyecto=self.proyecto)
+        self.client.force_login(self.user)
+        self.client.get(reverse('lista_proyectos'))  # Fija la cookie CSRF, que forma parte del ETag
+
+    def _comprimir(self, response, aceptadas='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=aceptadas)
+        return CompresionMiddleware(lambda request: response)(request)
+
+    @override_settings(COMPRESION_TAMANO_MINIMO=1024)
+    def test_umbral_y_gzip(self):
+        self.assertFalse(self._comprimir(HttpResponse('x' * 500)).has_header('Content-Encoding'))
+        response = self._comprimir(HttpResponse('x' * 5000))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), b'x' * 5000)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_streaming_se_comprime_por_fragmentos(self):
+        response = self._comprimir(StreamingHttpResponse(b'fila %d\n' % i for i in range(1000)), 'gzip, br')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(gzip.decompress(b''.join(response.streaming_content)).startswith(b'fila 0\n'))
+
+    def test_brotli_si_esta_instalado(self):
+        try:
+            import brotli
+        except ImportError:
+            self.skipTest('brotli no instalado')
+        response = self._comprimir(HttpResponse('x' * 5000, content_type='application/json'), 'gzip, deflate, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), b'x' * 5000)
+
+    def test_html_con_relleno_contra_breach(self):
+        # El HTML nunca va con Brotli y cada respuesta idéntica comprimida mide distinto
+        longitudes = set()
+        for _ in range(10):
+            response = self._comprimir(HttpResponse('x' * 5000), 'gzip, deflate, br')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), b'x' * 5000)
+            longitudes.add(len(response.content))
+        self.assertGreater(len(longitudes), 1)
+
+    def test_notificaciones_responde_304_hasta_que_cambian(self):
+        url = reverse('lista_notificaciones')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.post(url, {'marcar_leida': self.notificacion.id})
+        # El mensaje flash pendiente obliga a renderizar; después el ETag ya es otro
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_grupos_cambia_etag_al_asignar_perfil(self):
+        url = reverse('lista_grupos')
+        grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=self.proyecto)
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etag_ve_las_invalidaciones_de_otros_workers(self):
+        url = reverse('lista_grupos')
+        compartida = caches[settings.CACHE_COMPARTIDA]
+        etag = self.client.get(url)['ETag']
+        # Lo que hace la señal en otro proceso: solo toca la caché compartida
+        compartida.incr(opciones._clave_version('grupos'))
+        etag_nuevo = self.client.get(url, HTTP_IF_NONE_MATCH=etag)['ETag']
+        self.assertNotEqual(etag_nuevo, etag)
+        # Si se pierden las versiones, el ETag cambia en vez de dar un 304 obsoleto
+        compartida.clear()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag_nuevo).status_code, 200)
+
+    def test_bandeja_cambia_etag_con_mensaje_nuevo(self):
+        otro = User.objects.create_user(username='otro', password='otropass123')
+        Mensaje.objects.create(remitente=otro, destinatario=self.user, contenido='Hola')
+        url = reverse('bandeja_entrada')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Mensaje.objects.create(remitente=otro, destinatario=self.user, contenido='¿Sigues ahí?')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class PlanificacionTests(TestCase):
+    def setUp(self):
+        caches[settings.CACHE_COMPARTIDA].clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Descripción', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo, rol='administrador')
+        self.tareas = {
+            nombre: Tarea.objects.create(
+                proyecto=self.proyecto, titulo=f'Tarea {nombre}', descripcion='Descripción',
+                fecha_limite=date.today() + timedelta(days=30), duracion_dias=duracion
+            )
+            for nombre, duracion in (('A', 3), ('B', 2), ('C', 4), ('D', 1))
+        }
+        self.tareas['B'].dependencias.add(self.tareas['A'])
+        self.tareas['C'].dependencias.add(self.tareas['A'])
+        self.tareas['D'].dependencias.add(self.tareas['B'], self.tareas['C'])
+        self.client.force_login(self.user)
+
+    def test_ruta_critica_y_holguras(self):
+        plan = planificacion.obtener(self.proyecto.id)
+        ids = {nombre: tarea.id for nombre, tarea in self.tareas.items()}
+        self.assertEqual(plan.duracion_total, 8)
+        self.assertEqual(plan.inicio_temprano[ids['D']], 7)
+        self.assertEqual(plan.holgura(ids['B']), 2)
+        self.assertEqual(plan.ruta_critica(), [ids['A'], ids['C'], ids['D']])
+
+    def test_ciclo_detectado(self):
+        with self.assertRaises(planificacion.CicloError):
+            planificacion.Planificacion([(1, 1), (2, 1)], [(1, 2), (2, 1)])
+        form = TareaForm(data={
+            'titulo': 'Tarea A', 'descripcion': 'Descripción', 'estado': 'pendiente',
+            'fecha_limite': date.today() + timedelta(days=30), 'dependencias': [self.tareas['D'].id]
+        }, instance=self.tareas['A'], proyecto=self.proyecto)
+        self.assertFalse(form.is_valid())
+        self.assertIn('dependencias', form.errors)
+
+    def _editar_dependencias(self, tarea, dependencias):
+        return self.client.post(reverse('editar_tarea', args=[self.proyecto.id, tarea.id]), {
+            'titulo': tarea.titulo, 'descripcion': 'Descripción', 'estado': 'pendiente',
+            'fecha_limite': date.today() + timedelta(days=30), 'usuarios_asignados': [self.user.id],
+            'dependencias': [d.id for d in dependencias]
+        })
+
+    def test_ciclo_con_la_planificacion_cacheada_desfasada(self):
+        planificacion.obtener(self.proyecto.id)
+        # Otro worker añade E bloqueada por D; sus on_commit no llegan a esta caché
+        nueva = Tarea.objects.create(
+            proyecto=self.proyecto, titulo='Tarea E', descripcion='Descripción',
+            fecha_limite=date.today() + timedelta(days=30)
+        )
+        nueva.dependencias.add(self.tareas['D'])
+        response = self._editar_dependencias(self.tareas['A'], [nueva])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('dependencias', response.context['form'].errors)
+        self.assertFalse(self.tareas['A'].dependencias.exists())
+
+    def test_ciclo_guardado_no_impide_editar_otras_tareas(self):
+        self.tareas['A'].dependencias.add(self.tareas['D'])
+        caches[settings.CACHE_COMPARTIDA].clear()
+        nueva = Tarea.objects.create(
+            proyecto=self.proyecto, titulo='Tarea E', descripcion='Descripción',
+            fecha_limite=date.today() + timedelta(days=30)
+        )
+        response = self._editar_dependencias(nueva, [self.tareas['A']])
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(list(nueva.dependencias.all()), [self.tareas['A']])
+        self.assertIn('dependencias', self._editar_dependencias(self.tareas['B'], [self.tareas['D']]).context['form'].errors)
+
+    def test_incremental_equivale_a_recalcular(self):
+        rng = random.Random(7)
+        plan = planificacion.Planificacion([(i, rng.randint(0, 5)) for i in range(60)], [])
+        aristas = set()
+        for paso in range(400):
+            operacion = rng.random()
+            tareas = list(plan.duraciones)
+            if operacion < 0.45 and len(tareas) > 1:
+                bloqueante, tarea = rng.sample(tareas, 2)
+                if not plan.crearia_ciclo(tarea, [bloqueante]):
+                    plan.agregar_dependencia(bloqueante, tarea)
+                    aristas.add((bloqueante, tarea))
+            elif operacion < 0.6 and aristas:
+                arista = rng.choice(sorted(aristas))
+                plan.quitar_dependencia(*arista)
+                aristas.discard(arista)
+            elif operacion < 0.8:
+                plan.cambiar_duracion(rng.choice(tareas), rng.randint(0, 5))
+            elif operacion < 0.9:
+                plan.agregar_tarea(100 + paso, rng.randint(0, 5))
+            else:
+                tarea = rng.choice(tareas)
+                plan.quitar_tarea(tarea)
+                aristas = {arista for arista in aristas if tarea not in arista}
+            completo = planificacion.Planificacion(plan.duraciones.items(), aristas)
+            self.assertEqual(plan.duracion_total, completo.duracion_total)
+            self.assertEqual(plan.inicio_temprano, completo.inicio_temprano)
+            self.assertEqual(plan.fin_tardio, completo.fin_tardio)
+
+    def test_senales_actualizan_la_planificacion_cacheada(self):
+        planificacion.obtener(self.proyecto.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            tarea = self.tareas['B']
+            tarea.duracion_dias = 10
+            tarea.save()
+        with self.assertNumQueries(0):
+            plan = planificacion.obtener(self.proyecto.id)
+        self.assertEqual(plan.duracion_total, 14)
+        self.assertEqual(plan.ruta_critica(), [self.tareas['A'].id, tarea.id, self.tareas['D'].id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tareas['D'].dependencias.remove(tarea)
+        self.assertEqual(planificacion.obtener(self.proyecto.id).duracion_total, 13)
+
+    def test_invalidacion_de_otro_worker(self):
+        planificacion.obtener(self.proyecto.id)
+        cache.clear()  # Lo que otro worker no comparte con este
+        # Otro worker cambia la duración y sus señales solo tocan la caché compartida
+        Tarea.objects.filter(pk=self.tareas['A'].pk).update(duracion_dias=5)
+        planificacion.invalidar(self.proyecto.id)
+        self.assertEqual(planificacion.obtener(self.proyecto.id).duracion_total, 10)
+
+    def test_actualizaciones_simultaneas_no_se_pisan(self):
+        planificacion.obtener(self.proyecto.id)
+        invalidar = planificacion.invalidar
+
+        def otro_worker_a_la_vez(proyecto_id):
+            invalidar(proyecto_id)
+            return invalidar(proyecto_id)
+
+        Tarea.objects.filter(pk=self.tareas['B'].pk).update(duracion_dias=10)
+        with mock.patch.object(planificacion, 'invalidar', otro_worker_a_la_vez):
+            planificacion.actualizar(self.proyecto.id, 'cambiar_duracion', self.tareas['A'].id, 5)
+        # La copia de este worker no incluye el cambio del otro: se recalcula desde la base de datos
+        with self.assertNumQueries(2):
+            self.assertEqual(planificacion.obtener(self.proyecto.id).duracion_total, 14)
+
+    def test_planificacion_json(self):
+        response = self.client.get(reverse('planificacion_json', args=[self.proyecto.id]))
+        self.assertEqual(response.status_code, 200)
+        datos = response.json()
+        self.assertEqual(datos['duracion_total'], 8)
+        self.assertEqual(datos['tareas'][0], [self.tareas['A'].id, 'Tarea A', 'pendiente', 0, 3, 0])
+        self.assertEqual(self.client.get(reverse('diagrama_gantt', args=[self.proyecto.id])).status_code, 200)
+
+class InformeCargaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='admin123')
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Descripción', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.admin
+        )
+        self.hoy = date(2025, 3, 12)  # Miércoles
+        for dias, estado in ((-10, 'pendiente'), (-1, 'en_progreso'), (3, 'pendiente'), (3, 'completada'), (400, 'pendiente')):
+            tarea = Tarea.objects.create(
+                proyecto=self.proyecto, titulo='Tarea', descripcion='Descripción',
+                fecha_limite=self.hoy + timedelta(days=dias), estado=estado
+            )
+            tarea.usuarios_asignados.add(self.user)
+        Tarea.objects.first().usuarios_asignados.add(self.admin)
+
+    def test_matrices_por_usuario_y_semana(self):
+        informe = reportes.calcular_carga(self.hoy, semanas_atras=1, semanas_adelante=2, tamano_lote=2)
+        self.assertEqual(informe['semanas'], [date(2025, 3, 3), date(2025, 3, 10), date(2025, 3, 17)])
+        fila = [pk for pk, _ in informe['usuarios']].index(self.user.id)
+        # -10 días cae antes de la ventana (primera columna) y +400 después (última)
+        self.assertEqual(informe['abiertas'][fila].tolist(), [1, 2, 1])
+        self.assertEqual(informe['vencidas'][fila].tolist(), [1, 1, 0])
+        self.assertEqual(int(informe['en_progreso'][fila]), 1)
+        filas = reportes.filas_informe(informe, capacidad=1)
+        self.assertEqual(filas[0]['usuario'], 'testuser')
+        self.assertTrue(filas[0]['sobrecargado'])
+
+    def test_vista_y_csv_solo_para_staff(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('informe_carga')).status_code, 302)
+        self.client.force_login(self.admin)
+        self.assertContains(self.client.get(reverse('informe_carga')), 'testuser')
+        response = self.client.get(reverse('informe_carga_csv'))
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertTrue(response.content.decode().startswith('usuario,semana,abiertas,vencidas'))
+
+    def test_benchmark(self):
+        salida = StringIO()
+        call_command('benchmark_informe_carga', asignaciones=300, usuarios=20, proyectos=3, comparar=True, stdout=salida)
+        self.assertIn('Informe NumPy', salida.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith='carga_').exists())
+
+class RecordatoriosTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='otropass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Descripción', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.user
+        )
+        hoy = date.today()
+        self.tareas = {}
+        for nombre, dias, estado in (
+            ('manana', 1, 'pendiente'), ('vencida', -3, 'en_progreso'), ('lejana', 10, 'pendiente'),
+            ('antigua', -100, 'pendiente'), ('hecha', 1, 'completada'),
+        ):
+            tarea = Tarea.objects.create(
+                proyecto=self.proyecto, titulo=nombre, descripcion='Descripción',
+                fecha_limite=hoy + timedelta(days=dias), estado=estado
+            )
+            tarea.usuarios_asignados.add(self.user)
+            self.tareas[nombre] = tarea
+        self.tareas['manana'].usuarios_asignados.add(self.otro)
+
+    def test_envia_una_vez_por_clave(self):
+        ejecucion = recordatorios.ejecutar(dias_aviso=2, dias_vencidas=30, tamano_lote=2)
+        self.assertEqual((ejecucion.asignaciones_revisadas, ejecucion.recordatorios_enviados), (3, 3))
+        self.assertEqual(Notificacion.objects.filter(usuario=self.user).count(), 2)
+        self.assertTrue(Notificacion.objects.filter(usuario=self.user, mensaje__contains="'vencida'").exists())
+        self.assertGreater(ejecucion.retraso_max_s, 0)
+
+        repetida = recordatorios.ejecutar(dias_aviso=2, dias_vencidas=30)
+        self.assertEqual((repetida.recordatorios_enviados, repetida.duplicados_omitidos), (0, 3))
+
+        # Aplazar la tarea cambia la clave y vuelve a avisar
+        tarea = self.tareas['manana']
+        tarea.fecha_limite += timedelta(days=1)
+        tarea.save()
+        self.assertEqual(recordatorios.ejecutar(dias_aviso=2, dias_vencidas=30).recordatorios_enviados, 2)
+        self.assertEqual(RecordatorioEnviado.objects.count(), 5)
+
+    def test_comando_una_pasada(self):
+        salida = StringIO()
+        call_command('recordatorios', dias=2, stdout=salida)
+        self.assertIn('3 enviados', salida.getvalue())
+
+class ActividadTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='otropass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Descripción', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo, rol='administrador')
+        PerfilProyecto.objects.create(usuario=self.otro, proyecto=self.proyecto, grupo=grupo, rol='miembro')
+        self.tarea = Tarea.objects.create(
+            proyecto=self.proyecto, titulo='Tarea Test', descripcion='Descripción',
+            fecha_limite=date.today() + timedelta(days=5)
+        )
+        self.tarea.usuarios_asignados.add(self.user)
+        self.client.force_login(self.user)
+
+    def test_editar_tarea_registra_eventos_en_un_insert(self):
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.post(reverse('editar_tarea', args=[self.proyecto.id, self.tarea.id]), {
+                'titulo': 'Tarea Test', 'descripcion': 'Otra descripción', 'estado': 'completada',
+                'fecha_limite': self.tarea.fecha_limite, 'usuarios_asignados': [self.user.id, self.otro.id],
+            })
+        inserts = [q['sql'] for q in consultas.captured_queries if q['sql'].startswith('INSERT INTO "core_actividad"')]
+        self.assertEqual(len(inserts), 1)
+        eventos = list(Actividad.objects.order_by('id'))
+        self.assertEqual([evento.tipo for evento in eventos], ['tarea_estado', 'tarea_asignacion', 'tarea_editada'])
+        self.assertEqual(eventos[0].descripcion(), "movió 'Tarea Test' de Pendiente a Completada")
+        self.assertEqual(eventos[1].datos['anadidos'], ['otro'])
+        with self.assertRaises(ValueError):
+            eventos[0].save()
+
+    def test_linea_de_tiempo_keyset(self):
+        for indice in range(5):
+            actividad.registrar('comentario', self.proyecto, self.user, self.tarea, fragmento=str(indice))
+        pagina, siguiente = actividad.linea_de_tiempo(self.proyecto.actividad.all(), tamano=2)
+        self.assertEqual([evento.datos['fragmento'] for evento in pagina], ['4', '3'])
+        pagina, siguiente = actividad.linea_de_tiempo(self.proyecto.actividad.all(), antes=siguiente, tamano=2)
+        self.assertEqual([evento.datos['fragmento'] for evento in pagina], ['2', '1'])
+        response = self.client.get(reverse('lista_tareas', args=[self.proyecto.id]))
+        self.assertContains(response, "comentó en &#x27;Tarea Test&#x27;: 4")
+        self.assertContains(self.client.get(reverse('actividad_usuario')), 'Tarea Test')
+
+class LimiteLoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username='victima', password='testpass123')
+
+    @override_settings(LIMITE_LOGIN_POR_USUARIO=3, LIMITE_LOGIN_POR_IP=100, LIMITE_LOGIN_VENTANA=60)
+    def test_ventana_deslizante(self):
+        for _ in range(3):
+            self.assertFalse(limites.excede('10.0.0.1', 'victima', ahora=6000))
+            limites.registrar('10.0.0.1', 'Victima', ahora=6000)
+        self.assertTrue(limites.excede('10.0.0.2', 'VICTIMA', ahora=6010))
+        # A mitad de la ventana siguiente la anterior pesa la mitad: 1,5 < 3
+        self.assertFalse(limites.excede('10.0.0.2', 'victima', ahora=6090))
+
+    def _ataque(self, intentos):
+        """Lanza `intentos` logins fallidos desde una IP y cuenta escrituras en la base de datos."""
+        with CaptureQueriesContext(connection) as consultas:
+            for indice in range(intentos):
+                response = self.client.post(reverse('login'), {'username': 'victima', 'password': f'mala{indice}'})
+        escrituras = [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        return len(escrituras), response
+
+    def test_prueba_de_carga_evita_escrituras(self):
+        with override_settings(LIMITE_LOGIN_POR_IP=10**6, LIMITE_LOGIN_POR_USUARIO=10**6):
+            sin_limite, _ = self._ataque(100)
+        cache.clear()
+        with override_settings(LIMITE_LOGIN_POR_IP=20, LIMITE_LOGIN_POR_USUARIO=5):
+            con_limite, response = self._ataque(100)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertTemplateUsed(response, 'core/lockout.html')
+        self.assertGreaterEqual(sin_limite, 100)
+        self.assertLessEqual(con_limite, sin_limite // 10)
+
+class MetricasTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        self.ajustes = override_settings(METRICAS_DIRECTORIO=self.directorio.name)
+        self.ajustes.enable()
+        metricas.reiniciar()
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+
+    def tearDown(self):
+        self.ajustes.disable()
+        self.directorio.cleanup()
+
+    def test_peticiones_por_nombre_de_ruta(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('lista_proyectos'))
+        self.client.get(reverse('lista_proyectos'))
+        self.client.get('/no-existe/')
+        texto = self.client.get(reverse('metricas_prometheus')).content.decode()
+        self.assertIn('# TYPE app_peticion_segundos histogram', texto)
+        self.assertIn('app_peticion_segundos_count{vista="lista_proyectos",metodo="GET",estado="200"} 2', texto)
+        self.assertIn('app_peticion_segundos_bucket{vista="lista_proyectos",metodo="GET",estado="200",le="+Inf"} 2', texto)
+        self.assertIn('app_peticion_segundos_count{vista="sin_ruta",metodo="GET",estado="404"} 1', texto)
+        self.assertIn('app_consultas_por_peticion_count{vista="lista_proyectos"} 2', texto)
+
+    def test_suma_los_archivos_de_otros_procesos(self):
+        metricas.MENSAJES_CHAT.inc('directo')
+        metricas.NOTIFICACIONES.observar(3, 'comentario')
+        otro = {
+            'app_mensajes_chat_total': {json.dumps(['directo']): 4},
+            'app_notificaciones_por_evento': {json.dumps(['comentario']): [0, 0, 0, 1] + [0] * 7 + [3]},
+            'metrica_retirada': {json.dumps([]): 1},
+        }
+        (metricas.Path(self.directorio.name) / '1-1.json').write_text(json.dumps(otro))
+        texto = metricas.exportar()
+        self.assertIn('app_mensajes_chat_total{ambito="directo"} 5', texto)
+        self.assertIn('app_notificaciones_por_evento_bucket{evento="comentario",le="2"} 0', texto)
+        self.assertIn('app_notificaciones_por_evento_bucket{evento="comentario",le="5"} 2', texto)
+        self.assertIn('app_notificaciones_por_evento_sum{evento="comentario"} 6', texto)
+        self.assertNotIn('metrica_retirada', texto)
+
+    def test_eventos_de_la_aplicacion(self):
+        otro = User.objects.create_user(username='otro', password='testpass123')
+        self.client.post(reverse('login'), {'username': 'testuser', 'password': 'mala'})
+        self.client.force_login(self.user)
+        self.client.post(reverse('enviar_mensaje_chat'), {'destinatario': otro.id, 'contenido': 'Hola'})
+        notificaciones.notificar_agrupada([self.user.id, otro.id], 'tarea_modificada:1', 'Cambio')
+        opciones.grupos_disponibles()
+        opciones.grupos_disponibles()
+        texto = metricas.exportar()
+        self.assertIn('app_logins_fallidos_total{motivo="credenciales"} 1', texto)
+        self.assertIn('app_mensajes_chat_total{ambito="directo"} 1', texto)
+        self.assertIn('app_notificaciones_por_evento_sum{evento="tarea_modificada"} 2', texto)
+        self.assertIn('app_cache_total{cache="opciones",resultado="acierto"} 1', texto)
+        self.assertIn('app_cache_total{cache="opciones",resultado="fallo"} 1', texto)
+
+    def test_solo_ips_permitidas_o_staff(self):
+        self.assertEqual(self.client.get(reverse('metricas_prometheus'), REMOTE_ADDR='203.0.113.5').status_code, 404)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('metricas_prometheus'), REMOTE_ADDR='203.0.113.5')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+class SesionesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        proyecto = Proyecto.objects.create(
+            titulo='Proyecto Test', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 2, 1), creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Grupo Test', proyecto=proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=proyecto, grupo=grupo, rol='miembro')
+
+    def test_sesion_fuera_de_la_bd_ahorra_consultas(self):
+        consultas_db, _ = benchmark_sesiones.medir_lista_proyectos(self.user, benchmark_sesiones.MOTORES['db'], 3)
+        for modo in ('cached_db', 'cookies'):
+            consultas, _ = benchmark_sesiones.medir_lista_proyectos(self.user, benchmark_sesiones.MOTORES[modo], 3)
+            self.assertEqual(consultas, consultas_db - 1, modo)
+
+    @override_settings(SESSION_MODO='db', SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_limpiar_sesiones_por_lotes(self):
+        ahora = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'caducada{i:04d}', session_data='', expire_date=ahora - timedelta(hours=1))
+             for i in range(25)]
+            + [Session(session_key='vigente', session_data='', expire_date=ahora + timedelta(hours=1))]
+        )
+        salida = StringIO()
+        call_command('limpiar_sesiones', tamano_lote=10, stdout=salida)
+        self.assertIn('25 sesiones caducadas borradas en 3 lotes', salida.getvalue())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['vigente'])
+
+class PurgaProyectosTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin_purga', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto grande', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.admin
+        )
+        self.otro_proyecto = Proyecto.objects.create(
+            titulo='Proyecto vecino', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.admin
+        )
+        self.grupo = Grupo.objects.create(nombre='Equipo', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.admin, proyecto=self.proyecto, grupo=self.grupo, rol='administrador')
+        # Perfil del proyecto vecino que apunta a un grupo del que se elimina
+        self.perfil_vecino = PerfilProyecto.objects.create(usuario=self.otro, proyecto=self.otro_proyecto, grupo=self.grupo)
+        tareas = Tarea.objects.bulk_create([
+            Tarea(proyecto=self.proyecto, titulo=f'Tarea {i}', descripcion='x', fecha_limite=date(2025, 3, 1))
+            for i in range(7)
+        ])
+        self.tarea_vecina = Tarea.objects.create(
+            proyecto=self.otro_proyecto, titulo='Vecina', descripcion='x', fecha_limite=date(2025, 3, 1)
+        )
+        self.tarea_vecina.dependencias.add(tareas[0])
+        for tarea in tareas:
+            tarea.usuarios_asignados.add(self.admin, self.otro)
+            Comentario.objects.create(tarea=tarea, usuario=self.admin, contenido='Hecho')
+        RecordatorioEnviado.objects.create(tarea=tareas[0], usuario=self.admin, tipo='proxima', fecha_limite=date(2025, 3, 1))
+        Notificacion.objects.create(usuario=self.otro, mensaje='Aviso', proyecto=self.proyecto)
+        Notificacion.objects.create(usuario=self.otro, mensaje='Vecino', proyecto=self.otro_proyecto)
+        Mensaje.objects.create(remitente=self.admin, destinatario=self.otro, proyecto=self.proyecto, contenido='Hola')
+        Actividad.objects.create(tipo='comentario', proyecto=self.proyecto, usuario=self.admin)
+
+    def test_eliminar_oculta_y_encarga_la_purga(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('eliminar_proyecto', args=[self.proyecto.id]))
+        self.assertRedirects(response, reverse('lista_proyectos'))
+        self.assertFalse(Proyecto.objects.filter(pk=self.proyecto.pk).exists())
+        self.assertTrue(Proyecto.todos.filter(pk=self.proyecto.pk).exists())
+        self.assertEqual(Tarea.objects.filter(proyecto_id=self.proyecto.pk).count(), 7)
+        self.assertEqual(PurgaProyecto.objects.get().proyecto_id, self.proyecto.pk)
+        self.assertNotIn(self.grupo.pk, [pk for pk, *_ in opciones.grupos_disponibles()])
+        self.assertEqual(self.client.get(reverse('lista_tareas', args=[self.proyecto.id])).status_code, 404)
+
+    def test_purga_por_lotes_reanudable(self):
+        pendiente = purga.eliminar(self.proyecto, self.admin)
+        lote_original, llamadas = purga._lote, []
+
+        def lote_que_falla(paso, proyecto_id, tamano):
+            llamadas.append(paso)
+            if len(llamadas) == 4:
+                raise RuntimeError('Proceso interrumpido')
+            return lote_original(paso, proyecto_id, tamano)
+
+        with mock.patch.object(purga, '_lote', lote_que_falla), self.assertRaises(RuntimeError):
+            call_command('purgar_proyectos', tamano_lote=3, stdout=StringIO())
+        pendiente.refresh_from_db()
+        # Los comentarios (7) van en lotes de 3: el tercer lote se confirmó y el cuarto no
+        self.assertEqual((pendiente.paso, pendiente.filas_borradas), (1, 7))
+        self.assertIsNone(pendiente.terminada_en)
+
+        salida = StringIO()
+        call_command('purgar_proyectos', tamano_lote=3, stdout=salida)
+        self.assertIn('Reanudando', salida.getvalue())
+        pendiente.refresh_from_db()
+        self.assertIsNotNone(pendiente.terminada_en)
+        self.assertFalse(Proyecto.todos.filter(pk=self.proyecto.pk).exists())
+        self.assertFalse(Tarea.objects.filter(proyecto_id=self.proyecto.pk).exists())
+        self.assertFalse(Comentario.objects.exists())
+        self.assertFalse(RecordatorioEnviado.objects.exists())
+        self.assertFalse(Actividad.objects.exists())
+        self.assertFalse(Mensaje.objects.exists())
+        self.assertFalse(Grupo.objects.exists())
+        # Lo del proyecto vecino sigue, sin la dependencia ni el grupo borrados
+        self.assertEqual(list(Notificacion.objects.values_list('mensaje', flat=True)), ['Vecino'])
+        self.assertFalse(self.tarea_vecina.dependencias.exists())
+        self.perfil_vecino.refresh_from_db()
+        self.assertIsNone(self.perfil_vecino.grupo_id)
+        self.assertEqual(Tarea.usuarios_asignados.through.objects.count(), 0)
+
+class ClonacionTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(username='admin_plantilla', password='testpass123')
+        self.miembro = User.objects.create_user(username='miembro', password='testpass123')
+        self.plantilla = Proyecto.objects.create(
+            titulo='Plantilla', descripcion='Lanzamiento', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 3, 1), creado_por=self.admin
+        )
+        self.grupo = Grupo.objects.create(nombre='Diseño', proyecto=self.plantilla)
+        PerfilProyecto.objects.create(usuario=self.admin, proyecto=self.plantilla, grupo=self.grupo, rol='administrador')
+        PerfilProyecto.objects.create(usuario=self.miembro, proyecto=self.plantilla, grupo=self.grupo, rol='invitado')
+        self.analisis = Tarea.objects.create(
+            proyecto=self.plantilla, titulo='Análisis', descripcion='x', fecha_limite=date(2025, 1, 10),
+            estado='completada', duracion_dias=3
+        )
+        self.desarrollo = Tarea.objects.create(
+            proyecto=self.plantilla, titulo='Desarrollo', descripcion='x', fecha_limite=date(2025, 2, 1)
+        )
+        self.desarrollo.dependencias.add(self.analisis)
+        self.desarrollo.usuarios_asignados.add(self.admin, self.miembro)
+
+    def test_clonar_copia_tareas_asignaciones_y_grupos(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            copia = clonacion.clonar(self.plantilla, 'Lanzamiento 2', date(2025, 4, 1), self.miembro)
+        self.assertEqual(copia.fecha_fin, date(2025, 5, 30))
+        tareas = {tarea.titulo: tarea for tarea in copia.tareas.all()}
+        self.assertEqual(tareas['Análisis'].fecha_limite, date(2025, 4, 10))
+        self.assertEqual((tareas['Análisis'].estado, tareas['Análisis'].duracion_dias), ('pendiente', 3))
+        self.assertEqual(list(tareas['Desarrollo'].dependencias.all()), [tareas['Análisis']])
+        self.assertEqual(set(tareas['Desarrollo'].usuarios_asignados.all()), {self.admin, self.miembro})
+        grupo = copia.grupos.get()
+        self.assertEqual(grupo.nombre, 'Diseño')
+        roles = dict(PerfilProyecto.objects.filter(proyecto=copia, grupo=grupo).values_list('usuario__username', 'rol'))
+        self.assertEqual(roles, {'admin_plantilla': 'administrador', 'miembro': 'administrador'})
+        # El original queda intacto
+        self.assertEqual(self.plantilla.tareas.count(), 2)
+        self.assertEqual(self.grupo.proyecto_id, self.plantilla.pk)
+        self.assertIn(grupo.pk, [pk for pk, *_ in opciones.grupos_disponibles()])
+
+    def test_vista_sin_grupos(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('clonar_proyecto', args=[self.plantilla.id]), {
+            'titulo': 'Copia', 'fecha_inicio': '2025-01-08'
+        })
+        copia = Proyecto.objects.get(titulo='Copia')
+        self.assertRedirects(response, reverse('lista_tareas', args=[copia.id]))
+        self.assertEqual(
+            list(PerfilProyecto.objects.filter(proyecto=copia).values_list('usuario__username', 'rol', 'grupo__nombre')),
+            [('admin_plantilla', 'administrador', 'Equipo Copia')]
+        )
+        self.assertEqual(copia.tareas.get(titulo='Desarrollo').fecha_limite, date(2025, 2, 8))
+
+    def test_solo_administradores(self):
+        self.client.force_login(self.miembro)
+        response = self.client.post(reverse('clonar_proyecto', args=[self.plantilla.id]), {
+            'titulo': 'Copia', 'fecha_inicio': '2025-01-08'
+        })
+        self.assertRedirects(response, reverse('lista_proyectos'))
+        self.assertFalse(Proyecto.objects.filter(titulo='Copia').exists())
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='integrador', password='testpass123')
+        self.otro = User.objects.create_user(username='ajeno', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto API', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Integraciones', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo, rol='administrador')
+        self.tareas = Tarea.objects.bulk_create([
+            Tarea(proyecto=self.proyecto, titulo=f'Tarea {i}', descripcion='x', fecha_limite=date(2025, 3, 1))
+            for i in range(5)
+        ])
+        for tarea in self.tareas:
+            tarea.usuarios_asignados.add(self.user, self.otro)
+            Comentario.objects.create(tarea=tarea, usuario=self.user, contenido=f'Sobre {tarea.titulo}')
+        self.url = reverse('api_tareas_proyecto', args=[self.proyecto.id])
+        self.client.force_login(self.user)
+
+    def test_paginacion_por_cursor(self):
+        titulos, parametros = [], {'limite': 2, 'fields': 'titulo'}
+        while True:
+            cuerpo = self.client.get(self.url, parametros).json()
+            titulos += [tarea['titulo'] for tarea in cuerpo['datos']]
+            self.assertEqual({clave for tarea in cuerpo['datos'] for clave in tarea}, {'id', 'titulo'})
+            if not cuerpo['siguiente']:
+                break
+            parametros['cursor'] = cuerpo['siguiente']
+        self.assertEqual(titulos, [f'Tarea {i}' for i in range(5)])
+        self.assertEqual(self.client.get(self.url, {'cursor': '%%%'}).status_code, 400)
+
+    def test_fields_reduce_el_select(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'fields': 'titulo,estado'})
+        self.assertEqual(response['Content-Type'], 'application/json')
+        sql = consultas.captured_queries[-1]['sql']
+        self.assertIn('"titulo"', sql)
+        self.assertNotIn('descripcion', sql)
+        self.assertEqual(self.client.get(self.url, {'fields': 'contrasena'}).status_code, 400)
+
+    def test_include_con_numero_fijo_de_consultas(self):
+        def consultas_por_pagina(limite):
+            with CaptureQueriesContext(connection) as consultas:
+                cuerpo = self.client.get(self.url, {'limite': limite, 'include': 'asignados,comentarios'}).json()
+            return len(consultas), cuerpo['datos']
+
+        pocas, _ = consultas_por_pagina(1)
+        muchas, datos = consultas_por_pagina(5)
+        self.assertEqual(pocas, muchas)
+        self.assertEqual([usuario['username'] for usuario in datos[0]['asignados']], ['ajeno', 'integrador'])
+        self.assertEqual(datos[4]['comentarios'][0]['contenido'], 'Sobre Tarea 4')
+
+    def test_permisos(self):
+        detalle = self.client.get(reverse('api_tarea', args=[self.tareas[0].id]), {'include': 'comentarios'})
+        self.assertEqual(detalle.json()['titulo'], 'Tarea 0')
+        self.client.force_login(self.otro)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_tarea', args=[self.tareas[0].id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('api_proyectos')).json(), {'datos': [], 'siguiente': None})
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('api_proyectos')).status_code, 401)
+
+class PanelTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='panel', password='testpass123')
+        self.externo = User.objects.create_user(username='externo', password='testpass123')
+        self.client.force_login(self.user)
+
+    def _crear_proyectos(self, cantidad, tareas_por_proyecto):
+        for i in range(cantidad):
+            proyecto = Proyecto.objects.create(
+                titulo=f'Panel {i}', descripcion='x', fecha_inicio=date(2025, 1, 1),
+                fecha_fin=date(2025, 6, 1), creado_por=self.user
+            )
+            grupo = Grupo.objects.create(nombre=f'Equipo {i}', proyecto=proyecto)
+            PerfilProyecto.objects.create(usuario=self.user, proyecto=proyecto, grupo=grupo)
+            for j in range(tareas_por_proyecto):
+                tarea = Tarea.objects.create(
+                    proyecto=proyecto, titulo=f'Tarea {i}.{j}', descripcion='x', fecha_limite=date(2025, 3, j + 1)
+                )
+                tarea.usuarios_asignados.add(self.user)
+                for k in range(4):
+                    Comentario.objects.create(tarea=tarea, usuario=self.user, contenido=f'Comentario {k}')
+                Comentario.objects.create(tarea=tarea, usuario=self.externo, contenido='Último')
+
+    def _consultar(self, consulta=None):
+        parametros = {'consulta': consulta} if consulta else {}
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse('api_panel'), parametros)
+        return response, len(consultas)
+
+    def test_consultas_constantes_y_usuarios_coalescidos(self):
+        self._crear_proyectos(1, 1)
+        _, pocas = self._consultar()
+        self._crear_proyectos(4, 3)
+        response, muchas = self._consultar()
+        self.assertEqual(pocas, muchas)
+        datos = response.json()['datos']['proyectos']
+        self.assertEqual(len(datos), 5)
+        tarea = datos[1]['tareas'][0]
+        self.assertEqual(tarea['asignados'], [{'id': self.user.id, 'username': 'panel'}])
+        # Los tres últimos, del más reciente al más antiguo
+        self.assertEqual([comentario['contenido'] for comentario in tarea['comentarios']], ['Último', 'Comentario 3', 'Comentario 2'])
+        self.assertEqual(tarea['comentarios'][0]['usuario'], {'id': self.externo.id, 'username': 'externo'})
+
+        seleccion, _ = panel.preparar(panel.CONSULTA_POR_DEFECTO, 4, 20000)
+        _, lotes = panel.ejecutar(seleccion, self.user)
+        # proyectos, tareas, asignados, comentarios y un único lote de usuarios (solo 'externo')
+        self.assertEqual(lotes, 5)
+
+    def test_limites_de_la_consulta(self):
+        self._crear_proyectos(3, 2)
+        response, _ = self._consultar('proyectos(2){titulo,tareas(1){titulo}}')
+        proyectos = response.json()['datos']['proyectos']
+        self.assertEqual([(p['titulo'], len(p['tareas'])) for p in proyectos], [('Panel 0', 1), ('Panel 1', 1)])
+        errores = {
+            'proyectos{titulo,tareas{comentarios{usuario{username}},asignados{username}}}': 200,
+            'proyectos{tareas{comentarios{usuario{id}}}},': 400,
+            'proyectos(100){tareas(200){titulo}}': 400,
+            'proyectos{contrasena}': 400,
+            'proyectos{tareas}': 400,
+            'proyectos(1000){titulo}': 400,
+        }
+        for consulta, esperado in errores.items():
+            self.assertEqual(self._consultar(consulta)[0].status_code, esperado, consulta)
+        with override_settings(PANEL_PROFUNDIDAD_MAXIMA=3):
+            response, _ = self._consultar('proyectos{tareas{comentarios{usuario{id}}}}')
+        self.assertIn('profundidad', response.json()['error'])
+
+    def test_anidamiento_extremo_no_agota_la_pila(self):
+        consulta = 'proyectos{' + 'tareas{' * 5000
+        with self.assertRaisesMessage(panel.ConsultaInvalida, 'profundidad máxima'):
+            panel.preparar(consulta, 4, 20000)
+        response, _ = self._consultar(consulta)
+        self.assertEqual(response.status_code, 400)
+
+class ComentariosTareaTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='comentarista', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Comentarios', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Equipo', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo)
+        self.tarea = Tarea.objects.create(
+            proyecto=self.proyecto, titulo='Hilo', descripcion='x', fecha_limite=date(2025, 3, 1)
+        )
+        self.client.force_login(self.user)
+
+    def test_contadores_desnormalizados(self):
+        primero = Comentario.objects.create(tarea=self.tarea, usuario=self.user, contenido='Uno')
+        segundo = Comentario.objects.create(tarea=self.tarea, usuario=self.user, contenido='Dos')
+        self.tarea.refresh_from_db()
+        self.assertEqual((self.tarea.num_comentarios, self.tarea.ultimo_comentario_at), (2, segundo.fecha_hora))
+        segundo.delete()
+        self.tarea.refresh_from_db()
+        self.assertEqual((self.tarea.num_comentarios, self.tarea.ultimo_comentario_at), (1, primero.fecha_hora))
+
+    def test_lista_tareas_sin_consultas_por_tarea(self):
+        def consultas():
+            with CaptureQueriesContext(connection) as capturadas:
+                response = self.client.get(reverse('lista_tareas', args=[self.proyecto.id]))
+            return len(capturadas), response
+
+        Comentario.objects.create(tarea=self.tarea, usuario=self.user, contenido='Uno')
+        pocas, _ = consultas()
+        for i in range(5):
+            tarea = Tarea.objects.create(
+                proyecto=self.proyecto, titulo=f'Otra {i}', descripcion='x', fecha_limite=date(2025, 3, 1)
+            )
+            Comentario.objects.create(tarea=tarea, usuario=self.user, contenido='Hola')
+        muchas, response = consultas()
+        self.assertEqual(pocas, muchas)
+        self.assertContains(response, 'Último comentario hace', count=6)
+
+    def test_paginacion_y_sondeo(self):
+        Comentario.objects.bulk_create([
+            Comentario(tarea=self.tarea, usuario=self.user, contenido=f'Comentario {i:03d}') for i in range(60)
+        ])
+        url = reverse('comentarios_tarea', args=[self.proyecto.id, self.tarea.id])
+        response = self.client.get(url)
+        recientes = response.context['comentarios']
+        self.assertEqual([recientes[0].contenido, recientes[-1].contenido], ['Comentario 010', 'Comentario 059'])
+        self.assertEqual(response.context['ultimo_id'], recientes[-1].id)
+        response = self.client.get(url, {'antes': response.context['anteriores']})
+        self.assertEqual([c.contenido for c in response.context['comentarios']][-1], 'Comentario 009')
+        self.assertIsNone(response.context['anteriores'])
+        self.assertIsNone(response.context['ultimo_id'])
+
+        nuevo = Comentario.objects.create(tarea=self.tarea, usuario=self.user, contenido='<b>Nuevo</b>')
+        datos = self.client.get(
+            reverse('comentarios_nuevos', args=[self.proyecto.id, self.tarea.id]), {'despues': recientes[-1].id}
+        ).json()
+        self.assertEqual([(c['id'], c['contenido'], c['propio']) for c in datos['comentarios']], [(nuevo.id, '<b>Nuevo</b>', True)])
+
+class CambiosTareasTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Cambios', descripcion='x', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1),
+            creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Equipo', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo)
+        self.tareas = [
+            Tarea.objects.create(proyecto=self.proyecto, titulo=f'Tarea {i}', descripcion='x', fecha_limite=date(2025, 3, 1))
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse('cambios_tareas', args=[self.proyecto.id])
+
+    def _version(self):
+        self.proyecto.refresh_from_db()
+        return self.proyecto.version_tareas
+
+    def test_devuelve_solo_lo_cambiado_desde_la_version(self):
+        response = self.client.get(reverse('lista_tareas', args=[self.proyecto.id]))
+        desde = self._version()
+        self.assertContains(response, f'data-version="{desde}"')
+        editada, borrada, intacta = self.tareas
+        editada.titulo = 'Tarea editada'
+        editada.save(update_fields=['titulo'])
+        borrada_id = borrada.id
+        borrada.delete()
+        nueva = Tarea.objects.create(proyecto=self.proyecto, titulo='Nueva', descripcion='x', fecha_limite=date(2025, 3, 1))
+        datos = self.client.get(self.url, {'desde': desde}).json()
+        self.assertEqual(datos['version'], desde + 3)
+        self.assertEqual([tarea['id'] for tarea in datos['tareas']], [editada.id, nueva.id])
+        self.assertIn('Tarea editada', datos['tareas'][0]['html'])
+        self.assertIn(f'data-tarea="{editada.id}"', datos['tareas'][0]['html'])
+        self.assertEqual(datos['eliminadas'], [borrada_id])
+        with self.assertNumQueries(2):  # Usuario y proyecto; sin cambios no se leen tareas
+            datos = self.client.get(self.url, {'desde': datos['version']}).json()
+        self.assertEqual((datos['tareas'], datos['eliminadas']), ([], []))
+
+    def test_filtros_comentarios_y_asignaciones(self):
+        desde = self._version()
+        completada, comentada, asignada = self.tareas
+        completada.estado = 'completada'
+        completada.save()
+        Comentario.objects.create(tarea=comentada, usuario=self.user, contenido='Hola')
+        asignada.usuarios_asignados.add(self.user)
+        datos = self.client.get(self.url, {'desde': desde, 'estado': 'pendiente'}).json()
+        self.assertEqual([tarea['id'] for tarea in datos['tareas']], [comentada.id, asignada.id])
+        self.assertEqual(datos['eliminadas'], [completada.id])
+        self.assertEqual(self.client.get(self.url, {'desde': desde + 10}).json(), {'version': desde + 3, 'recargar': True})
+        self.assertEqual(self.client.get(self.url, {'desde': 'x'}).status_code, 400)
+
+    def test_borrar_el_proyecto_no_deja_lapidas(self):
+        self.tareas[0].delete()
+        Proyecto.todos.filter(pk=self.proyecto.pk).delete()
+        self.assertFalse(TareaEliminada.objects.exists())
+        self.assertFalse(Tarea.objects.exists())
+
+class TableroTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.otro = User.objects.create_user(username='otro', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Tablero', descripcion='x', fecha_inicio=date(2025, 1, 1), fecha_fin=date(2025, 6, 1),
+            creado_por=self.user
+        )
+        grupo = Grupo.objects.create(nombre='Equipo', proyecto=self.proyecto)
+        PerfilProyecto.objects.create(usuario=self.user, proyecto=self.proyecto, grupo=grupo)
+        PerfilProyecto.objects.create(usuario=self.otro, proyecto=self.proyecto, grupo=grupo)
+        self.tareas = []
+        for i in range(4):
+            tarea = Tarea.objects.create(
+                proyecto=self.proyecto, titulo=f'Tarea {i}', descripcion='x', fecha_limite=date(2025, 3, 1)
+            )
+            tarea.usuarios_asignados.add(self.user, self.otro)
+            tarea.refresh_from_db()
+            self.tareas.append(tarea)
+        self.client.force_login(self.user)
+
+    def _mover(self, tarea, estado, revision, despues_de=None):
+        return self.client.patch(
+            reverse('mover_tarea', args=[self.proyecto.id, tarea.id]),
+            json.dumps({'estado': estado, 'revision': revision, 'despues_de': despues_de}),
+            content_type='application/json'
+        )
+
+    def _columna(self, estado):
+        columnas = {estado: tareas for estado, _, tareas in tablero.columnas(self.proyecto)}
+        return [tarea.id for tarea in columnas[estado]]
+
+    def test_tablero_agrupa_por_estado(self):
+        response = self.client.get(reverse('tablero_tareas', args=[self.proyecto.id]))
+        self.assertContains(response, 'data-estado="en_progreso"')
+        self.assertContains(response, f'data-revision="{self.tareas[0].revision}"')
+        self.assertEqual(self._columna('pendiente'), [tarea.id for tarea in self.tareas])
+
+    def test_mover_cambia_estado_y_orden(self):
+        a, b, c, d = self.tareas
+        # Las cuatro empatan a rango 0: colocar d tras a obliga a renumerar la columna
+        response = self._mover(d, 'pendiente', d.revision, despues_de=a.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._columna('pendiente'), [a.id, d.id, b.id, c.id])
+        # Renumerar no cambia la revisión de las demás: sus tarjetas siguen valiendo
+        self._mover(c, 'en_progreso', c.revision)
+        self._mover(b, 'en_progreso', b.revision, despues_de=c.id)
+        response = self._mover(a, 'en_progreso', a.revision)
+        self.assertEqual(response.json()['revision'], a.revision + 1)
+        self.assertEqual(self._columna('pendiente'), [d.id])
+        self.assertEqual(self._columna('en_progreso'), [a.id, c.id, b.id])
+        a.refresh_from_db()
+        d.refresh_from_db()
+        self.assertEqual(d.version, a.version - 3)
+        self.assertEqual(Actividad.objects.filter(tipo='tarea_estado').count(), 3)
+        self.assertEqual(Notificacion.objects.get(usuario=self.otro, clave_agrupacion=f'tarea_modificada:{c.id}').contador, 1)
+        self.assertFalse(Notificacion.objects.filter(clave_agrupacion=f'tarea_modificada:{d.id}').exists())
+
+    def test_conflicto_de_revision(self):
+        tarea = self.tareas[0]
+        self.assertEqual(self._mover(tarea, 'completada', tarea.revision).status_code, 200)
+        response = self._mover(tarea, 'en_progreso', tarea.revision)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['estado'], 'completada')
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'completada')
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.version_tareas, tarea.version)
+        # Editar la tarea también invalida la revisión que muestra el tablero
+        revision = tarea.revision
+        tarea.titulo = 'Renombrada'
+        tarea.save()
+        self.assertEqual(self._mover(tarea, 'pendiente', revision).status_code, 409)
+
+    def test_renumerar_da_version_y_el_conflicto_no_toca_nada(self):
+        a, b, c, d = self.tareas
+        self.proyecto.refresh_from_db()
+        version_proyecto = self.proyecto.version_tareas
+        # Con la revisión vieja no se renumera la columna ni se consume versión del proyecto
+        self.assertEqual(self._mover(d, 'pendiente', d.revision + 1, despues_de=a.id).status_code, 409)
+        self.assertEqual(set(Tarea.objects.filter(proyecto=self.proyecto).values_list('rango', flat=True)), {0})
+        self.proyecto.refresh_from_db()
+        self.assertEqual(self.proyecto.version_tareas, version_proyecto)
+        self.assertEqual(self._mover(d, 'pendiente', d.revision, despues_de=a.id).status_code, 200)
+        # Las renumeradas salen en el feed de cambios con la misma versión
+        datos = self.client.get(reverse('cambios_tareas', args=[self.proyecto.id]), {'desde': version_proyecto}).json()
+        self.assertEqual(datos['version'], version_proyecto + 1)
+        self.assertEqual({tarea['id'] for tarea in datos['tareas']}, {a.id, b.id, c.id, d.id})
+
+    def test_movimientos_simultaneos_en_el_proyecto(self):
+        a, b, c, d = self.tareas
+        calcular_rango, siguiente_version = tablero.calcular_rango, tablero.siguiente_version_tareas
+        segundo, transacciones_movimiento = {}, []
+
+        def con_otro_movimiento(*args):
+            transacciones_movimiento.append(connection.atomic_blocks[-1])
+            # El primer movimiento no ha terminado su transacción cuando llega el segundo
+            if not segundo:
+                segundo['respuesta'] = None
+                segundo['respuesta'] = self._mover(c, 'completada', c.revision)
+            return calcular_rango(*args)
+
+        def fuera_del_movimiento(proyecto_id):
+            # La fila del proyecto solo se bloquea después, en otra transacción
+            self.assertNotIn(connection.atomic_blocks[-1], transacciones_movimiento)
+            return siguiente_version(proyecto_id)
+
+        with mock.patch.object(tablero, 'calcular_rango', con_otro_movimiento), \
+                mock.patch.object(tablero, 'siguiente_version_tareas', fuera_del_movimiento):
+            primero = self._mover(a, 'en_progreso', a.revision)
+        self.assertEqual(primero.status_code, 200)
+        self.assertEqual(segundo['respuesta'].status_code, 200)
+        self.assertEqual(self._columna('en_progreso'), [a.id])
+        self.assertEqual(self._columna('completada'), [c.id])
+        # Cada movimiento tiene su versión en el feed, en el orden en que terminaron
+        a.refresh_from_db()
+        c.refresh_from_db()
+        self.assertEqual(a.version, c.version + 1)
+
+    def test_validacion_y_permisos(self):
+        tarea = self.tareas[0]
+        self.assertEqual(self._mover(tarea, 'archivada', tarea.revision).status_code, 400)
+        self.assertEqual(self._mover(tarea, 'completada', tarea.revision, despues_de=tarea.id).status_code, 400)
+        # La referencia inválida deshace también el cambio de estado
+        tarea.refresh_from_db()
+        self.assertEqual(tarea.estado, 'pendiente')
+        self.assertEqual(tarea.revision, 0)
+        self.assertEqual(self.client.post(reverse('mover_tarea', args=[self.proyecto.id, tarea.id])).status_code, 405)
+        tarea.usuarios_asignados.remove(self.user)
+        self.assertEqual(self._mover(tarea, 'completada', tarea.revision).status_code, 403)
+
+class NotificacionesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='avisado', password='testpass123')
+        self.otro = User.objects.create_user(username='editor', password='testpass123')
+        self.proyecto = Proyecto.objects.create(
+            titulo='Proyecto Avisos', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.otro
+        )
+        self.otro_proyecto = Proyecto.objects.create(
+            titulo='Otro', descripcion='Prueba', fecha_inicio=date(2025, 1, 1),
+            fecha_fin=date(2025, 6, 1), creado_por=self.otro
+        )
+        self.tarea = Tarea.objects.create(
+            proyecto=self.proyecto, titulo='Editada', descripcion='x', fecha_limite=date(2025, 3, 1)
+        )
+        self.client.force_login(self.user)
+
+    def _avisar(self, mensaje='Modificada'):
+        notificaciones.notificar_agrupada(
+            [self.user.id, self.otro.id], notificaciones.clave_tarea_modificada(self.tarea), mensaje, self.proyecto
+        )
+
+    def test_agrupa_avisos_sin_leer_de_la_misma_tarea(self):
+        self._avisar()
+        with self.assertNumQueries(2):
+            self._avisar('Modificada otra vez')
+        fila = Notificacion.objects.get(usuario=self.user)
+        self.assertEqual((fila.contador, fila.mensaje), (2, 'Modificada otra vez'))
+        fila.leida = True
+        fila.save()
+        self._avisar()
+        self.assertEqual(
+            list(Notificacion.objects.filter(usuario=self.user).order_by('id').values_list('leida', 'contador')),
+            [(True, 2), (False, 1)]
+        )
+        self.assertEqual(Notificacion.objects.get(usuario=self.otro).contador, 3)
+
+    def test_marcado_masivo(self):
+        for proyecto in (self.proyecto, self.otro_proyecto, self.proyecto):
+            Notificacion.objects.create(usuario=self.user, mensaje='Aviso', proyecto=proyecto)
+        Notificacion.objects.create(usuario=self.otro, mensaje='Ajena', proyecto=self.proyecto)
+        url = reverse('lista_notificaciones')
+        with self.assertNumQueries(1):
+            self.assertEqual(notificaciones.marcar_leidas(self.user, proyecto_id=self.proyecto.id), 2)
+        self.assertEqual(Notificacion.objects.filter(usuario=self.user, leida=False).count(), 1)
+
+        ultima = Notificacion.objects.filter(usuario=self.user).latest('id').id
+        posterior = Notificacion.objects.create(usuario=self.user, mensaje='Nueva', proyecto=self.proyecto)
+        self.client.post(url, {'marcar_todas': ultima})
+        self.assertEqual(list(Notificacion.objects.filter(usuario=self.user, leida=False)), [posterior])
+        self.assertFalse(Notificacion.objects.get(usuario=self.otro).leida)
+
+    def test_bandeja_json_no_marca_y_el_chat_marca_hasta_el_cursor(self):
+        antigua = Notificacion.objects.create(usuario=self.user, mensaje='Antigua')
+        datos = self.client.get(reverse('bandeja_entrada_json')).json()
+        self.assertFalse(Notificacion.objects.get(pk=antigua.pk).leida)
+        Notificacion.objects.create(usuario=self.user, mensaje='Posterior')
+        respuesta = self.client.post(reverse('marcar_notificaciones'), {'hasta': datos['ultima_notificacion']}).json()
+        self.assertEqual(respuesta, {'marcadas': 1, 'no_leidas': 1})
+        self.assertEqual(self.client.get(reverse('marcar_notificaciones')).status_code, 405)
+
+class ResumenesTests(TestCase):
+    def setUp(self):
+        self.ana = User.objects.create_user(username='ana', email='ana@example.com', password='testpass123')
+        self.luis = User.objects.create_user(username='luis', email='luis@example.com', password='testpass123')
+        self.sin_correo = User.objects.create_user(username='anonimo', password='testpass123')
+        for usuario in (self.ana, self.luis, self.sin_correo):
+            Notificacion.objects.create(usuario=usuario, mensaje=f'Aviso para {usuario.username}')
+
+    def test_un_correo_por_usuario_y_solo_lo_nuevo(self):
+        Notificacion.objects.create(usuario=self.ana, mensaje='Tarea <b>editada</b>', contador=3)
+        Notificacion.objects.create(usuario=self.luis, mensaje='Leída', leida=True)
+        # Lectura en streaming, una marca por lote y las métricas
+        with self.assertNumQueries(4):
+            ejecucion = resumenes.enviar(tamano_lote=1)
+        self.assertEqual((ejecucion.correos_enviados, ejecucion.notificaciones, ejecucion.lotes), (2, 3, 2))
+        self.assertEqual([correo.to for correo in mail.outbox], [['ana@example.com'], ['luis@example.com']])
+        self.assertEqual(mail.outbox[0].subject, 'Tienes 2 notificaciones sin leer')
+        self.assertIn('Tarea <b>editada</b> (3 veces)', mail.outbox[0].body)
+        self.assertEqual(
+            ResumenEnviado.objects.get(usuario=self.ana).ultima_notificacion_id,
+            Notificacion.objects.filter(usuario=self.ana).latest('id').id
+        )
+
+        mail.outbox.clear()
+        self.assertEqual(resumenes.enviar().correos_enviados, 0)
+        Notificacion.objects.create(usuario=self.ana, mensaje='Otra más')
+        resumenes.enviar()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('1 notificación sin leer', mail.outbox[0].body)
+        self.assertNotIn('Aviso para ana', mail.outbox[0].body)
+
+    def test_agrupa_despues_de_un_resumen(self):
+        clave = 'tarea_modificada:1'
+        notificaciones.notificar_agrupada([self.ana.id], clave, 'Tarea modificada')
+        resumenes.enviar()
+        mail.outbox.clear()
+        for _ in range(5):
+            notificaciones.notificar_agrupada([self.ana.id], clave, 'Tarea modificada otra vez')
+        self.assertEqual(resumenes.enviar().correos_enviados, 1)
+        self.assertIn('Tarea modificada otra vez (5 veces)', mail.outbox[0].body)
+        self.assertEqual(
+            list(Notificacion.objects.filter(usuario=self.ana, clave_agrupacion=clave).order_by('id').values_list('contador', flat=True)),
+            [1, 5]
+        )
+
+    def test_limita_las_notificaciones_listadas(self):
+        Notificacion.objects.bulk_create([Notificacion(usuario=self.ana, mensaje=f'Extra {i}') for i in range(4)])
+        resumenes.enviar(maximo=2)
+        cuerpo = next(correo.body for correo in mail.outbox if correo.to == ['ana@example.com'])
+        self.assertIn('Y 3 más', cuerpo)
+        self.assertNotIn('Extra 1', cuerpo)
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('enviar_resumenes', stdout=salida)
+        self.assertIn('2 correos', salida.getvalue())
+
+class LoadtestTests(LiveServerTestCase):
+    def test_sembrar_y_generar_carga(self):
+        call_command(
+            'sembrar_loadtest', usuarios=4, proyectos=2, miembros_por_proyecto=2, tareas_por_proyecto=3,
+            notificaciones_por_usuario=2, stdout=StringIO()
+        )
+        self.assertEqual(PerfilProyecto.objects.filter(usuario__username__startswith='carga_').values('usuario').distinct().count(), 4)
+        salida = StringIO()
+        call_command(
+            'loadtest', url=self.live_server_url, usuarios=2, procesos=2, duracion=1, rampa=0, pausa=0,
+            mezcla='lista_proyectos=1,lista_tareas=1,bandeja_json=1', stdout=salida
+        )
+        lineas = {linea.split()[0]: linea.split() for linea in salida.getvalue().splitlines() if linea.strip()}
+        self.assertEqual(lineas['login'][1:3], ['2', '0'])
+        self.assertEqual(lineas['total'][2], '0')
+
+    def test_resumen_y_percentiles(self):
+        tiempos = {'lista_proyectos': [0.010, 0.020, 0.030, 0.040], 'login': [0.5]}
+        errores = Counter({('lista_proyectos', '500'): 1, ('login', '429'): 1})
+        filas = {fila[0]: fila for fila in loadtest.resumir(tiempos, errores, duracion=2)}
+        self.assertEqual(filas['lista_proyectos'][:3], ('lista_proyectos', 5, 1))
+        self.assertAlmostEqual(filas['lista_proyectos'][4], 2.0)
+        self.assertAlmostEqual(filas['lista_proyectos'][6], 30.0)
+        self.assertEqual(filas['total'][1:3], (5, 1))
+        self.assertEqual(loadtest.percentil([], 0.5), 0.0)
+
+class SeedScaleTests(TestCase):
+    def test_genera_datos_coherentes(self):
+        salida = StringIO()
+        call_command('seed_scale', usuarios=30, proyectos=4, tamano_lote=50, stdout=salida)
+        self.assertIn('Total (bulk_create)', salida.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='escala_').count(), 30)
+        self.assertEqual(Proyecto.objects.count(), 4)
+        tareas = Tarea.objects.annotate(reales=Count('comentarios'))
+        self.assertFalse(tareas.exclude(num_comentarios=F('reales')).exists())
+        self.assertFalse(Tarea.objects.filter(usuarios_asignados__isnull=True).exists())
+        conversacion = Conversacion.objects.order_by('id').first()
+        ultimo = conversacion.mensajes.order_by('-fecha_hora').first()
+        self.assertEqual(conversacion.ultimo_mensaje_at, ultimo.fecha_hora)
+        self.assertEqual(conversacion.participaciones.count(), 2)
+        # Las fechas generadas no se sustituyen por la hora actual (auto_now_add)
+        self.assertGreater(Notificacion.objects.values('fecha').distinct().count(), 1)
+        # Las secuencias siguen desde los ids asignados a mano
+        self.assertGreater(Notificacion.objects.create(usuario=User.objects.first(), mensaje='x').id, 1)
+        with self.assertRaises(CommandError):
+            call_command('seed_scale', usuarios=1, proyectos=1, stdout=StringIO())
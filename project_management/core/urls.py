@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.lista_proyectos, name='lista_proyectos'),
@@ -9,18 +9,43 @@ urlpatterns = [
     path('grupos/gestionar/', views.gestionar_grupos, name='gestionar_grupos'),
     path('proyectos/<int:proyecto_id>/editar/', views.editar_proyecto, name='editar_proyecto'),
     path('proyectos/<int:proyecto_id>/tareas/', views.lista_tareas, name='lista_tareas'),
+    path('proyectos/<int:proyecto_id>/tareas/cambios/', views.cambios_tareas, name='cambios_tareas'),
     path('proyectos/<int:proyecto_id>/tareas/crear/', views.crear_tarea, name='crear_tarea'),
+    path('proyectos/<int:proyecto_id>/tablero/', views.tablero_tareas, name='tablero_tareas'),
+    path('proyectos/<int:proyecto_id>/tareas/<int:tarea_id>/mover/', views.mover_tarea, name='mover_tarea'),
     path('proyectos/<int:proyecto_id>/tareas/<int:tarea_id>/editar/', views.editar_tarea, name='editar_tarea'),
     path('proyectos/<int:proyecto_id>/mensajes/', views.mensajes_proyecto, name='mensajes_proyecto'),
     path('proyectos/<int:proyecto_id>/tareas/<int:tarea_id>/comentarios/', views.comentarios_tarea, name='comentarios_tarea'),
+    path('proyectos/<int:proyecto_id>/tareas/<int:tarea_id>/comentarios/nuevos/', views.comentarios_nuevos, name='comentarios_nuevos'),
     path('proyectos/<int:proyecto_id>/grupos/<int:grupo_id>/asignar/', views.asignar_usuario_grupo, name='asignar_usuario_grupo'),
     path('notificaciones/', views.lista_notificaciones, name='lista_notificaciones'),
+    path('notificaciones/marcar/', views.marcar_notificaciones, name='marcar_notificaciones'),
     path('usuarios/crear/', views.crear_usuario, name='crear_usuario'),
     path('proyectos/<int:proyecto_id>/eliminar/', views.eliminar_proyecto, name='eliminar_proyecto'),
+    path('proyectos/<int:proyecto_id>/clonar/', views.clonar_proyecto, name='clonar_proyecto'),
     path('proyectos/<int:proyecto_id>/tareas/<int:tarea_id>/eliminar/', views.eliminar_tarea, name='eliminar_tarea'),
+    path('perfiles/', views.lista_perfiles, name='lista_perfiles'),
+    path('informes/carga/', views.informe_carga, name='informe_carga'),
+    path('informes/carga/csv/', views.informe_carga_csv, name='informe_carga_csv'),
     path('lockout/', views.lockout, name='lockout'),
+    path('metrics', views.metricas_prometheus, name='metricas_prometheus'),
     path('bandeja/json/', views.bandeja_entrada_json, name='bandeja_entrada_json'),
     path('bandeja/', views.bandeja_entrada, name='bandeja_entrada'),
+    path('conversaciones/<int:conversacion_id>/', views.ver_conversacion, name='ver_conversacion'),
     path('mensajes/responder/<int:mensaje_id>/', views.responder_mensaje, name='responder_mensaje'),
     path('mensajes/enviar/', views.enviar_mensaje_chat, name='enviar_mensaje_chat'),
+    path('usuarios/autocompletar/', views.autocompletar_usuarios, name='autocompletar_usuarios'),
+    path('proyectos/autocompletar/', views.autocompletar_proyectos, name='autocompletar_proyectos'),
+    path('tareas/autocompletar/', views.autocompletar_tareas, name='autocompletar_tareas'),
+    path('proyectos/<int:proyecto_id>/gantt/', views.diagrama_gantt, name='diagrama_gantt'),
+    path('proyectos/<int:proyecto_id>/actividad/', views.actividad_proyecto, name='actividad_proyecto'),
+    path('actividad/', views.actividad_usuario, name='actividad_usuario'),
+    path('proyectos/<int:proyecto_id>/planificacion/', views.planificacion_json, name='planificacion_json'),
+    path('api/v1/proyectos/', api.proyectos, name='api_proyectos'),
+    path('api/v1/proyectos/<int:proyecto_id>/', api.proyecto, name='api_proyecto'),
+    path('api/v1/proyectos/<int:proyecto_id>/tareas/', api.tareas_proyecto, name='api_tareas_proyecto'),
+    path('api/v1/tareas/<int:tarea_id>/', api.tarea, name='api_tarea'),
+    path('api/v1/tareas/<int:tarea_id>/comentarios/', api.comentarios_tarea, name='api_comentarios_tarea'),
+    path('api/v1/grupos/', api.grupos, name='api_grupos'),
+    path('api/v1/panel/', api.consulta_panel, name='api_panel'),
 ]
\ No newline at end of file
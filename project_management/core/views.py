@@ -1,14 +1,30 @@
+import hashlib
+import json
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, user_passes_test
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
-from django.http import JsonResponse
-from django.db import models
-from .models import Proyecto, Tarea, Comentario, Mensaje, PerfilProyecto, Grupo, Notificacion, User
+from django.http import HttpResponse, JsonResponse, Http404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.db import models, transaction
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.template.loader import get_template
+from django.db.models import Count, Max, Q, Sum
+from .models import (
+    Proyecto, Tarea, TareaEliminada, Comentario, Mensaje, PerfilProyecto, Grupo, Notificacion, User,
+    ParticipanteConversacion, grupos_activos, proyectos_del_usuario, proyectos_administrados
+)
 from .forms import (
     ProyectoForm, TareaForm, MensajeForm, ComentarioForm, GrupoForm, 
-    AsignarUsuarioGrupoForm, CrearUsuarioForm
+    AsignarUsuarioGrupoForm, CrearUsuarioForm, ClonarProyectoForm
 )
 from django.conf import settings
+from . import (
+    actividad, clonacion, metricas, notificaciones, opciones, perfilado, planificacion, purga, reportes, tablero
+)
 
 # Vista para listar proyectos
 @login_required
@@ -32,7 +48,7 @@ def es_admin_o_superusuario(user):
 def crear_usuario(request):
     """Permite a administradores o superusuarios crear nuevos usuarios."""
     if request.method == 'POST':
-        form = CrearUsuarioForm(request.POST)
+        form = CrearUsuarioForm(request.POST, usuario=request.user)
         if form.is_valid():
             usuario = form.save()
             messages.success(request, f"Usuario '{usuario.username}' creado exitosamente.")
@@ -40,13 +56,7 @@ def crear_usuario(request):
         else:
             messages.error(request, "Error al crear el usuario. Revisa los datos ingresados.")
     else:
-        form = CrearUsuarioForm()
-        if not request.user.is_superuser:
-            proyectos_admin = Proyecto.objects.filter(
-                perfilproyecto__usuario=request.user, 
-                perfilproyecto__rol='administrador'
-            )
-            form.fields['proyecto'].queryset = proyectos_admin
+        form = CrearUsuarioForm(usuario=request.user)
     return render(request, 'core/crear_usuario.html', {'form': form})
 
 # Vista para crear un proyecto
@@ -88,6 +98,16 @@ def crear_proyecto(request):
         form = ProyectoForm()
     return render(request, 'core/crear_proyecto.html', {'form': form})
 
+def _filtrar_tareas(request, tareas):
+    """Aplica los filtros ?estado= y ?usuario= de lista_tareas."""
+    estado = request.GET.get('estado')
+    usuario_asignado = request.GET.get('usuario')
+    if estado:
+        tareas = tareas.filter(estado=estado)
+    if usuario_asignado:
+        tareas = tareas.filter(usuarios_asignados__id=usuario_asignado)
+    return tareas
+
 # Vista para listar tareas de un proyecto
 @login_required
 def lista_tareas(request, proyecto_id):
@@ -96,18 +116,55 @@ def lista_tareas(request, proyecto_id):
         Proyecto.objects.filter(grupos__miembros=request.user).select_related('creado_por'), 
         id=proyecto_id
     )
-    tareas = Tarea.objects.filter(proyecto=proyecto).prefetch_related('usuarios_asignados')
-    estado = request.GET.get('estado')
-    usuario_asignado = request.GET.get('usuario')
-    if estado:
-        tareas = tareas.filter(estado=estado)
-    if usuario_asignado:
-        tareas = tareas.filter(usuarios_asignados__id=usuario_asignado)
+    tareas = _filtrar_tareas(request, Tarea.objects.filter(proyecto=proyecto).prefetch_related('usuarios_asignados'))
     usuarios_proyecto = User.objects.filter(grupos__proyecto=proyecto).distinct()
     return render(request, 'core/lista_tareas.html', {
         'proyecto': proyecto, 
         'tareas': tareas, 
-        'usuarios_proyecto': usuarios_proyecto
+        'usuarios_proyecto': usuarios_proyecto,
+        # Una consulta sobre actividad_proyecto_idx en vez de unir tareas, comentarios y mensajes
+        'actividad_reciente': proyecto.actividad.select_related('usuario').order_by('-id')[:10]
+    })
+
+# Cambios por encima de los cuales cambios_tareas pide recargar la lista entera
+MAXIMO_CAMBIOS_TAREAS = 200
+
+@login_required
+def cambios_tareas(request, proyecto_id):
+    """Tareas creadas, modificadas o eliminadas desde ?desde=<versión>, para el sondeo de lista_tareas.
+
+    Con los mismos filtros que la lista: una tarea cambiada que ya no los cumple
+    se devuelve como eliminada. Cada tarea va renderizada con la misma plantilla
+    que usa la lista.
+    """
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user).only('id', 'version_tareas'), id=proyecto_id)
+    try:
+        desde = int(request.GET.get('desde', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Parámetro desde inválido'}, status=400)
+    version = proyecto.version_tareas
+    if desde == version:
+        return JsonResponse({'version': version, 'tareas': [], 'eliminadas': []})
+    if desde > version:  # La base de datos se ha restaurado desde una copia anterior
+        return JsonResponse({'version': version, 'recargar': True})
+    cambiadas = Tarea.objects.filter(proyecto=proyecto, version__gt=desde, version__lte=version)
+    ids_cambiadas = set(cambiadas.values_list('id', flat=True)[:MAXIMO_CAMBIOS_TAREAS + 1])
+    if len(ids_cambiadas) > MAXIMO_CAMBIOS_TAREAS:
+        return JsonResponse({'version': version, 'recargar': True})
+    visibles = list(_filtrar_tareas(request, cambiadas).order_by('id')) if ids_cambiadas else []
+    eliminadas = ids_cambiadas - {tarea.id for tarea in visibles}
+    eliminadas.update(TareaEliminada.objects.filter(
+        proyecto=proyecto, version__gt=desde, version__lte=version
+    ).values_list('tarea_id', flat=True))
+    plantilla = get_template('core/tarea_tarjeta.html')
+    return JsonResponse({
+        'version': version,
+        'tareas': [
+            # Sin request: los context processors costarían consultas que la tarjeta no usa
+            {'id': tarea.id, 'html': plantilla.render({'tarea': tarea, 'proyecto': proyecto})}
+            for tarea in visibles
+        ],
+        'eliminadas': sorted(eliminadas),
     })
 
 # Vista para crear una tarea
@@ -123,8 +180,12 @@ def crear_tarea(request, proyecto_id):
             tarea = form.save(commit=False)
             tarea.proyecto = proyecto
             tarea.save()
+            form.save_m2m()
             tarea.usuarios_asignados.add(request.user)
-            for usuario in tarea.usuarios_asignados.all():
+            actividad.registrar('tarea_creada', proyecto, request.user, tarea)
+            asignados = list(tarea.usuarios_asignados.all())
+            metricas.NOTIFICACIONES.observar(len(asignados), 'tarea_asignada')
+            for usuario in asignados:
                 if not Notificacion.objects.filter(
                     usuario=usuario,
                     mensaje__contains=f"Te han asignado la tarea '{tarea.titulo}'",
@@ -167,6 +228,8 @@ def editar_proyecto(request, proyecto_id):
             proyecto.fecha_inicio = form.cleaned_data['fecha_inicio']
             proyecto.fecha_fin = form.cleaned_data['fecha_fin']
             proyecto.save()
+            if form.changed_data:
+                actividad.registrar('proyecto_editado', proyecto, request.user, campos=form.changed_data)
 
             # Obtener los grupos seleccionados en el formulario
             nuevos_grupos = form.cleaned_data['grupos']
@@ -204,23 +267,93 @@ def editar_tarea(request, proyecto_id, tarea_id):
         messages.warning(request, "No tienes permiso para editar esta tarea.")
         return redirect('lista_tareas', proyecto_id=proyecto.id)
     if request.method == 'POST':
+        # El formulario modifica la instancia al validar: se guarda antes el estado anterior
+        estado_anterior = tarea.estado
+        asignados_antes = dict(tarea.usuarios_asignados.values_list('id', 'username'))
         form = TareaForm(request.POST, instance=tarea, proyecto=proyecto)
         if form.is_valid():
-            form.save()
-            for usuario in tarea.usuarios_asignados.exclude(id=request.user.id):
-                Notificacion.objects.create(
-                    usuario=usuario,
-                    mensaje=f"La tarea '{tarea.titulo}' en el proyecto '{proyecto.titulo}' ha sido modificada",
-                    proyecto=proyecto
+            try:
+                with transaction.atomic():
+                    form.save()
+                    # La validación del formulario usa la planificación cacheada, que puede ir
+                    # por detrás de otro worker: se repite contra la base de datos antes del commit
+                    dependencias = form.cleaned_data['dependencias']
+                    if 'dependencias' in form.changed_data and planificacion.crearia_ciclo(
+                        proyecto.id, tarea.id, [dependencia.pk for dependencia in dependencias]
+                    ):
+                        raise planificacion.CicloError('Las dependencias de las tareas forman un ciclo.')
+            except planificacion.CicloError:
+                form.add_error('dependencias', "Estas dependencias crearían un ciclo entre tareas.")
+            else:
+                actividad.registrar_cambios_tarea(
+                    tarea, request.user, estado_anterior, asignados_antes, form.changed_data
                 )
-            messages.success(request, f"Tarea '{tarea.titulo}' actualizada exitosamente.")
-            return redirect('lista_tareas', proyecto_id=proyecto.id)
-        else:
-            messages.error(request, "Error al actualizar la tarea. Verifica los datos.")
+                notificaciones.notificar_agrupada(
+                    tarea.usuarios_asignados.exclude(id=request.user.id).values_list('id', flat=True),
+                    notificaciones.clave_tarea_modificada(tarea),
+                    f"La tarea '{tarea.titulo}' en el proyecto '{proyecto.titulo}' ha sido modificada",
+                    proyecto
+                )
+                messages.success(request, f"Tarea '{tarea.titulo}' actualizada exitosamente.")
+                return redirect('lista_tareas', proyecto_id=proyecto.id)
+        messages.error(request, "Error al actualizar la tarea. Verifica los datos.")
     else:
         form = TareaForm(instance=tarea, proyecto=proyecto)
     return render(request, 'core/editar_tarea.html', {'form': form, 'proyecto': proyecto, 'tarea': tarea})
 
+# Vista del tablero Kanban de un proyecto
+@login_required
+def tablero_tareas(request, proyecto_id):
+    """Tareas del proyecto en una columna por estado, ordenadas por rango."""
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user), id=proyecto_id)
+    return render(request, 'core/tablero_tareas.html', {
+        'proyecto': proyecto,
+        'columnas': tablero.columnas(proyecto),
+    })
+
+@login_required
+def mover_tarea(request, proyecto_id, tarea_id):
+    """PATCH con {estado, revision, despues_de}: mueve la tarjeta sin pasar por TareaForm.
+
+    Responde 409 con el estado actual de la tarea si otro usuario la ha
+    cambiado desde `revision`.
+    """
+    if request.method != 'PATCH':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user).only('id', 'titulo'), id=proyecto_id)
+    tarea = get_object_or_404(Tarea.objects.only('id', 'proyecto_id', 'titulo', 'estado'), id=tarea_id, proyecto=proyecto)
+    puede = request.user.is_superuser or tarea.usuarios_asignados.filter(id=request.user.id).exists() or (
+        PerfilProyecto.objects.filter(usuario=request.user, proyecto=proyecto, rol='administrador').exists()
+    )
+    if not puede:
+        return JsonResponse({'error': 'No tienes permiso para editar esta tarea'}, status=403)
+    try:
+        datos = json.loads(request.body)
+        estado, revision = datos['estado'], int(datos['revision'])
+        despues_de = int(datos['despues_de']) if datos.get('despues_de') is not None else None
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'Parámetros inválidos'}, status=400)
+    if estado not in dict(Tarea.ESTADO_OPCIONES):
+        return JsonResponse({'error': 'Estado inválido'}, status=400)
+    try:
+        movida = tablero.mover(tarea.id, proyecto.id, revision, estado, despues_de)
+    except Tarea.DoesNotExist:
+        return JsonResponse({'error': 'La tarea de referencia no está en esa columna'}, status=400)
+    if movida is None:
+        actual = Tarea.objects.filter(id=tarea.id).values('estado', 'rango', 'revision').first()
+        return JsonResponse({'error': 'La tarea ha cambiado', **(actual or {})}, status=409)
+    nueva_revision, rango = movida
+    if estado != tarea.estado:
+        estado_anterior, tarea.estado = tarea.estado, estado
+        actividad.registrar_cambio_estado(tarea, request.user, estado_anterior)
+        notificaciones.notificar_agrupada(
+            tarea.usuarios_asignados.exclude(id=request.user.id).values_list('id', flat=True),
+            notificaciones.clave_tarea_modificada(tarea),
+            f"La tarea '{tarea.titulo}' en el proyecto '{proyecto.titulo}' ha sido modificada",
+            proyecto
+        )
+    return JsonResponse({'estado': estado, 'rango': rango, 'revision': nueva_revision})
+
 # Vista para mensajes en un proyecto
 @login_required
 def mensajes_proyecto(request, proyecto_id):
@@ -259,6 +392,9 @@ def mensajes_proyecto(request, proyecto_id):
         'form': form
     })
 
+# Comentarios por página en comentarios_tarea y por respuesta de comentarios_nuevos
+TAMANO_PAGINA_COMENTARIOS = 50
+
 # Vista para comentarios en una tarea
 @login_required
 def comentarios_tarea(request, proyecto_id, tarea_id):
@@ -268,8 +404,6 @@ def comentarios_tarea(request, proyecto_id, tarea_id):
         id=proyecto_id
     )
     tarea = get_object_or_404(Tarea, id=tarea_id, proyecto=proyecto)
-    comentarios = Comentario.objects.filter(tarea=tarea).select_related('usuario').order_by('fecha_hora')
-    
     if request.method == 'POST':
         form = ComentarioForm(request.POST)
         if form.is_valid():
@@ -277,7 +411,13 @@ def comentarios_tarea(request, proyecto_id, tarea_id):
             comentario.tarea = tarea
             comentario.usuario = request.user
             comentario.save()
-            for usuario in tarea.usuarios_asignados.exclude(id=request.user.id):
+            actividad.registrar(
+                'comentario', proyecto, request.user, tarea,
+                fragmento=comentario.contenido[:actividad.LONGITUD_FRAGMENTO]
+            )
+            destinatarios = list(tarea.usuarios_asignados.exclude(id=request.user.id))
+            metricas.NOTIFICACIONES.observar(len(destinatarios), 'comentario')
+            for usuario in destinatarios:
                 Notificacion.objects.create(
                     usuario=usuario,
                     mensaje=f"Nuevo comentario en la tarea '{tarea.titulo}' por {request.user.username}",
@@ -289,19 +429,58 @@ def comentarios_tarea(request, proyecto_id, tarea_id):
             messages.error(request, "Error al añadir el comentario. Verifica el contenido.")
     else:
         form = ComentarioForm()
+    # Página de los más recientes (o de los anteriores a ?antes=<id>), mostrada en orden cronológico
+    try:
+        antes = int(request.GET.get('antes', 0))
+    except ValueError:
+        antes = 0
+    comentarios = tarea.comentarios.select_related('usuario').order_by('-id')
+    if antes:
+        comentarios = comentarios.filter(id__lt=antes)
+    pagina = list(comentarios[:TAMANO_PAGINA_COMENTARIOS + 1])
+    anteriores = pagina[TAMANO_PAGINA_COMENTARIOS - 1].id if len(pagina) > TAMANO_PAGINA_COMENTARIOS else None
+    pagina = pagina[:TAMANO_PAGINA_COMENTARIOS][::-1]
     return render(request, 'core/comentarios_tarea.html', {
         'proyecto': proyecto, 
         'tarea': tarea, 
-        'comentarios': comentarios, 
+        'comentarios': pagina, 
+        'anteriores': anteriores,
+        # Solo la página más reciente recibe los nuevos por sondeo
+        'ultimo_id': (pagina[-1].id if pagina else 0) if not antes else None,
         'form': form
     })
 
+@login_required
+def comentarios_nuevos(request, proyecto_id, tarea_id):
+    """Comentarios con id mayor que ?despues=<id>, para el sondeo de comentarios_tarea."""
+    tarea = get_object_or_404(
+        Tarea.objects.filter(proyecto__in=proyectos_del_usuario(request.user)), id=tarea_id, proyecto_id=proyecto_id
+    )
+    try:
+        despues = int(request.GET.get('despues', 0))
+    except ValueError:
+        return JsonResponse({'error': 'Parámetro despues inválido'}, status=400)
+    comentarios = list(
+        tarea.comentarios.filter(id__gt=despues).order_by('id')
+        .values_list('id', 'usuario_id', 'usuario__username', 'contenido', 'fecha_hora')[:TAMANO_PAGINA_COMENTARIOS]
+    )
+    return JsonResponse({
+        'comentarios': [
+            {
+                'id': pk, 'usuario': username, 'contenido': contenido, 'propio': usuario_id == request.user.id,
+                'fecha_hora': date_format(timezone.localtime(fecha_hora), 'DATETIME_FORMAT'),
+            }
+            for pk, usuario_id, username, contenido, fecha_hora in comentarios
+        ],
+        'num_comentarios': tarea.num_comentarios,
+    })
+
 # Vista para gestionar grupos en un proyecto
 @login_required
 @user_passes_test(es_admin_o_superusuario, login_url='lista_proyectos')
 def gestionar_grupos(request):
     """Permite a administradores gestionar todos los grupos del sistema."""
-    grupos = Grupo.objects.all().select_related('proyecto')
+    grupos = grupos_activos().select_related('proyecto')
     # Obtener los usuarios de cada grupo
     for grupo in grupos:
         grupo.usuarios = PerfilProyecto.objects.filter(grupo=grupo).select_related('usuario')
@@ -351,7 +530,6 @@ def asignar_usuario_grupo(request, proyecto_id, grupo_id):
             messages.error(request, "Error al asignar el usuario. Verifica los datos.")
     else:
         form = AsignarUsuarioGrupoForm(proyecto=proyecto, grupo=grupo)
-        form.fields['usuario'].queryset = User.objects.all()
     return render(request, 'core/asignar_usuario_grupo.html', {
         'proyecto': proyecto, 
         'grupo': grupo, 
@@ -359,21 +537,93 @@ def asignar_usuario_grupo(request, proyecto_id, grupo_id):
         'usuarios_actuales': usuarios_actuales
     })
 
+# Funciones auxiliares para GET condicional (ETag) en los listados
+def _etag_listado(calcular):
+    """Construye la función de ETag de una vista a partir de `calcular(request)`.
+
+    El ETag incluye al usuario y su cookie CSRF, porque la página los muestra.
+    Con mensajes flash pendientes no hay ETag: una copia cacheada no los mostraría.
+    """
+    def etag(request, *args, **kwargs):
+        if len(messages.get_messages(request)):  # len() no marca los mensajes como leídos
+            return None
+        partes = (
+            request.user.pk, request.user.is_staff,
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''), *calcular(request)
+        )
+        return hashlib.md5(repr(partes).encode()).hexdigest()
+    return etag
+
+def _estado_notificaciones(request):
+    """Total, no leídas y última fecha: cambia con altas, bajas y marcas de leída."""
+    return Notificacion.objects.filter(usuario=request.user).aggregate(
+        total=Count('id'), no_leidas=Count('id', filter=Q(leida=False)), ultima=Max('fecha')
+    ).values()
+
+def _estado_bandeja(request):
+    """Cambia con cada mensaje nuevo, con cada lectura y con renombres de usuarios.
+
+    Las versiones de core.opciones están en la caché compartida: todos los
+    workers calculan el mismo ETag tras una invalidación hecha en cualquiera.
+    """
+    return (*_conversaciones_de(request.user).order_by().aggregate(
+        total=Count('id'), ultimo=Max('ultimo_mensaje_at'), no_leidos=Sum('no_leidos')
+    ).values(), *opciones.versiones('global'))
+
+def _estado_grupos(request):
+    """Versiones (compartidas entre workers) que incrementan las señales de grupos, usuarios, perfiles y proyectos."""
+    return opciones.versiones('global', 'grupos')
+
 # Vista para listar notificaciones
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_listado(_estado_notificaciones))
 def lista_notificaciones(request):
-    """Muestra las notificaciones del usuario y permite marcarlas como leídas."""
-    notificaciones = Notificacion.objects.filter(
+    """Muestra las notificaciones del usuario y permite marcarlas como leídas, una a una o en bloque."""
+    if request.method == 'POST':
+        try:
+            if 'marcar_leida' in request.POST:
+                marcadas = Notificacion.objects.filter(
+                    id=int(request.POST['marcar_leida']), usuario=request.user, leida=False
+                ).update(leida=True)
+            elif 'marcar_proyecto' in request.POST:
+                marcadas = notificaciones.marcar_leidas(request.user, proyecto_id=int(request.POST['marcar_proyecto']))
+            elif 'marcar_todas' in request.POST:
+                marcadas = notificaciones.marcar_leidas(request.user, hasta=int(request.POST['marcar_todas']))
+            else:
+                marcadas = 0
+        except ValueError:
+            raise Http404
+        messages.success(request, f"{marcadas} notificación(es) marcada(s) como leída(s).")
+        return redirect('lista_notificaciones')
+    lista = Notificacion.objects.filter(
         usuario=request.user
     ).select_related('proyecto').order_by('-fecha')
-    if request.method == 'POST' and 'marcar_leida' in request.POST:
-        notificacion_id = request.POST.get('marcar_leida')
-        notificacion = get_object_or_404(Notificacion, id=notificacion_id, usuario=request.user)
-        notificacion.leida = True
-        notificacion.save()
-        messages.success(request, "Notificación marcada como leída.")
-        return redirect('lista_notificaciones')
-    return render(request, 'core/lista_notificaciones.html', {'notificaciones': notificaciones})
+    no_leidas_por_proyecto = Notificacion.objects.filter(
+        usuario=request.user, leida=False, proyecto__isnull=False
+    ).values('proyecto_id', 'proyecto__titulo').annotate(total=Count('id')).order_by('proyecto__titulo')
+    return render(request, 'core/lista_notificaciones.html', {
+        'notificaciones': lista,
+        'no_leidas_por_proyecto': no_leidas_por_proyecto,
+        'ultima_notificacion': lista.aggregate(ultima=Max('id'))['ultima'],
+    })
+
+# Vista para marcar notificaciones como leídas desde el chat
+@login_required
+def marcar_notificaciones(request):
+    """Marca en bloque las no leídas hasta ?hasta=<id> (y de ?proyecto=<id>) con un UPDATE."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'Método no permitido'}, status=405)
+    try:
+        hasta = int(request.POST['hasta']) if request.POST.get('hasta') else None
+        proyecto_id = int(request.POST['proyecto']) if request.POST.get('proyecto') else None
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros inválidos'}, status=400)
+    marcadas = notificaciones.marcar_leidas(request.user, proyecto_id=proyecto_id, hasta=hasta)
+    return JsonResponse({
+        'marcadas': marcadas,
+        'no_leidas': Notificacion.objects.filter(usuario=request.user, leida=False).count(),
+    })
 
 # Vista para eliminar un proyecto
 @login_required
@@ -392,11 +642,44 @@ def eliminar_proyecto(request, proyecto_id):
         return redirect('lista_proyectos')
     if request.method == 'POST':
         proyecto_titulo = proyecto.titulo
-        proyecto.delete()
+        # Se oculta al momento; sus datos los borra por lotes purgar_proyectos
+        purga.eliminar(proyecto, request.user)
         messages.success(request, f"El proyecto '{proyecto_titulo}' ha sido eliminado.")
         return redirect('lista_proyectos')
     return render(request, 'core/eliminar_proyecto.html', {'proyecto': proyecto})
 
+# Vista para clonar un proyecto
+@login_required
+def clonar_proyecto(request, proyecto_id):
+    """Copia un proyecto con sus tareas y, opcionalmente, sus grupos; solo administradores."""
+    original = get_object_or_404(
+        Proyecto.objects.filter(grupos__miembros=request.user).distinct(),
+        id=proyecto_id
+    )
+    es_admin = PerfilProyecto.objects.filter(
+        usuario=request.user, proyecto=original, rol='administrador'
+    ).exists()
+    if not (es_admin or request.user.is_superuser):
+        messages.warning(request, "No tienes permiso para clonar este proyecto.")
+        return redirect('lista_proyectos')
+    if request.method == 'POST':
+        form = ClonarProyectoForm(request.POST)
+        if form.is_valid():
+            proyecto = clonacion.clonar(
+                original, form.cleaned_data['titulo'], form.cleaned_data['fecha_inicio'],
+                request.user, form.cleaned_data['copiar_grupos']
+            )
+            messages.success(request, f"Proyecto '{proyecto.titulo}' creado a partir de '{original.titulo}'.")
+            return redirect('lista_tareas', proyecto_id=proyecto.id)
+        messages.error(request, "Error al clonar el proyecto. Verifica los datos.")
+    else:
+        form = ClonarProyectoForm(initial={
+            'titulo': f'Copia de {original.titulo}'[:200], 'fecha_inicio': timezone.localdate()
+        })
+    return render(request, 'core/clonar_proyecto.html', {
+        'form': form, 'proyecto': original, 'num_tareas': original.tareas.count()
+    })
+
 # Vista para eliminar una tarea
 @login_required
 def eliminar_tarea(request, proyecto_id, tarea_id):
@@ -428,47 +711,80 @@ def lockout(request, credentials, *args, **kwargs):
 # Vista JSON para la bandeja de entrada
 @login_required
 def bandeja_entrada_json(request):
-    """Devuelve datos JSON para la bandeja de entrada del chat y marca notificaciones como leídas."""
-    mensajes_recibidos = Mensaje.objects.filter(
-        destinatario=request.user
-    ).select_related('remitente', 'proyecto').order_by('-fecha_hora')[:5]
-    usuarios = User.objects.exclude(id=request.user.id)
-    proyectos = Proyecto.objects.filter(grupos__miembros=request.user).distinct()
-    
-    # Marcar todas las notificaciones no leídas del usuario como leídas al abrir el chat
-    Notificacion.objects.filter(
-        usuario=request.user,
-        leida=False
-    ).update(leida=True)
-    
+    """Devuelve datos JSON para la bandeja de entrada del chat (sin modificar nada)."""
+    conversaciones = _conversaciones_de(request.user)[:5]
+    # Destinatario y proyecto se buscan con autocompletar_usuarios/autocompletar_proyectos
     data = {
-        'mensajes_recibidos': [
+        'conversaciones': [
             {
-                'id': mensaje.id,
-                'remitente': mensaje.remitente.username,
-                'proyecto': mensaje.proyecto.titulo if mensaje.proyecto else None,
-                'contenido': mensaje.contenido,
-                'fecha_hora': mensaje.fecha_hora.strftime('%Y-%m-%d %H:%M:%S')
-            } for mensaje in mensajes_recibidos
+                'id': participante.conversacion_id,
+                'contraparte': participante.contraparte.username,
+                'fragmento': participante.conversacion.ultimo_fragmento,
+                'no_leidos': participante.no_leidos,
+                'fecha_hora': participante.ultimo_mensaje_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'url': reverse('ver_conversacion', args=[participante.conversacion_id])
+            } for participante in conversaciones
         ],
-        'usuarios': [{'id': usuario.id, 'username': usuario.username} for usuario in usuarios],
-        'proyectos': [{'id': proyecto.id, 'titulo': proyecto.titulo} for proyecto in proyectos]
+        # Cursor para marcar como leído solo lo que había al abrir el chat (marcar_notificaciones)
+        'ultima_notificacion': Notificacion.objects.filter(usuario=request.user).aggregate(ultima=Max('id'))['ultima'],
     }
     return JsonResponse(data)
 
+# Función auxiliar para la lista de conversaciones
+def _conversaciones_de(usuario):
+    """Conversaciones del usuario, más recientes primero (una consulta sobre participante_bandeja_idx)."""
+    return ParticipanteConversacion.objects.filter(
+        usuario=usuario, ultimo_mensaje_at__isnull=False
+    ).select_related('conversacion', 'contraparte').order_by('-ultimo_mensaje_at')
+
 # Vista para la bandeja de entrada completa
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_listado(_estado_bandeja))
 def bandeja_entrada(request):
-    """Muestra la bandeja de entrada completa del usuario."""
-    mensajes_recibidos = Mensaje.objects.filter(
-        destinatario=request.user
-    ).select_related('remitente', 'proyecto').order_by('-fecha_hora')
-    mensajes_enviados = Mensaje.objects.filter(
-        remitente=request.user
-    ).select_related('destinatario', 'proyecto').order_by('-fecha_hora')
+    """Muestra las conversaciones del usuario con su último mensaje y los no leídos."""
     return render(request, 'core/bandeja_entrada.html', {
-        'mensajes_recibidos': mensajes_recibidos,
-        'mensajes_enviados': mensajes_enviados
+        'conversaciones': _conversaciones_de(request.user)
+    })
+
+# Vista para ver y continuar una conversación
+@login_required
+def ver_conversacion(request, conversacion_id):
+    """Muestra los mensajes de una conversación, la marca como leída y permite responder."""
+    participante = get_object_or_404(
+        ParticipanteConversacion.objects.select_related('conversacion', 'contraparte'),
+        conversacion_id=conversacion_id,
+        usuario=request.user
+    )
+    conversacion = participante.conversacion
+    if request.method == 'POST':
+        form = MensajeForm(request.POST, usuario=request.user)
+        if form.is_valid():
+            mensaje = form.save(commit=False)
+            mensaje.remitente = request.user
+            mensaje.destinatario = participante.contraparte
+            mensaje.conversacion = conversacion
+            mensaje.save()
+            Notificacion.objects.create(
+                usuario=mensaje.destinatario,
+                mensaje=f"Has recibido un mensaje de {mensaje.remitente}" +
+                        (f" en el proyecto '{mensaje.proyecto.titulo}'" if mensaje.proyecto else ""),
+                proyecto=mensaje.proyecto
+            )
+            messages.success(request, f"Mensaje enviado a '{mensaje.destinatario.username}'.")
+            return redirect('ver_conversacion', conversacion_id=conversacion.id)
+        else:
+            messages.error(request, "Error al enviar el mensaje. Verifica los datos.")
+    else:
+        form = MensajeForm(usuario=request.user, initial={'destinatario': participante.contraparte})
+    if participante.no_leidos:
+        conversacion.marcar_leida(request.user)
+    mensajes = conversacion.mensajes.select_related('remitente', 'proyecto').order_by('fecha_hora')
+    return render(request, 'core/ver_conversacion.html', {
+        'conversacion': conversacion,
+        'contraparte': participante.contraparte,
+        'mensajes': mensajes,
+        'form': form
     })
 
 # Vista para responder un mensaje
@@ -481,6 +797,8 @@ def responder_mensaje(request, mensaje_id):
         destinatario=request.user
     )
     proyecto = mensaje_original.proyecto
+    if mensaje_original.conversacion_id:
+        mensaje_original.conversacion.marcar_leida(request.user)
     if request.method == 'POST':
         form = MensajeForm(request.POST, proyecto=proyecto, usuario=request.user)
         if form.is_valid():
@@ -546,16 +864,194 @@ def crear_grupo_general(request):
     else:
         form = GrupoForm()
     # Obtener todos los grupos del usuario
-    grupos = Grupo.objects.filter(miembros=request.user).select_related('proyecto')
+    grupos = grupos_activos().filter(miembros=request.user).select_related('proyecto')
     for grupo in grupos:
         grupo.usuarios = PerfilProyecto.objects.filter(grupo=grupo).select_related('usuario')
     return render(request, 'core/crear_grupo_general.html', {'form': form, 'grupos': grupos})
 
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag_listado(_estado_grupos))
 def lista_grupos(request):
     """Muestra todos los grupos existentes con sus miembros."""
-    grupos = Grupo.objects.all().select_related('proyecto')
+    grupos = grupos_activos().select_related('proyecto')
     # Obtener los usuarios de cada grupo a través de PerfilProyecto
     for grupo in grupos:
         grupo.usuarios = PerfilProyecto.objects.filter(grupo=grupo).select_related('usuario')
-    return render(request, 'core/lista_grupos.html', {'grupos': grupos})
\ No newline at end of file
+    return render(request, 'core/lista_grupos.html', {'grupos': grupos})
+
+# Límite máximo de resultados por página en los endpoints de autocompletado
+LIMITE_AUTOCOMPLETAR = 50
+
+def _respuesta_autocompletar(request, queryset, campo):
+    """Filtra por prefijo de `campo` y pagina con limite/desplazamiento."""
+    texto = request.GET.get('q', '').strip()
+    try:
+        limite = min(max(int(request.GET.get('limite', 20)), 1), LIMITE_AUTOCOMPLETAR)
+        desplazamiento = max(int(request.GET.get('desplazamiento', 0)), 0)
+    except ValueError:
+        return JsonResponse({'error': 'Parámetros de paginación inválidos'}, status=400)
+    if texto:
+        # startswith se traduce a LIKE 'texto%', que aprovecha el índice *_like de PostgreSQL
+        queryset = queryset.filter(**{f'{campo}__startswith': texto})
+    # Se pide una fila de más para saber si hay otra página sin hacer un COUNT
+    filas = list(
+        queryset.order_by(campo, 'id').values_list('id', campo)[desplazamiento:desplazamiento + limite + 1]
+    )
+    return JsonResponse({
+        'resultados': [{'id': pk, 'texto': texto_opcion} for pk, texto_opcion in filas[:limite]],
+        'hay_mas': len(filas) > limite
+    })
+
+@login_required
+def autocompletar_usuarios(request):
+    """Busca usuarios por prefijo del nombre de usuario para los selectores."""
+    usuarios = User.objects.filter(is_active=True)
+    if request.GET.get('excluir_propio'):
+        usuarios = usuarios.exclude(id=request.user.id)
+    return _respuesta_autocompletar(request, usuarios, 'username')
+
+@login_required
+def autocompletar_proyectos(request):
+    """Busca proyectos por prefijo del título dentro del ámbito del usuario."""
+    if request.GET.get('ambito') == 'administrados':
+        proyectos = proyectos_administrados(request.user)
+    else:
+        proyectos = proyectos_del_usuario(request.user)
+    return _respuesta_autocompletar(request, proyectos, 'titulo')
+
+@login_required
+def autocompletar_tareas(request):
+    """Busca tareas por prefijo del título dentro de un proyecto del usuario."""
+    try:
+        proyecto_id = int(request.GET.get('proyecto', ''))
+    except ValueError:
+        return JsonResponse({'error': 'Proyecto inválido'}, status=400)
+    tareas = Tarea.objects.filter(proyecto__in=proyectos_del_usuario(request.user), proyecto_id=proyecto_id)
+    return _respuesta_autocompletar(request, tareas, 'titulo')
+
+# Vista del diagrama de Gantt de un proyecto
+@login_required
+def diagrama_gantt(request, proyecto_id):
+    """Muestra el Gantt del proyecto; las filas se cargan de planificacion_json."""
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user), id=proyecto_id)
+    return render(request, 'core/diagrama_gantt.html', {'proyecto': proyecto})
+
+@login_required
+def planificacion_json(request, proyecto_id):
+    """Ruta crítica, fechas tempranas/tardías y holgura de cada tarea del proyecto.
+
+    Las tareas van como listas [id, titulo, estado, inicio_temprano, duracion,
+    holgura] ordenadas por inicio temprano, para que proyectos grandes pesen poco.
+    """
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user), id=proyecto_id)
+    try:
+        plan = planificacion.obtener(proyecto.id)
+    except planificacion.CicloError as error:
+        return JsonResponse({'error': str(error)}, status=409)
+    datos = {
+        pk: (titulo, estado)
+        for pk, titulo, estado in Tarea.objects.filter(proyecto=proyecto).values_list('id', 'titulo', 'estado')
+    }
+    return JsonResponse({
+        'fecha_inicio': proyecto.fecha_inicio.isoformat(),
+        'duracion_total': plan.duracion_total,
+        'ruta_critica': plan.ruta_critica(),
+        'tareas': [
+            [
+                fila['id'], *datos[fila['id']], fila['inicio_temprano'],
+                fila['fin_temprano'] - fila['inicio_temprano'], fila['holgura']
+            ]
+            for fila in plan.filas() if fila['id'] in datos
+        ],
+    })
+
+# Vista para consultar los perfiles capturados por PerfiladoMiddleware
+@staff_member_required
+def lista_perfiles(request):
+    """Lista los perfiles guardados y muestra las funciones con más tiempo acumulado."""
+    perfiles = perfilado.listar_perfiles()
+    nombre = request.GET.get('perfil')
+    seleccionado = perfilado.obtener_perfil(nombre) if nombre else (perfiles[0] if perfiles else None)
+    if nombre and seleccionado is None:
+        raise Http404("Perfil no encontrado")
+    resumen = texto = None
+    if seleccionado is not None:
+        if seleccionado.suffix == '.prof':
+            resumen = perfilado.resumen(seleccionado)
+        else:
+            texto = seleccionado.read_text(encoding='utf-8')
+    return render(request, 'core/lista_perfiles.html', {
+        'perfiles': perfiles,
+        'seleccionado': seleccionado,
+        'resumen': resumen,
+        'texto': texto,
+        'token': perfilado.generar_token(request.user),
+    })
+
+# Informe de carga de trabajo por usuario y semana
+def _parametros_informe(request):
+    """Lee semanas_atras, semanas_adelante y proyecto del GET, con límites razonables."""
+    def entero(nombre, defecto, minimo, maximo):
+        try:
+            return min(max(int(request.GET.get(nombre, defecto)), minimo), maximo)
+        except ValueError:
+            return defecto
+    return {
+        'hoy': timezone.localdate(),
+        'semanas_atras': entero('semanas_atras', 4, 0, 26),
+        'semanas_adelante': entero('semanas_adelante', 8, 1, 52),
+        'proyecto_id': entero('proyecto', 0, 0, 2**63 - 1) or None,
+    }
+
+@staff_member_required
+def informe_carga(request):
+    """Tareas abiertas y vencidas por usuario y semana, destacando a quien supera la capacidad."""
+    parametros = _parametros_informe(request)
+    informe = reportes.obtener_carga(**parametros)
+    capacidad = settings.CAPACIDAD_SEMANAL_TAREAS
+    return render(request, 'core/informe_carga.html', {
+        'informe': informe,
+        'filas': reportes.filas_informe(informe, capacidad),
+        'capacidad': capacidad,
+        'proyectos': Proyecto.objects.order_by('titulo').values_list('id', 'titulo'),
+        'proyecto_id': parametros['proyecto_id'],
+    })
+
+@staff_member_required
+def informe_carga_csv(request):
+    """El mismo informe en CSV (una línea por usuario y semana)."""
+    informe = reportes.obtener_carga(**_parametros_informe(request))
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="carga_{informe["hoy"]:%Y%m%d}.csv"'
+    reportes.escribir_csv(informe, response)
+    return response
+
+# Líneas de tiempo de actividad (paginadas por id, sin OFFSET)
+def _pagina_actividad(request, eventos, plantilla, contexto):
+    try:
+        antes = int(request.GET.get('antes', 0))
+    except ValueError:
+        antes = 0
+    pagina, siguiente = actividad.linea_de_tiempo(eventos, antes)
+    return render(request, plantilla, {**contexto, 'eventos': pagina, 'siguiente': siguiente})
+
+@login_required
+def actividad_proyecto(request, proyecto_id):
+    """Historial del proyecto, del más reciente al más antiguo."""
+    proyecto = get_object_or_404(proyectos_del_usuario(request.user), id=proyecto_id)
+    return _pagina_actividad(request, proyecto.actividad.all(), 'core/actividad.html', {'proyecto': proyecto})
+
+@login_required
+def actividad_usuario(request):
+    """Lo que ha hecho el usuario en sus proyectos."""
+    eventos = request.user.actividad.filter(proyecto__in=proyectos_del_usuario(request.user))
+    return _pagina_actividad(request, eventos, 'core/actividad.html', {'proyecto': None})
+
+# Vista para que Prometheus lea las métricas de la aplicación
+def metricas_prometheus(request):
+    """Métricas de todos los procesos en formato de texto; solo IPs de METRICAS_IPS o staff."""
+    # REMOTE_ADDR y no X-Forwarded-For, que el cliente puede falsear; el proxy no debe publicar /metrics
+    if request.META.get('REMOTE_ADDR') not in settings.METRICAS_IPS and not request.user.is_staff:
+        raise Http404
+    return HttpResponse(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,62 @@
+from urllib.parse import urlencode
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+
+
+class AutocompletarSelect(forms.Select):
+    """Select que solo renderiza la opción elegida y busca el resto por AJAX.
+
+    El queryset del campo sigue definiendo qué valores son válidos, pero nunca
+    se recorre completo al renderizar: las opciones se piden al endpoint
+    indicado por ``url_name`` a medida que el usuario escribe.
+    """
+
+    class Media:
+        js = ('core/js/autocompletar.js',)
+
+    def __init__(self, url_name, parametros=None, attrs=None):
+        super().__init__(attrs)
+        self.url_name = url_name
+        self.parametros = parametros or {}
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        url = reverse(self.url_name)
+        if self.parametros:
+            url = f'{url}?{urlencode(self.parametros)}'
+        attrs['data-autocompletar'] = url
+        return attrs
+
+    def optgroups(self, name, value, attrs=None):
+        opciones = []
+        campo = getattr(self.choices, 'field', None)
+        if campo is not None and campo.empty_label is not None:
+            opciones.append(('', campo.empty_label))
+        valores = [v for v in value if v not in ('', None)]
+        if valores and campo is not None:
+            try:
+                seleccionados = list(self.choices.queryset.filter(pk__in=valores))
+            except (ValueError, TypeError, ValidationError):
+                seleccionados = []
+            opciones.extend(self.choices.choice(obj) for obj in seleccionados)
+
+        groups = []
+        for index, (opcion_valor, opcion_etiqueta) in enumerate(opciones):
+            seleccionada = str(opcion_valor) in value
+            groups.append((None, [
+                self.create_option(name, opcion_valor, opcion_etiqueta, seleccionada, index, attrs=attrs)
+            ], index))
+        return groups
+
+
+class AutocompletarSelectMultiple(AutocompletarSelect):
+    """Variante múltiple de AutocompletarSelect: solo se renderizan las opciones elegidas."""
+    allow_multiple_selected = True
+
+    def value_from_datadict(self, data, files, name):
+        return forms.SelectMultiple().value_from_datadict(data, files, name)
+
+    def value_omitted_from_data(self, data, files, name):
+        return False  # Un <select multiple> sin nada marcado no envía el campo
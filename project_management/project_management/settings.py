@@ -1,10 +1,10 @@
-from decouple import config
+from decouple import Csv, config
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 SECRET_KEY = config('SECRET_KEY')
-DEBUG = True
+DEBUG = config('DEBUG', default=True, cast=bool)
 ALLOWED_HOSTS = []
 # Application definition
 INSTALLED_APPS = [
@@ -18,11 +18,17 @@ INSTALLED_APPS = [
     'core',
 ]
 MIDDLEWARE = [
+    'core.middleware.MetricasMiddleware',  # El primero: mide la petición completa
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Estáticos con hash y caché de larga duración
+    'core.middleware.CompresionMiddleware',  # Brotli/gzip; antes de todo lo que lea el cuerpo
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.LimiteLoginMiddleware',  # Antes de axes: corta ráfagas sin tocar la base de datos
+    'core.middleware.PerfiladoMiddleware',
+    'core.middleware.ActividadMiddleware',  # Historial de actividad en un insert por petición
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'axes.middleware.AxesMiddleware',
@@ -32,12 +38,19 @@ AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
 ]
 ROOT_URLCONF = 'project_management.urls'
+# Las plantillas se compilan una vez por proceso; en DEBUG el autoreload vacía la caché al editarlas
+CARGADORES_PLANTILLAS = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': CARGADORES_PLANTILLAS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,6 +91,49 @@ TIME_ZONE = 'UTC'
 USE_I18N = True
 USE_TZ = True
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Fuera de DEBUG los estáticos llevan hash en el nombre y WhiteNoise los sirve comprimidos e inmutables
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+# Particionado mensual de Mensaje/Notificacion (solo PostgreSQL, ver gestionar_particiones)
+PARTICIONES_MESES_FUTUROS = config('PARTICIONES_MESES_FUTUROS', default=3, cast=int)
+RETENCION_MENSAJES_MESES = config('RETENCION_MENSAJES_MESES', default=12, cast=int)
+RETENCION_NOTIFICACIONES_MESES = config('RETENCION_NOTIFICACIONES_MESES', default=6, cast=int)
+DIRECTORIO_ARCHIVO_PARTICIONES = BASE_DIR / 'archivo'
+# Perfilado bajo demanda (staff con token firmado, ver core.perfilado)
+PERFILADO_DIRECTORIO = BASE_DIR / 'perfiles'
+PERFILADO_MAX_ARCHIVOS = config('PERFILADO_MAX_ARCHIVOS', default=50, cast=int)
+PERFILADO_VALIDEZ_TOKEN = 3600  # segundos
+# Informe de carga: tareas abiertas por semana a partir de las cuales un usuario está sobrecargado
+CAPACIDAD_SEMANAL_TAREAS = config('CAPACIDAD_SEMANAL_TAREAS', default=10, cast=int)
+# Recordatorios de fecha límite (manage.py recordatorios)
+DIAS_AVISO_RECORDATORIO = config('DIAS_AVISO_RECORDATORIO', default=2, cast=int)
+DIAS_RECORDATORIO_VENCIDAS = config('DIAS_RECORDATORIO_VENCIDAS', default=30, cast=int)  # No se avisa de las más antiguas
+# Resúmenes diarios de notificaciones por correo (manage.py enviar_resumenes)
+EMAIL_BACKEND = config('EMAIL_BACKEND', default='django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = config('EMAIL_HOST', default='localhost')  # Sirve un SMTP local como `python -m aiosmtpd -n`
+EMAIL_PORT = config('EMAIL_PORT', default=25, cast=int)
+EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
+EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=False, cast=bool)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='no-responder@localhost')
+RESUMEN_MAX_NOTIFICACIONES = config('RESUMEN_MAX_NOTIFICACIONES', default=20, cast=int)  # Por correo; el resto se cuenta
+# Lectura anidada del panel (api/v1/panel/): niveles de relaciones y filas estimadas máximas
+PANEL_PROFUNDIDAD_MAXIMA = config('PANEL_PROFUNDIDAD_MAXIMA', default=4, cast=int)
+PANEL_COSTE_MAXIMO = config('PANEL_COSTE_MAXIMO', default=20000, cast=int)
+# Compresión de respuestas: por debajo de este tamaño (bytes) no compensa
+COMPRESION_TAMANO_MINIMO = config('COMPRESION_TAMANO_MINIMO', default=1024, cast=int)
+# Métricas de Prometheus en /metrics (core.metricas): un archivo por proceso, sumados al exportar
+METRICAS_DIRECTORIO = config('METRICAS_DIRECTORIO', default=str(BASE_DIR / 'metricas'))  # Vacío: solo el proceso actual
+METRICAS_INTERVALO_VOLCADO = config('METRICAS_INTERVALO_VOLCADO', default=10, cast=float)  # segundos
+METRICAS_IPS = config('METRICAS_IPS', default='127.0.0.1,::1', cast=Csv())  # Además del staff
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGOUT_REDIRECT_URL = '/'
 # Seguridad general
@@ -93,6 +149,42 @@ SECURE_HSTS_PRELOAD = True
 SESSION_COOKIE_AGE = 3600  # 1 hora de duración de la sesión
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # Sesión expira al cerrar el navegador
 SESSION_COOKIE_HTTPONLY = True  # Evita acceso a cookies desde JavaScript
+# Almacén de sesiones: 'db', 'cached_db' (lecturas desde caché, escrituras también a BD),
+# 'cache' (solo caché), 'file' o 'cookies' (firmadas, sin estado en el servidor)
+SESSION_MODO = config('SESSION_MODO', default='cached_db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'file': 'django.contrib.sessions.backends.file',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[SESSION_MODO]
+SESSION_CACHE_ALIAS = 'sesiones'
+# La caché de sesiones debe ser compartida por todos los procesos: con LocMemCache un
+# logout en un worker no invalidaría la copia de otro. Por defecto, en disco.
+SESSION_CACHE_BACKEND = config('SESSION_CACHE_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache')
+SESSION_CACHE_UBICACION = config('SESSION_CACHE_UBICACION', default=str(BASE_DIR / 'cache' / 'sesiones'))
+# Versiones de invalidación y datos cacheados que todos los workers deben ver igual
+# (core.opciones). Como la de sesiones, por defecto en disco; en producción conviene
+# Redis o Memcached. Con LocMemCache cada worker tendría sus propias versiones y
+# seguiría sirviendo opciones borradas (el check core.E001 lo impide sin DEBUG).
+CACHE_COMPARTIDA = 'compartida'
+CACHE_COMPARTIDA_BACKEND = config('CACHE_COMPARTIDA_BACKEND', default='django.core.cache.backends.filebased.FileBasedCache')
+CACHE_COMPARTIDA_UBICACION = config('CACHE_COMPARTIDA_UBICACION', default=str(BASE_DIR / 'cache' / 'compartida'))
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'compartida': {
+        'BACKEND': CACHE_COMPARTIDA_BACKEND,
+        'LOCATION': CACHE_COMPARTIDA_UBICACION,
+    },
+    'sesiones': {
+        'BACKEND': SESSION_CACHE_BACKEND,
+        'LOCATION': SESSION_CACHE_UBICACION,
+        'TIMEOUT': SESSION_COOKIE_AGE,
+    },
+}
 
 LOGGING = {
     'version': 1,
@@ -115,4 +207,10 @@ LOGGING = {
 AXES_FAILURE_LIMIT = 5  # Máximo 5 intentos fallidos
 AXES_COOLOFF_TIME = 1  # Bloqueo por 1 hora tras fallos
 AXES_RESET_ON_SUCCESS = True  # Reinicia el contador al loguearse correctamente
-AXES_LOCKOUT_URL = '/lockout/'
\ No newline at end of file
+AXES_LOCKOUT_URL = '/lockout/'
+# Limitador de login en caché (core.limites): intentos por ventana deslizante
+LIMITE_LOGIN_RUTAS = ('/accounts/login/', '/admin/login/')
+LIMITE_LOGIN_POR_IP = config('LIMITE_LOGIN_POR_IP', default=20, cast=int)
+LIMITE_LOGIN_POR_USUARIO = config('LIMITE_LOGIN_POR_USUARIO', default=10, cast=int)
+LIMITE_LOGIN_VENTANA = config('LIMITE_LOGIN_VENTANA', default=300, cast=int)  # segundos
+LIMITE_LOGIN_CACHE = 'default'  # En producción debe ser compartida entre procesos (Redis/Memcached)
\ No newline at end of file